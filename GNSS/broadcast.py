@@ -0,0 +1,249 @@
+#!/usr/bin/env python
+
+"""
+Container for vectorized GPS / Galileo broadcast orbit calculations (IS-GPS-200, Galileo OS SIS ICD)
+Functions:
+    gpsSeconds
+    selectEphemerides
+    satPosClock
+    azimElev
+    satGeometry
+    predictDOP
+"""
+
+# Import required packages
+import numpy as np
+
+from GNSS.wgs84 import WGS84
+import GNSS.dop as dop
+import GNSS.geo as geo
+
+# gravitational constant per satellite system (m^3/s^2)
+dMu = {'G': WGS84.mu, 'E': 3.986004418e14}
+
+# GPS time origin
+GPS_EPOCH = np.datetime64('1980-01-06T00:00:00', 'ns')
+
+
+def gpsSeconds(dt):
+    """
+    Converts datetime64 times into GPS seconds since 1980-01-06 (no leap seconds applied)
+
+    :param dt: times
+    :type dt: array of datetime64
+    :returns: GPS seconds
+    :rtype: numpy array of float
+    """
+    return (np.asarray(dt, dtype='datetime64[ns]') - GPS_EPOCH) / np.timedelta64(1, 's')
+
+
+def selectEphemerides(naEph, prns, gpsSecs, maxAge=7200., transmitted=True):
+    """
+    Selects for each (PRN, time) the ephemeris to use: the last one transmitted before the time (as a receiver
+    would) or, when transmitted is False, the one with the time of ephemeris closest to the time
+
+    :param naEph: ephemerides (see gfzrnx.rnxnav_reader)
+    :type naEph: numpy structured array
+    :param prns: PRN of each request
+    :type prns: array of str
+    :param gpsSecs: time of each request in GPS seconds
+    :type gpsSecs: array of float
+    :param maxAge: maximum time difference with the time of ephemeris (s)
+    :type maxAge: float
+    :param transmitted: select the last transmitted ephemeris instead of the closest one
+    :type transmitted: bool
+    :returns: index in naEph for each request, -1 when no ephemeris is valid
+    :rtype: numpy array of int
+    """
+    prns = np.asarray(prns)
+    gpsSecs = np.asarray(gpsSecs, dtype=np.float64)
+
+    idxEph = np.full(prns.shape, -1, dtype=np.intp)
+    if naEph.size == 0:
+        return idxEph
+
+    # key on (PRN, time), the PRN code is large enough to separate the satellites
+    _, prnCodes = np.unique(np.concatenate((naEph['prn'], prns)), return_inverse=True)
+    ephCodes, reqCodes = prnCodes[:naEph.size], prnCodes[naEph.size:]
+    ephToe = naEph['week'] * 604800. + naEph['toe']
+    ephTime = naEph['week'] * 604800. + naEph['ttr'] if transmitted else ephToe
+    span = 1e10
+    ephKeys = ephCodes * span + ephTime
+    order = np.argsort(ephKeys, kind='stable')
+
+    # candidates before and (when not transmitted) after the requested time
+    pos = np.searchsorted(ephKeys[order], reqCodes * span + gpsSecs, side='right')
+    lstCands = [order[np.maximum(pos - 1, 0)]]
+    if not transmitted:
+        lstCands.append(order[np.minimum(pos, naEph.size - 1)])
+
+    bestAge = np.full(prns.shape, np.inf)
+    for idxCand in lstCands:
+        age = np.abs(gpsSecs - ephToe[idxCand])
+        better = (ephCodes[idxCand] == reqCodes) & (ephTime[idxCand] <= gpsSecs if transmitted else True) & (age <= maxAge) & (age < bestAge)
+        idxEph[better] = idxCand[better]
+        bestAge[better] = age[better]
+
+    return idxEph
+
+
+def satPosClock(naEph, gpsSecs, relativistic=True):
+    """
+    Calculates the ECEF position and the clock correction of satellites from their broadcast ephemerides
+
+    :param naEph: ephemeris for each request (eg naEph[selectEphemerides(...)])
+    :type naEph: numpy structured array
+    :param gpsSecs: (transmission) time of each request in GPS seconds
+    :type gpsSecs: array of float
+    :param relativistic: include the relativistic clock correction
+    :type relativistic: bool
+    :returns: ECEF positions (N, 3) in m, clock corrections in s (no group delay applied)
+    :rtype: tuple of numpy arrays
+    """
+    gpsSecs = np.asarray(gpsSecs, dtype=np.float64)
+    mu = np.where(np.char.startswith(naEph['prn'], 'E'), dMu['E'], dMu['G'])
+
+    # time from ephemeris reference epoch
+    tk = gpsSecs - (naEph['week'] * 604800. + naEph['toe'])
+
+    A = naEph['sqrta']**2
+    n = np.sqrt(mu / A**3) + naEph['deltan']
+    Mk = naEph['m0'] + n * tk
+    Ek = geo.keplerE(Mk, naEph['ecc'])
+    sinEk, cosEk = np.sin(Ek), np.cos(Ek)
+
+    # argument of latitude, radius and inclination corrected by the harmonic perturbations
+    vk = np.arctan2(np.sqrt(1 - naEph['ecc']**2) * sinEk, cosEk - naEph['ecc'])
+    Phik = vk + naEph['omega']
+    sin2Phik, cos2Phik = np.sin(2 * Phik), np.cos(2 * Phik)
+    uk = Phik + naEph['cus'] * sin2Phik + naEph['cuc'] * cos2Phik
+    rk = A * (1 - naEph['ecc'] * cosEk) + naEph['crs'] * sin2Phik + naEph['crc'] * cos2Phik
+    ik = naEph['i0'] + naEph['idot'] * tk + naEph['cis'] * sin2Phik + naEph['cic'] * cos2Phik
+
+    # position in orbital plane and corrected longitude of ascending node
+    xk = rk * np.cos(uk)
+    yk = rk * np.sin(uk)
+    Omegak = naEph['omega0'] + (naEph['omegadot'] - WGS84.omega_ie) * tk - WGS84.omega_ie * naEph['toe']
+
+    naPos = np.column_stack((xk * np.cos(Omegak) - yk * np.cos(ik) * np.sin(Omegak),
+                             xk * np.sin(Omegak) + yk * np.cos(ik) * np.cos(Omegak),
+                             yk * np.sin(ik)))
+
+    # satellite clock correction and relativistic effect
+    dtc = gpsSecs - naEph['toc']
+    naClk = naEph['af0'] + naEph['af1'] * dtc + naEph['af2'] * dtc**2
+    if relativistic:
+        naClk -= 2 * np.sqrt(mu) / WGS84.c**2 * naEph['ecc'] * naEph['sqrta'] * sinEk
+
+    return naPos, naClk
+
+
+def azimElev(naPos, rxEcef):
+    """
+    Calculates azimuth and elevation of satellite positions seen from the receiver position
+
+    :param naPos: ECEF positions (N, 3) in m
+    :type naPos: numpy array
+    :param rxEcef: receiver ECEF position (x, y, z) in m
+    :type rxEcef: array of float
+    :returns: azimuth, elevation in degrees and range in m
+    :rtype: tuple of numpy arrays
+    """
+    rxEcef = np.asarray(rxEcef, dtype=np.float64)
+
+    # line of sight in the local East, North, Up frame (rotation cached per receiver position)
+    naLos = np.asarray(naPos) - rxEcef
+    naENU = np.asarray(WGS84().ecef2enu(naPos, rxEcef))
+    naRange = np.linalg.norm(naLos, axis=-1)
+
+    azim = np.rad2deg(np.arctan2(naENU[..., 0], naENU[..., 1])) % 360.
+    elev = np.rad2deg(np.arcsin(naENU[..., 2] / naRange))
+
+    return azim, elev, naRange
+
+
+def satGeometry(naEph, prns, gpsSecs, rxEcef, maxAge=7200.):
+    """
+    Calculates for all satellites at all epochs (receive times) the ECEF position at transmission time, the clock
+    correction and the azimuth and elevation seen from the receiver. The satellite position is rotated with the
+    Earth during the signal travel time
+
+    :param naEph: ephemerides (see gfzrnx.rnxnav_reader)
+    :type naEph: numpy structured array
+    :param prns: satellites
+    :type prns: array of str
+    :param gpsSecs: receive times in GPS seconds
+    :type gpsSecs: array of float
+    :param rxEcef: receiver ECEF position (x, y, z) in m
+    :type rxEcef: array of float
+    :param maxAge: maximum time difference with the time of ephemeris (s)
+    :type maxAge: float
+    :returns: dict with arrays (epochs, satellites) X, Y, Z, clock, azim, elev (NaN without valid ephemeris)
+    :rtype: dict
+    """
+    prns = np.asarray(prns)
+    gpsSecs = np.asarray(gpsSecs, dtype=np.float64)
+    rxEcef = np.asarray(rxEcef, dtype=np.float64)
+
+    # all combinations of epochs and satellites
+    naT = np.repeat(gpsSecs, prns.size)
+    naPRN = np.tile(prns, gpsSecs.size)
+
+    idxEph = selectEphemerides(naEph=naEph, prns=naPRN, gpsSecs=naT, maxAge=maxAge)
+    valid = idxEph >= 0
+    naEphReq = naEph[np.where(valid, idxEph, 0)]
+
+    # transmission time from the geometric range (two iterations are sufficient)
+    tau = np.full(naT.shape, 0.075)
+    for _ in range(2):
+        naPos, naClk = satPosClock(naEph=naEphReq, gpsSecs=naT - tau)
+        tau = np.linalg.norm(naPos - rxEcef, axis=-1) / WGS84.c
+
+    # Earth rotation during signal travel time
+    theta = WGS84.omega_ie * tau
+    naPos = np.column_stack((np.cos(theta) * naPos[:, 0] + np.sin(theta) * naPos[:, 1],
+                             -np.sin(theta) * naPos[:, 0] + np.cos(theta) * naPos[:, 1],
+                             naPos[:, 2]))
+    azim, elev, _ = azimElev(naPos=naPos, rxEcef=rxEcef)
+
+    dGeom = {}
+    for key, naValues in zip(('X', 'Y', 'Z', 'clock', 'azim', 'elev'), (naPos[:, 0], naPos[:, 1], naPos[:, 2], naClk, azim, elev)):
+        dGeom[key] = np.where(valid, naValues, np.nan).reshape(gpsSecs.size, prns.size)
+
+    return dGeom
+
+
+def predictDOP(naEph, gpsSecs, rxEcef, elevMask=5., systems=True, maxAge=7200.):
+    """
+    Predicts the number of visible satellites and the xDOP values at the receiver position from the broadcast ephemerides
+
+    :param naEph: ephemerides (see gfzrnx.rnxnav_reader)
+    :type naEph: numpy structured array
+    :param gpsSecs: times in GPS seconds
+    :type gpsSecs: array of float
+    :param rxEcef: receiver ECEF position (x, y, z) in m
+    :type rxEcef: array of float
+    :param elevMask: elevation cutoff angle in degrees
+    :type elevMask: float
+    :param systems: use a receiver clock per satellite system
+    :type systems: bool
+    :returns: number of visible satellites per epoch, dict of xDOP arrays per epoch (see dop.batchDOP)
+    :rtype: tuple
+    """
+    gpsSecs = np.asarray(gpsSecs, dtype=np.float64)
+    prns = np.unique(naEph['prn'])
+    dGeom = satGeometry(naEph=naEph, prns=prns, gpsSecs=gpsSecs, rxEcef=rxEcef, maxAge=maxAge)
+
+    epochIdx, satIdx = np.nonzero(dGeom['elev'] >= elevMask)
+    nrSVs = np.bincount(epochIdx, minlength=gpsSecs.size)
+
+    uniqIdx, naGeom, _ = dop.stackGeometry(epochs=epochIdx, elev=dGeom['elev'][epochIdx, satIdx], azim=dGeom['azim'][epochIdx, satIdx], systems=np.array([prn[0] for prn in prns])[satIdx] if systems else None)
+    dSubDOP = dop.batchDOP(naGeom)
+
+    # epochs without visible satellites get NaN
+    dDOP = {}
+    for key, naSubDOP in dSubDOP.items():
+        dDOP[key] = np.full(gpsSecs.size, np.nan)
+        dDOP[key][uniqIdx] = naSubDOP
+
+    return nrSVs, dDOP
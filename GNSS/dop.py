@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+
+"""
+Container for batched Dilution Of Precision (DOP) calculations
+Functions:
+    directionCosines
+    stackGeometry
+    batchDOP
+"""
+
+# Import required packages
+import numpy as np
+
+
+def directionCosines(elev, azim):
+    """
+    Calculates the local (East, North, Up) direction cosines of the line of sight to the satellites
+
+    :param elev: elevation angles in degrees
+    :type elev: array of float
+    :param azim: azimuth angles in degrees
+    :type azim: array of float
+    :returns: direction cosines (alpha, beta, gamma) per satellite
+    :rtype: numpy array (N, 3)
+    """
+    elRad = np.deg2rad(np.asarray(elev, dtype=np.float64))
+    azRad = np.deg2rad(np.asarray(azim, dtype=np.float64))
+    cosEl = np.cos(elRad)
+
+    return np.column_stack((cosEl * np.sin(azRad), cosEl * np.cos(azRad), np.sin(elRad)))
+
+
+def stackGeometry(epochs, elev, azim, systems=None):
+    """
+    Groups the satellites by epoch (single sort) and stacks the geometry matrices of all epochs.
+    When systems is given, a receiver clock column is used per satellite system (sorted order of
+    the systems) so that the inter-system bias is estimated. Rows beyond the number of satellites
+    of an epoch are zero (also in the clock columns) so that they do not contribute to the normal matrix
+
+    :param epochs: epoch of each satellite observation
+    :type epochs: array (sortable, eg datetime64)
+    :param elev: elevation angles in degrees
+    :type elev: array of float
+    :param azim: azimuth angles in degrees
+    :type azim: array of float
+    :param systems: satellite system of each observation (eg 'E', 'G'), None for a single clock
+    :type systems: array of str
+    :returns: unique epochs, geometry matrices (epochs, nsv_max, 3 + #clocks), mask of used rows (epochs, nsv_max)
+    :rtype: tuple of numpy arrays
+    """
+    naEpochs = np.asarray(epochs)
+    order = np.argsort(naEpochs, kind='stable')
+
+    # offsets of each epoch in the sorted rows
+    uniqEpochs, start, counts = np.unique(naEpochs[order], return_index=True, return_counts=True)
+    epochIdx = np.repeat(np.arange(len(uniqEpochs)), counts)
+    slotIdx = np.arange(len(order)) - np.repeat(start, counts)
+    nsvMax = counts.max() if len(counts) else 0
+
+    # index of the clock column for each observation
+    if systems is None:
+        clkIdx = np.zeros(len(order), dtype=int)
+    else:
+        _, clkIdx = np.unique(np.asarray(systems)[order], return_inverse=True)
+    nClks = clkIdx.max() + 1 if len(clkIdx) else 1
+
+    naGeom = np.zeros((len(uniqEpochs), nsvMax, 3 + nClks))
+    naMask = np.zeros((len(uniqEpochs), nsvMax), dtype=bool)
+
+    naGeom[epochIdx, slotIdx, :3] = directionCosines(np.asarray(elev)[order], np.asarray(azim)[order])
+    naGeom[epochIdx, slotIdx, 3 + clkIdx.ravel()] = 1.
+    naMask[epochIdx, slotIdx] = True
+
+    return uniqEpochs, naGeom, naMask
+
+
+def batchDOP(naGeom):
+    """
+    Solves the normal matrices of all epochs at once and derives the xDOP values.
+    Clock columns of satellite systems absent at an epoch are decoupled and not taken into account.
+    Epochs with a singular geometry (eg too few satellites) get NaN
+
+    :param naGeom: geometry matrices (epochs, nsv_max, 3 + #clocks) with columns E, N, U, clock(s)
+    :type naGeom: numpy array
+    :returns: HDOP, VDOP, PDOP, TDOP and GDOP for each epoch
+    :rtype: dict of numpy arrays
+    """
+    nEpochs, _, nCols = naGeom.shape
+
+    # normal matrices ATA for all epochs
+    naN = np.einsum('eki,ekj->eij', naGeom, naGeom)
+
+    # put a unit diagonal element for clocks without satellites at an epoch
+    clkDiag = np.diagonal(naN, axis1=1, axis2=2)[:, 3:]
+    clkAbsent = clkDiag == 0
+    epochAbsent, clkAbsentIdx = np.nonzero(clkAbsent)
+    naN[epochAbsent, 3 + clkAbsentIdx, 3 + clkAbsentIdx] = 1.
+
+    # only invert the well conditioned matrices
+    valid = np.linalg.matrix_rank(naN) == nCols
+    naQ = np.full((nEpochs, nCols, nCols), np.nan)
+    if valid.any():
+        naQ[valid] = np.linalg.inv(naN[valid])
+
+    qDiag = np.diagonal(naQ, axis1=1, axis2=2)
+    qClk = np.where(clkAbsent, 0., qDiag[:, 3:])
+
+    dDOP = {}
+    dDOP['HDOP'] = np.sqrt(qDiag[:, 0] + qDiag[:, 1])
+    dDOP['VDOP'] = np.sqrt(qDiag[:, 2])
+    dDOP['PDOP'] = np.sqrt(qDiag[:, 0] + qDiag[:, 1] + qDiag[:, 2])
+    dDOP['TDOP'] = np.sqrt(qClk.sum(axis=1))
+    dDOP['GDOP'] = np.sqrt(dDOP['PDOP']**2 + dDOP['TDOP']**2)
+
+    return dDOP
@@ -12,7 +12,8 @@ Functions:
 """
 
 # Import required packages
-from math import sqrt, pi, sin
+from math import sqrt, pi
+import numpy as np
 
 
 def deg2rad(deg):
@@ -88,23 +89,28 @@ def gpsWeekCheck(t):
     return t
 
 
-def keplerE(M_k, ecc, tolerance=1e-12):
+def keplerE(M_k, ecc, iterations=5):
     """
-    Iteratively calculates E_k using Kepler's equation:
-    E_k = M_k + ecc * sin(E_k)
+    Calculates E_k from Kepler's equation E_k = M_k + ecc * sin(E_k) by Newton-Raphson iteration.
+    Works on scalars or arrays: the mean anomalies are reduced to [-pi, pi), the start value is the second order
+    series in ecc and a fixed number of iterations is done (5 gives 1e-12 rad up to ecc 0.9, use 8 up to 0.99)
 
     :param M_k: mean anomaly in radian
-    :type M_k: float
+    :type M_k: float or array of float
     :param ecc: numeric eccentricity
-    :type ecc: float
-    :param tolerance: tolerance to stop iteration
-    :type tolerance: float
-    :returns: ecce anomaly
-    :rtype: float
+    :type ecc: float or array of float
+    :param iterations: number of Newton-Raphson iterations
+    :type iterations: int
+    :returns: eccentric anomaly in radian
+    :rtype: float or numpy array of float
     """
-    E_k = M_k
-    E_0 = E_k + tolerance * 10.
-    while abs(E_k - E_0) > tolerance:
-        E_0 = E_k
-        E_k = M_k + ecc * sin(E_k)
-    return E_k
+    M_k = np.asarray(M_k, dtype=np.float64)
+    ecc = np.asarray(ecc, dtype=np.float64)
+
+    M_r = np.remainder(M_k + pi, 2 * pi) - pi
+    E_k = M_r + ecc * np.sin(M_r) * (1 + ecc * np.cos(M_r))
+    for _ in range(iterations):
+        E_k = E_k - (E_k - ecc * np.sin(E_k) - M_r) / (1 - ecc * np.cos(E_k))
+    E_k = E_k + (M_k - M_r)
+
+    return E_k if E_k.ndim else float(E_k)
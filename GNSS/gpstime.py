@@ -46,10 +46,12 @@ as compared to some algorigthms found in the literature and on the web.
 # __date__ = git_version.date
 # __version__ = git_version.id
 
+import os
 import time
 import datetime
 import math
 import numpy as np
+from functools import lru_cache
 
 SECSINWEEK = 604800
 SECSINDAY = 86400
@@ -59,6 +61,9 @@ SECSINQUARTER = 900
 SECSINTWOHOUR = 7200
 SECSINTHREEHOUR = 10800
 DT06JAN80 = (1980, 1, 6, 0, 0, 0)  # (year, month, day, hh, mm, ss)
+DT64GPSEPOCH = np.datetime64('1980-01-06T00:00:00', 'ns')
+TAIMINUSGPS = 19  # TAI - GPST in seconds (constant)
+LEAPSECONDFILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'Leap_Second.dat')
 
 
 def dayOfWeek(year, month, day):
@@ -293,6 +298,78 @@ def UTCFromWT(weeknr, tow):
     time = datum+week+sec
     return time
 
+
+@lru_cache(maxsize=4)
+def leapSecondsTable(leapFile=LEAPSECONDFILE):
+    """
+    reads the IERS leap second table (MJD, day, month, year, TAI-UTC) and converts
+    it to the GPS time at which each new value of GPS-UTC takes effect
+
+    :param leapFile: name of leap second file
+    :type leapFile: string
+    :returns: GPS seconds since GPS epoch at which GPS-UTC changes, GPS-UTC in seconds
+    :rtype: tuple of numpy arrays (int64)
+    """
+    gpsSecs = []
+    leapSecs = []
+    with open(leapFile, 'r') as fLeap:
+        for line in fLeap:
+            rec = line.split()
+            if len(rec) != 5 or rec[0].startswith('#'):
+                continue
+            day, month, year, taiUTC = int(rec[1]), int(rec[2]), int(rec[3]), int(rec[4])
+            gpsUTC = taiUTC - TAIMINUSGPS
+            # the new offset applies from 00:00:00 UTC of that date, expressed in GPS time
+            utcSecs = (datetime.datetime(year, month, day) - datetime.datetime(*DT06JAN80)).total_seconds()
+            gpsSecs.append(int(utcSecs) + gpsUTC)
+            leapSecs.append(gpsUTC)
+
+    return np.array(gpsSecs, dtype=np.int64), np.array(leapSecs, dtype=np.int64)
+
+
+def leapSecondsFromGpsSeconds(gpsSeconds, leapFile=LEAPSECONDFILE):
+    """
+    looks up GPS-UTC for an array of GPS seconds since the GPS epoch
+
+    :param gpsSeconds: seconds since GPS epoch
+    :type gpsSeconds: array of float
+    :param leapFile: name of leap second file
+    :type leapFile: string
+    :returns: GPS-UTC in seconds (0 before the GPS epoch)
+    :rtype: numpy array (int64)
+    """
+    naGpsChange, naLeapSecs = leapSecondsTable(leapFile)
+    index = np.searchsorted(naGpsChange, gpsSeconds, side='right') - 1
+
+    return np.clip(naLeapSecs[np.clip(index, 0, None)], 0, None)
+
+
+def UTCFromWTArray(weeknr, tow, leapSecs=False, leapFile=LEAPSECONDFILE):
+    """
+    get UTC time from weektime for arrays of week numbers and TOWs in one call.
+    Gives the same result as UTCFromWT applied element wise (resolution 1 microsec)
+
+    :param weeknr: (full) GPS week numbers
+    :type weeknr: array of int
+    :param tow: time of week in seconds
+    :type tow: array of float
+    :param leapSecs: subtract GPS-UTC taken from leapFile
+    :type leapSecs: bool
+    :param leapFile: name of leap second file
+    :type leapFile: string
+    :returns: date and time for each week / tow pair
+    :rtype: numpy array of datetime64[ns]
+    """
+    naWeek = np.asarray(weeknr, dtype=np.int64)
+    naTOW = np.asarray(tow, dtype=np.float64)
+
+    # work in integer microseconds like datetime.timedelta does
+    usecs = naWeek * (SECSINWEEK * 1000000) + np.round(naTOW * 1e6).astype(np.int64)
+    if leapSecs:
+        usecs = usecs - leapSecondsFromGpsSeconds(usecs // 1000000, leapFile) * 1000000
+
+    return DT64GPSEPOCH + (usecs * 1000).astype('timedelta64[ns]')
+
 # def PyUTCFromGpsSeconds(gpsseconds):
 #     """converts gps seconds to the
 #     python epoch. That is, the time
@@ -342,6 +419,25 @@ def testDayOfWeek():
     print('2002, 10, 6  -> 0  ==??== ', dayOfWeek(2002, 10, 6))
 
 
+def testUTCFromWTArray():
+    """test and time the array conversion from weektime for a full day at 1 Hz"""
+    naWeek = np.full(SECSINDAY, 2140)
+    naTOW = np.arange(SECSINDAY, dtype=np.float64) + 3 * SECSINDAY
+
+    tStart = time.perf_counter()
+    lstDT = [UTCFromWT(int(w), t) for w, t in zip(naWeek, naTOW)]
+    tScalar = time.perf_counter() - tStart
+
+    tStart = time.perf_counter()
+    naDT = UTCFromWTArray(naWeek, naTOW)
+    tArray = time.perf_counter() - tStart
+
+    print('UTCFromWT      (%d epochs): %8.4f s' % (SECSINDAY, tScalar))
+    print('UTCFromWTArray (%d epochs): %8.4f s  speedup x%.0f' % (SECSINDAY, tArray, tScalar / tArray))
+    print('identical results: ', np.array_equal(np.array(lstDT, dtype='datetime64[ns]'), naDT))
+    print('GPST 2020/12/31 00:00:00 in UTC: ', UTCFromWTArray([2138], [4 * SECSINDAY], leapSecs=True)[0])
+
+
 def testPyUtilties():
     """test utilities"""
     ymdhms = (2002, 10, 12, 8, 34, 12.3)
@@ -366,4 +462,5 @@ if __name__ == "__main__":
     testGpsWeek()
     testJulD()
     testDayOfWeek()
+    testUTCFromWTArray()
     testPyUtilties()
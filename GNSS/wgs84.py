@@ -7,13 +7,45 @@ Classes:
         lla2ecef
         ecef2lla
     WGS84 - constant parameters for GPS class
+Functions:
+    rotationEcef2Enu
 """
 # Import required packages
+from functools import lru_cache
 from math import sqrt, sin, cos, tan, atan, atan2
-from numpy import array, dot
+import time
+import numpy as np
 import GNSS.geo as geo
 
 
+def asPoints(crd):
+    """
+    Returns the coordinates as (N, 3) array and whether a single point (x, y, z) was given
+    """
+    naCrd = np.asarray(crd, dtype=np.float64)
+    return np.atleast_2d(naCrd), naCrd.ndim == 1
+
+
+@lru_cache(maxsize=64)
+def rotationEcef2Enu(x0, y0, z0):
+    """
+    Returns the (read-only) rotation matrix from ECEF to the local East, North, Up frame at the origin (x0, y0, z0).
+    The matrix is cached per origin so that repeated conversions to the same local frame do not recompute it
+
+    :param x0, y0, z0: ECEF coordinates of the origin in m
+    :type x0, y0, z0: float
+    :returns: rotation matrix (3, 3)
+    :rtype: numpy array
+    """
+    lat, lon, _ = np.deg2rad(WGS84().ecef2lla((x0, y0, z0)))
+    Re2enu = np.array([[-np.sin(lon), np.cos(lon), 0.],
+                       [-np.sin(lat) * np.cos(lon), -np.sin(lat) * np.sin(lon), np.cos(lat)],
+                       [np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)]])
+    Re2enu.flags.writeable = False
+
+    return Re2enu
+
+
 class WGS84:
     """
     General parameters defined by the WGS84 system
@@ -38,21 +70,22 @@ class WGS84:
     def lla2ecef(self, lla):
         """
         Convert lat, lon, alt to Earth-centered, Earth-fixed coordinates.
-        Input: lla - (lat, lon, alt) in (decimal degrees, decimal degees, m)
-        Output: ecef - (x, y, z) in (m, m, m)
+        Input: lla - (lat, lon, alt) in (decimal degrees, decimal degees, m) or array (N, 3) of these
+        Output: ecef - (x, y, z) in (m, m, m) or array (N, 3) of these
         """
         # Decompose the input
-        lat = geo.deg2rad(lla[0])
-        lon = geo.deg2rad(lla[1])
-        alt = lla[2]
+        naLLA, single = asPoints(lla)
+        lat = np.deg2rad(naLLA[:, 0])
+        lon = np.deg2rad(naLLA[:, 1])
+        alt = naLLA[:, 2]
         # Calculate length of the normal to the ellipsoid
-        N = self.a / sqrt(1 - (self.e * sin(lat))**2)
+        N = self.a / np.sqrt(1 - (self.e * np.sin(lat))**2)
         # Calculate ecef coordinates
-        x = (N + alt) * cos(lat) * cos(lon)
-        y = (N + alt) * cos(lat) * sin(lon)
-        z = (N * (1 - self.e**2) + alt) * sin(lat)
+        naECEF = np.column_stack(((N + alt) * np.cos(lat) * np.cos(lon),
+                                  (N + alt) * np.cos(lat) * np.sin(lon),
+                                  (N * (1 - self.e**2) + alt) * np.sin(lat)))
         # Return the ecef coordinates
-        return (x, y, z)
+        return tuple(naECEF[0].tolist()) if single else naECEF
 
     def lla2gcc(self, lla, geoOrigin=''):
         """
@@ -68,9 +101,43 @@ class WGS84:
 
         return (x - x0, y - y0, z - z0)
 
-    def ecef2lla(self, ecef, tolerance=1e-9):
+    def ecef2lla(self, ecef):
         """
-        Convert Earth-centered, Earth-fixed coordinates to lat, lon, alt.
+        Convert Earth-centered, Earth-fixed coordinates to lat, lon, alt using the closed form solution of
+        Vermeille (2004), Direct transformation from geocentric coordinates to geodetic coordinates, J. Geod. 76
+        Input: ecef - (x, y, z) in (m, m, m) or array (N, 3) of these
+        Output: lla - (lat, lon, alt) in (decimal degrees, decimal degrees, m) or array (N, 3) of these
+        """
+        # Decompose the input
+        naECEF, single = asPoints(ecef)
+        x = naECEF[:, 0]
+        y = naECEF[:, 1]
+        z = naECEF[:, 2]
+        e2 = self.e**2
+        e4 = e2**2
+        # Solve the quartic in k
+        rho = np.sqrt(x**2 + y**2)
+        p = (rho / self.a)**2
+        q = (1 - e2) * (z / self.a)**2
+        r = (p + q - e4) / 6
+        s = e4 * p * q / (4 * r**3)
+        t = np.cbrt(1 + s + np.sqrt(s * (2 + s)))
+        u = r * (1 + t + 1 / t)
+        v = np.sqrt(u**2 + e4 * q)
+        w = e2 * (u + v - q) / (2 * v)
+        k = np.sqrt(u + v + w**2) - w
+        D = k * rho / (k + e2)
+        # Calculate lat, lon and alt
+        sqrtDz = np.sqrt(D**2 + z**2)
+        naLLA = np.column_stack((np.rad2deg(2 * np.arctan2(z, D + sqrtDz)),
+                                 np.rad2deg(np.arctan2(y, x)),
+                                 (k + e2 - 1) / k * sqrtDz))
+        # Return the lla coordinates
+        return tuple(naLLA[0].tolist()) if single else naLLA
+
+    def ecef2llaIterative(self, ecef, tolerance=1e-9):
+        """
+        Convert Earth-centered, Earth-fixed coordinates to lat, lon, alt by iteration (single point).
         Input: ecef - (x, y, z) in (m, m, m)
         Output: lla - (lat, lon, alt) in (decimal degrees, decimal degrees, m)
         """
@@ -96,44 +163,53 @@ class WGS84:
         # Return the lla coordinates
         return (geo.rad2deg(lat), geo.rad2deg(lon), alt)
 
-    def ecef2ned(self, ecef, origin):
+    def enuRotation(self, origin):
+        """
+        Returns the rotation matrix from ECEF to the local East, North, Up frame at origin (cached per origin)
+        Input: origin - (x0, y0, z0) in (m, m, m)
+        Output: Re2enu - rotation matrix (3, 3)
+        """
+        return rotationEcef2Enu(*[float(crd) for crd in origin])
+
+    def ecef2enu(self, ecef, origin):
         """
         Converts ecef coordinates into local tangent plane where the
         origin is the origin in ecef coordinates.
-        Input: ecef - (x, y, z) in (m, m, m)
+        Input: ecef - (x, y, z) in (m, m, m) or array (N, 3) of these
             origin - (x0, y0, z0) in (m, m, m)
-        Output: ned - (north, east, down) in (m, m, m)
+        Output: enu - (east, north, up) in (m, m, m) or array (N, 3) of these
         """
-        # print('ecef = ', ecef)
-        # print('origin = ', origin)
+        naECEF, single = asPoints(ecef)
+        naENU = (naECEF - np.asarray(origin, dtype=np.float64)) @ self.enuRotation(origin).T
 
-        llaOrigin = self.ecef2lla(origin)
-        lat = geo.deg2rad(llaOrigin[0])
-        lon = geo.deg2rad(llaOrigin[1])
-        Re2t = array([[-sin(lat)*cos(lon), -sin(lat)*sin(lon), cos(lat)],
-                      [-sin(lon), cos(lon), 0],
-                      [-cos(lat)*cos(lon), -cos(lat)*sin(lon), -sin(lat)]])
+        return list(naENU[0]) if single else naENU
 
-        # print('type ecef = %s' % type(ecef))
-        # print('type origin = %s' % type(origin))
+    def ecef2ned(self, ecef, origin):
+        """
+        Converts ecef coordinates into local tangent plane where the
+        origin is the origin in ecef coordinates.
+        Input: ecef - (x, y, z) in (m, m, m) or array (N, 3) of these
+            origin - (x0, y0, z0) in (m, m, m)
+        Output: ned - (north, east, down) in (m, m, m) or array (N, 3) of these
+        """
+        naENU = np.atleast_2d(self.ecef2enu(ecef, origin))
+        naNED = np.column_stack((naENU[:, 1], naENU[:, 0], -naENU[:, 2]))
 
-        return list(dot(Re2t, array(ecef) - array(origin)))
+        return list(naNED[0]) if np.ndim(ecef) == 1 else naNED
 
     def ned2ecef(self, ned, origin):
         """
         Converts ned local tangent plane coordinates into ecef coordinates
         using origin as the ecef point of tangency.
-        Input: ned - (north, east, down) in (m, m, m)
+        Input: ned - (north, east, down) in (m, m, m) or array (N, 3) of these
             origin - (x0, y0, z0) in (m, m, m)
-        Output: ecef - (x, y, z) in (m, m, m)
+        Output: ecef - (x, y, z) in (m, m, m) or array (N, 3) of these
         """
-        llaOrigin = self.ecef2lla(origin)
-        lat = geo.deg2rad(llaOrigin[0])
-        lon = geo.deg2rad(llaOrigin[1])
-        Rt2e = array([[-sin(lat)*cos(lon), -sin(lon), -cos(lat)*cos(lon)],
-                      [-sin(lat)*sin(lon), cos(lon), -cos(lat)*sin(lon)],
-                      [cos(lat), 0., -sin(lat)]])
-        return list(dot(Rt2e, array(ned)) + array(origin))
+        naNED, single = asPoints(ned)
+        naENU = np.column_stack((naNED[:, 1], naNED[:, 0], -naNED[:, 2]))
+        naECEF = naENU @ self.enuRotation(origin) + np.asarray(origin, dtype=np.float64)
+
+        return list(naECEF[0]) if single else naECEF
 
     def ned2pae(self, ned):
         """
@@ -340,6 +416,80 @@ class WGS84:
         notation = str(degrees) + "," + str(minutes)
         return notation
 
+
+# ===== Tests  =========================================
+
+
+def randomLLA(nrPoints, seed=2020):
+    """random positions from 1 km below to 40000 km above the ellipsoid"""
+    rng = np.random.RandomState(seed)
+    return np.column_stack((np.rad2deg(np.arcsin(rng.uniform(-1., 1., nrPoints))),
+                            rng.uniform(-180., 180., nrPoints),
+                            np.concatenate((rng.uniform(-1000., 10000., nrPoints - nrPoints // 4),
+                                            rng.uniform(10000., 4.e7, nrPoints // 4)))))
+
+
+def testEcef2llaArray(nrPoints=86400):
+    """test the closed form and the iterative ecef2lla against the true positions and time both for a full day at 1 Hz"""
+    wgs84 = WGS84()
+    naTrue = randomLLA(nrPoints)
+    naECEF = wgs84.lla2ecef(naTrue)
+
+    tStart = time.perf_counter()
+    naIter = np.array([wgs84.ecef2llaIterative(ecef) for ecef in naECEF])
+    tScalar = time.perf_counter() - tStart
+
+    tStart = time.perf_counter()
+    naLLA = wgs84.ecef2lla(naECEF)
+    tArray = time.perf_counter() - tStart
+
+    print('ecef2llaIterative (%d points): %8.4f s' % (nrPoints, tScalar))
+    print('ecef2lla          (%d points): %8.4f s  speedup x%.0f' % (nrPoints, tArray, tScalar / tArray))
+
+    # the iterative solution converges slowly in height close to the poles
+    midLat = np.abs(naTrue[:, 0]) < 60.
+    for name, naSol in (('ecef2lla', naLLA), ('ecef2llaIterative', naIter)):
+        naDiff = np.abs(naSol - naTrue)
+        print('%-17s max error lat, lon, alt (mm): %.2e, %.2e, %.2e (|lat| < 60: %.2e, %.2e, %.2e)'
+              % ((name, ) + tuple(np.max(naDiff, axis=0) * [geo.deg2rad(wgs84.a * 1000), geo.deg2rad(wgs84.a * 1000), 1000])
+                 + tuple(np.max(naDiff[midLat], axis=0) * [geo.deg2rad(wgs84.a * 1000), geo.deg2rad(wgs84.a * 1000), 1000])))
+
+
+def testLla2ecefArray(nrPoints=86400):
+    """test the round trip lla2ecef - ecef2lla and the array lla2ecef against the single point version"""
+    wgs84 = WGS84()
+    naLLA = randomLLA(nrPoints)
+    naECEF = wgs84.lla2ecef(naLLA)
+
+    naPoint = np.array([wgs84.lla2ecef(tuple(lla)) for lla in naLLA[:1000]])
+    print('array == single point lla2ecef: ', np.allclose(naPoint, naECEF[:1000], rtol=0., atol=1e-8))
+
+    naDiff = wgs84.lla2ecef(wgs84.ecef2lla(naECEF)) - naECEF
+    print('max round trip ecef - lla - ecef difference (mm): %.2e' % (np.max(np.linalg.norm(naDiff, axis=1)) * 1000))
+
+
+def testEcef2nedArray(nrPoints=86400):
+    """test the array ecef2ned / ned2ecef (cached rotation) against the single point conversions"""
+    wgs84 = WGS84()
+    origin = (4023741.3002569391, 309110.46204626531, 4922723.1941285301)
+    rng = np.random.RandomState(2020)
+    naECEF = np.asarray(origin) + rng.normal(0., 100., (nrPoints, 3))
+
+    tStart = time.perf_counter()
+    naPoint = np.array([wgs84.ecef2ned(ecef, origin) for ecef in naECEF])
+    tScalar = time.perf_counter() - tStart
+
+    tStart = time.perf_counter()
+    naNED = wgs84.ecef2ned(naECEF, origin)
+    tArray = time.perf_counter() - tStart
+
+    print('ecef2ned single points (%d points): %8.4f s' % (nrPoints, tScalar))
+    print('ecef2ned array         (%d points): %8.4f s  speedup x%.0f' % (nrPoints, tArray, tScalar / tArray))
+    print('array == single point ecef2ned: ', np.allclose(naPoint, naNED, rtol=0., atol=1e-9))
+    print('ned2ecef round trip: ', np.allclose(wgs84.ned2ecef(naNED, origin), naECEF, rtol=0., atol=1e-8))
+    print('ecef2enu == ecef2ned swapped: ', np.allclose(wgs84.ecef2enu(naECEF, origin), naNED[:, [1, 0, 2]] * [1, 1, -1], rtol=0., atol=1e-12))
+
+
 if __name__ == "__main__":
     wgs84 = WGS84()
 
@@ -366,3 +516,7 @@ if __name__ == "__main__":
 
     utm = wgs84.lla2utm(lla)
     print('utm    : ', utm)
+
+    testEcef2llaArray()
+    testLla2ecefArray()
+    testEcef2nedArray()
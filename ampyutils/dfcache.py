@@ -0,0 +1,230 @@
+#!/usr/bin/env python
+
+"""
+dfcache stores parsed dataframes as feather files in a cache directory next to the source file.
+The cache is keyed by size, modification time and SHA1 content hash of the source files.
+"""
+
+import sys
+import os
+import argparse
+import hashlib
+import json
+import logging
+import shutil
+import time
+from typing import Tuple
+from termcolor import colored
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401 (needed by pandas for feather files)
+    CACHE_AVAILABLE = True
+except ImportError:
+    CACHE_AVAILABLE = False
+
+__author__ = 'amuls'
+
+CACHE_VERSION = 1
+CACHE_EXT = '.cache'
+CACHE_MANIFEST = 'manifest.json'
+
+
+def file_sha1(fileName: str, blockSize: int = 1 << 20) -> str:
+    """
+    file_sha1 calculates the SHA1 hash of the content of a file reading it in blocks
+    """
+    sha1 = hashlib.sha1()
+    with open(fileName, 'rb') as f:
+        for block in iter(lambda: f.read(blockSize), b''):
+            sha1.update(block)
+
+    return sha1.hexdigest()
+
+
+def file_signature(fileName: str) -> dict:
+    """
+    file_signature returns size, modification time and content hash of a file
+    """
+    fStat = os.stat(fileName)
+
+    return {'size': fStat.st_size, 'mtime': fStat.st_mtime_ns, 'sha1': file_sha1(fileName)}
+
+
+def cache_dir(srcFile: str) -> str:
+    """
+    cache_dir returns the name of the cache directory belonging to a source file
+    """
+    return srcFile + CACHE_EXT
+
+
+def signatures_match(srcFiles: list, dSigs: dict) -> bool:
+    """
+    signatures_match checks the source files against the stored signatures. The content hash is
+    only calculated when size matches but the modification time differs (eg copied files)
+    """
+    for srcFile in srcFiles:
+        dSig = dSigs.get(os.path.basename(srcFile))
+        if dSig is None or not os.path.isfile(srcFile):
+            return False
+
+        fStat = os.stat(srcFile)
+        if fStat.st_size != dSig['size']:
+            return False
+        if fStat.st_mtime_ns != dSig['mtime']:
+            if file_sha1(srcFile) != dSig['sha1']:
+                return False
+            dSig['mtime'] = fStat.st_mtime_ns
+
+    return True
+
+
+def load_cache(srcFiles: list, names: list, logger: logging.Logger) -> Tuple[dict, dict]:
+    """
+    load_cache returns the cached dataframes and the info stored with them, or (None, None) when the
+    cache is absent, incomplete or no longer matches the source files (which invalidates the cache)
+    """
+    cFuncName = colored(os.path.basename(__file__), 'yellow') + ' - ' + colored(sys._getframe().f_code.co_name, 'green')
+
+    if not CACHE_AVAILABLE:
+        logger.warning('{func:s}: pyarrow not available, cache is disabled (install it with pip install -r requirements.txt)'.format(func=cFuncName))
+        return None, None
+
+    dirCache = cache_dir(srcFiles[0])
+    manifestName = os.path.join(dirCache, CACHE_MANIFEST)
+    if not os.path.isfile(manifestName):
+        logger.info('{func:s}: no cache found for {src:s}'.format(src=srcFiles[0], func=cFuncName))
+        return None, None
+
+    try:
+        with open(manifestName, 'r') as fManifest:
+            dManifest = json.load(fManifest)
+    except (OSError, ValueError) as e:
+        logger.warning('{func:s}: cannot read {man:s} ({err!s})'.format(man=manifestName, err=e, func=cFuncName))
+        invalidate_cache(srcFile=srcFiles[0], logger=logger)
+        return None, None
+
+    if dManifest.get('version') != CACHE_VERSION or not set(names) <= set(dManifest['frames']) or not signatures_match(srcFiles=srcFiles, dSigs=dManifest['sources']):
+        logger.info('{func:s}: cache {cache:s} is outdated'.format(cache=colored(dirCache, 'red'), func=cFuncName))
+        invalidate_cache(srcFile=srcFiles[0], logger=logger)
+        return None, None
+
+    dDFs = {}
+    for name in names:
+        dDFs[name] = pd.read_feather(os.path.join(dirCache, name + '.feather'))
+
+    # register access time for the eviction policy
+    dManifest['accessed'] = time.time()
+    with open(manifestName, 'w') as fManifest:
+        json.dump(dManifest, fManifest, indent=4)
+
+    logger.info('{func:s}: loaded {names!s} from cache {cache:s}'.format(names=list(names), cache=colored(dirCache, 'green'), func=cFuncName))
+
+    return dDFs, dManifest['info']
+
+
+def store_cache(srcFiles: list, dDFs: dict, dInfo: dict, logger: logging.Logger):
+    """
+    store_cache writes the dataframes in feather format with a manifest containing the source file signatures and info
+    """
+    cFuncName = colored(os.path.basename(__file__), 'yellow') + ' - ' + colored(sys._getframe().f_code.co_name, 'green')
+
+    if not CACHE_AVAILABLE:
+        return
+
+    dirCache = cache_dir(srcFiles[0])
+    os.makedirs(dirCache, exist_ok=True)
+
+    for name, df in dDFs.items():
+        df.reset_index(drop=True).to_feather(os.path.join(dirCache, name + '.feather'))
+
+    dManifest = {}
+    dManifest['version'] = CACHE_VERSION
+    dManifest['sources'] = {os.path.basename(srcFile): file_signature(srcFile) for srcFile in srcFiles}
+    dManifest['frames'] = list(dDFs.keys())
+    dManifest['info'] = dInfo
+    dManifest['accessed'] = time.time()
+
+    # write manifest last so that an interrupted store is seen as absent cache
+    with open(os.path.join(dirCache, CACHE_MANIFEST), 'w') as fManifest:
+        json.dump(dManifest, fManifest, indent=4)
+
+    logger.info('{func:s}: stored {names!s} in cache {cache:s}'.format(names=list(dDFs.keys()), cache=colored(dirCache, 'green'), func=cFuncName))
+
+
+def invalidate_cache(srcFile: str, logger: logging.Logger):
+    """
+    invalidate_cache removes the cache directory of a source file
+    """
+    cFuncName = colored(os.path.basename(__file__), 'yellow') + ' - ' + colored(sys._getframe().f_code.co_name, 'green')
+
+    dirCache = cache_dir(srcFile)
+    if os.path.isdir(dirCache):
+        shutil.rmtree(dirCache, ignore_errors=True)
+        logger.info('{func:s}: removed cache {cache:s}'.format(cache=dirCache, func=cFuncName))
+
+
+def dir_size(dirName: str) -> int:
+    """
+    dir_size returns the total size of the files in a directory
+    """
+    return sum(entry.stat().st_size for entry in os.scandir(dirName) if entry.is_file())
+
+
+def evict_caches(rootDir: str, maxAgeDays: float, maxSizeMB: float, logger: logging.Logger) -> list:
+    """
+    evict_caches walks an archive and removes the caches
+    - whose source file no longer exists,
+    - which were not accessed during the last maxAgeDays days,
+    - which were least recently used until the total size is below maxSizeMB
+    returns the list of removed cache directories
+    """
+    cFuncName = colored(os.path.basename(__file__), 'yellow') + ' - ' + colored(sys._getframe().f_code.co_name, 'green')
+
+    lstRemoved = []
+    lstCaches = []
+    tNow = time.time()
+
+    for dirPath, dirNames, _ in os.walk(rootDir):
+        for dirName in [d for d in dirNames if d.endswith(CACHE_EXT)]:
+            dirCache = os.path.join(dirPath, dirName)
+            srcFile = dirCache[:-len(CACHE_EXT)]
+            try:
+                with open(os.path.join(dirCache, CACHE_MANIFEST), 'r') as fManifest:
+                    accessed = json.load(fManifest)['accessed']
+            except (OSError, ValueError, KeyError):
+                accessed = 0
+
+            if not os.path.isfile(srcFile) or (tNow - accessed) > maxAgeDays * 86400:
+                invalidate_cache(srcFile=srcFile, logger=logger)
+                lstRemoved.append(dirCache)
+            else:
+                lstCaches.append((accessed, dir_size(dirCache), srcFile, dirCache))
+
+        # do not descend into the cache directories
+        dirNames[:] = [d for d in dirNames if not d.endswith(CACHE_EXT)]
+
+    # least recently used first
+    lstCaches.sort()
+    totalSize = sum(cache[1] for cache in lstCaches)
+    for _, size, srcFile, dirCache in lstCaches:
+        if totalSize <= maxSizeMB * 1024 * 1024:
+            break
+        invalidate_cache(srcFile=srcFile, logger=logger)
+        lstRemoved.append(dirCache)
+        totalSize -= size
+
+    logger.info('{func:s}: removed {nr:d} caches, remaining size {size:.1f} MB'.format(nr=len(lstRemoved), size=totalSize / 1024 / 1024, func=cFuncName))
+
+    return lstRemoved
+
+
+if __name__ == "__main__":  # evict caches from an archive
+    parser = argparse.ArgumentParser(description='remove outdated dataframe caches from an archive')
+    parser.add_argument('-r', '--rootdir', help='root directory of archive', required=True, type=str)
+    parser.add_argument('-a', '--age', help='remove caches not used for this number of days (default 90)', required=False, type=float, default=90)
+    parser.add_argument('-s', '--size', help='maximum total size of caches in MB (default 10240)', required=False, type=float, default=10240)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+    evict_caches(rootDir=args.rootdir, maxAgeDays=args.age, maxSizeMB=args.size, logger=logging.getLogger(__name__))
@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+
+"""
+jobgraph runs external programs declared as a dependency graph (DAG). A job starts as soon as all the jobs it
+depends on have finished successfully, independent jobs run concurrently using a bounded number of workers.
+The stderr output and the time used by each program are collected.
+"""
+
+import sys
+import os
+import time
+import logging
+import subprocess
+from collections import namedtuple
+from concurrent import futures
+from termcolor import colored
+
+__author__ = 'amuls'
+
+# an external program to run (args) after the jobs named in deps have succeeded
+Job = namedtuple('Job', ['name', 'args', 'deps'])
+
+# the result of a job: returncode is None when the job was skipped because a job it depends on failed,
+# oserror is the OSError raised when the program could not be started (e.g. executable not found)
+JobResult = namedtuple('JobResult', ['name', 'returncode', 'stderr', 'secs', 'oserror'])
+
+
+def job(name: str, args: list, deps: tuple = ()) -> Job:
+    """
+    job declares the external program with arguments args which runs after the jobs named in deps
+    """
+    return Job(name, [str(arg) for arg in args], tuple(deps))
+
+
+def check_graph(lst_jobs: list):
+    """
+    check_graph verifies that the job names are unique, that all dependencies are declared and that the graph has no cycles
+    """
+    djobs = {}
+    for jb in lst_jobs:
+        if jb.name in djobs:
+            raise ValueError('job {name:s} declared twice'.format(name=jb.name))
+        djobs[jb.name] = jb
+
+    for jb in lst_jobs:
+        for dep in jb.deps:
+            if dep not in djobs:
+                raise ValueError('job {name:s} depends on undeclared job {dep:s}'.format(name=jb.name, dep=dep))
+
+    # topological sort (Kahn), jobs left over are part of a cycle
+    nr_deps = {jb.name: len(jb.deps) for jb in lst_jobs}
+    ready = [name for name, nr in nr_deps.items() if nr == 0]
+    nr_sorted = 0
+    while ready:
+        name = ready.pop()
+        nr_sorted += 1
+        for jb in lst_jobs:
+            if name in jb.deps:
+                nr_deps[jb.name] -= 1
+                if nr_deps[jb.name] == 0:
+                    ready.append(jb.name)
+
+    if nr_sorted != len(lst_jobs):
+        raise ValueError('jobs {names!s} have cyclic dependencies'.format(names=sorted(name for name, nr in nr_deps.items() if nr > 0)))
+
+
+def run_job(jb: Job) -> JobResult:
+    """
+    run_job runs the program of the job, discarding its stdout and capturing its stderr
+    """
+    tStart = time.perf_counter()
+    try:
+        proc = subprocess.run(jb.args, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        returncode, stderr, oserror = proc.returncode, proc.stderr.decode(errors='replace'), None
+    except OSError as e:
+        # executable not found
+        returncode, stderr, oserror = -1, str(e), e
+
+    return JobResult(jb.name, returncode, stderr, time.perf_counter() - tStart, oserror)
+
+
+def run_graph(lst_jobs: list, logger: logging.Logger, workers: int = None) -> dict:
+    """
+    run_graph runs the jobs of the graph using at most workers (default number of CPUs) programs at the same time.
+    The jobs depending on a failed job are skipped. Returns per job name its JobResult
+    """
+    cFuncName = colored(os.path.basename(__file__), 'yellow') + ' - ' + colored(sys._getframe().f_code.co_name, 'green')
+
+    check_graph(lst_jobs=lst_jobs)
+
+    workers = max(1, min(workers or os.cpu_count(), len(lst_jobs)))
+    logger.info('{func:s}: running {nr:d} jobs using {workers:d} workers'.format(nr=len(lst_jobs), workers=workers, func=cFuncName))
+
+    dResults = {}
+    lst_pending = list(lst_jobs)
+    drunning = {}
+    tStart = time.perf_counter()
+
+    with futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        while lst_pending or drunning:
+            # skip the jobs depending on a failed or skipped job, start the jobs whose dependencies succeeded
+            for jb in list(lst_pending):
+                if any(dep in dResults and dResults[dep].returncode != 0 for dep in jb.deps):
+                    dResults[jb.name] = JobResult(jb.name, None, '', 0., None)
+                    lst_pending.remove(jb)
+                    logger.warning('{func:s}: skipping {name:s} since a job it depends on failed'.format(name=colored(jb.name, 'red'), func=cFuncName))
+                elif all(dep in dResults for dep in jb.deps):
+                    logger.info('{func:s}: submitting {name:s}\n{proc:s}'.format(name=colored(jb.name, 'green'), proc=colored(' '.join(jb.args), 'blue'), func=cFuncName))
+                    drunning[executor.submit(run_job, jb)] = jb
+                    lst_pending.remove(jb)
+
+            if not drunning:
+                continue
+
+            done, _ = futures.wait(drunning, return_when=futures.FIRST_COMPLETED)
+            for future in done:
+                jb = drunning.pop(future)
+                dResults[jb.name] = future.result()
+
+                if dResults[jb.name].returncode == 0:
+                    logger.info('{func:s}: finished {name:s} in {secs:.2f} s'.format(name=colored(jb.name, 'green'), secs=dResults[jb.name].secs, func=cFuncName))
+                    if dResults[jb.name].stderr.strip():
+                        logger.debug('{func:s}: stderr of {name:s}:\n{err:s}'.format(name=jb.name, err=dResults[jb.name].stderr.rstrip(), func=cFuncName))
+                else:
+                    logger.error('{func:s}: {name:s} returned error code {code:d}:\n{err:s}'.format(name=colored(jb.name, 'red'), code=dResults[jb.name].returncode, err=dResults[jb.name].stderr.rstrip(), func=cFuncName))
+
+    secs_jobs = sum(result.secs for result in dResults.values())
+    logger.info('{func:s}: ran {nr:d} jobs in {total:.2f} s ({jobs:.2f} s when run one after the other)'.format(nr=len(dResults), total=time.perf_counter() - tStart, jobs=secs_jobs, func=cFuncName))
+
+    return dResults
+
+
+def graph_failed(dResults: dict) -> list:
+    """
+    graph_failed returns the names of the jobs which failed or were skipped
+    """
+    return [name for name, result in dResults.items() if result.returncode != 0]
+
+
+def graph_oserrors(dResults: dict) -> list:
+    """
+    graph_oserrors returns the OSErrors of the jobs whose program could not be started
+    """
+    return [result.oserror for result in dResults.values() if result.oserror is not None]
@@ -0,0 +1,241 @@
+#!/usr/bin/env python
+
+"""
+bench_rtkplot times each stage of the pyrtkplot pipeline on synthetic RTKLib pos/stat files and appends
+the results to a JSON history file so that regressions are visible between commits.
+Run from the root of the repository:  python -m benchmark.bench_rtkplot [-s COM-1Hz-24h ...]
+"""
+
+import sys
+import os
+import argparse
+import json
+import logging
+import math
+import platform
+import subprocess
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Tuple
+from termcolor import colored
+import numpy as np
+import pandas as pd
+import matplotlib
+matplotlib.use('Agg')  # noqa: E402 (no interactive backend for benchmarking)
+
+import am_config as amc
+from rnx2rtkp import parse_rtk_files
+from plot import plot_position, plot_scatter, plot_sats_column, plot_clock, plot_distributions_crds, plot_distributions_elev, plot_scheduler
+from stats import enu_statistics as enu_stat
+from benchmark import synth_rtk
+
+__author__ = 'amuls'
+
+# benchmark scenarios: satellite system, rate (Hz) and duration (s)
+dBenchScenarios = {}
+for syst in ('GAL', 'GPS', 'COM'):
+    dBenchScenarios['{syst:s}-1Hz-24h'.format(syst=syst)] = {'syst': syst, 'rate': 1., 'duration': 86400.}
+    dBenchScenarios['{syst:s}-10Hz-1h'.format(syst=syst)] = {'syst': syst, 'rate': 10., 'duration': 3600.}
+
+BENCH_HISTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_history.json')
+REGRESSION_RATIO = 1.2
+
+
+@contextmanager
+def stage_timer(dStages: dict, stage: str):
+    """
+    stage_timer adds the wall clock time (s) of the enclosed block to dStages[stage]
+    """
+    tStart = time.perf_counter()
+    try:
+        yield
+    finally:
+        dStages[stage] = dStages.get(stage, 0.) + time.perf_counter() - tStart
+
+
+def git_revision() -> str:
+    """
+    git_revision returns the short commit hash of the repository (suffixed with '+' when there are local changes)
+    """
+    repoDir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=repoDir, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True).stdout.decode().strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=repoDir, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+    return commit + ('+' if dirty else '')
+
+
+def bench_pipeline(posFile: str, syst: str, logger: logging.Logger, plots: bool = True) -> Tuple[dict, list]:
+    """
+    bench_pipeline runs the stages of pyrtkplot on posFile (in the current directory) and returns the time spent per stage
+    and the plots that failed (these are not timed)
+    """
+    dStages = {}
+    lstFailed = []
+
+    # setup as done by pyrtkplot
+    amc.dRTK = {}
+    amc.dRTK['info'] = {'dir': os.getcwd(), 'rtkPosFile': posFile, 'rtkStatFile': posFile + '.stat'}
+    amc.dRTK['syst'] = syst
+    amc.dRTK['PDOP'] = {'bins': [0, 2, 3, 4, 5, 6, math.inf]}
+    amc.dRTK['marker'] = {'lat': np.nan, 'lon': np.nan, 'ellH': np.nan, 'UTM.E': np.nan, 'UTM.N': np.nan, 'UTM.Z': '', 'UTM.L': ''}
+
+    with stage_timer(dStages, 'parseRTKLibPositionFile'):
+        dfPosn = parse_rtk_files.parseRTKLibPositionFile(logger=logger)
+    with stage_timer(dStages, 'splitStatusFile'):
+        dStatParts = parse_rtk_files.splitStatusFile(amc.dRTK['info']['rtkStatFile'], logger=logger)
+    with stage_timer(dStages, 'parseSatelliteStatistics'):
+        dfSats = parse_rtk_files.parseSatelliteStatistics(dStatParts['sat'], logger=logger)
+    with stage_timer(dStages, 'parseClockBias'):
+        dfCLKs = parse_rtk_files.parseClockBias(dStatParts['clk'], logger=logger)
+    with stage_timer(dStages, 'calcDOPs'):
+        dfDOPs = parse_rtk_files.calcDOPs(dfSats, logger=logger)
+
+    with stage_timer(dStages, 'weightedAverage'):
+        amc.dRTK['WAvg'] = parse_rtk_files.weightedAverage(dfPos=dfPosn, logger=logger)
+    with stage_timer(dStages, 'crdDiff'):
+        dfCrd, dCrdLim = plot_position.crdDiff(dMarker=amc.dRTK['marker'], dfUTMh=dfPosn[['UTM.E', 'UTM.N', 'ellH']], plotCrds=['UTM.E', 'UTM.N', 'ellH'], logger=logger)
+        dfPosn[['dUTM.E', 'dUTM.N', 'dEllH']] = dfCrd[['UTM.E', 'UTM.N', 'ellH']]
+
+    # the distributions and statistics
+    with stage_timer(dStages, 'parse_elevation_distribution'):
+        dfDistCN0, dsDistCN0, dfDistPRres, dsDistPRRes = parse_rtk_files.parse_elevation_distribution(dRtk=amc.dRTK, dfSat=dfSats, logger=logger)
+    with stage_timer(dStages, 'parse_sv_residuals'):
+        amc.dRTK['PRres'] = parse_rtk_files.parse_sv_residuals(dfSat=dfSats, logger=logger)
+    with stage_timer(dStages, 'mergeDOPs'):
+        dfPosn = pd.merge(left=dfPosn, right=dfDOPs[['DT', 'PDOP', 'HDOP', 'VDOP', 'TDOP', 'GDOP']], left_on='DT', right_on='DT', how='left').interpolate()
+    with stage_timer(dStages, 'addPDOPStatistics'):
+        parse_rtk_files.addPDOPStatistics(dRtk=amc.dRTK, dfPos=dfPosn, logger=logger)
+    with stage_timer(dStages, 'enu_statistics'):
+        dfStatENU = enu_stat.enu_statistics(dRtk=amc.dRTK, dfENU=dfPosn[['DT', 'dUTM.E', 'dUTM.N', 'dEllH']], logger=logger)
+    with stage_timer(dStages, 'enupdop_distribution'):
+        dfDistENU, dfDistXDOP = enu_stat.enupdop_distribution(dRtk=amc.dRTK, dfENU=dfPosn[['DT', 'dUTM.E', 'dUTM.N', 'dEllH', 'PDOP', 'HDOP', 'VDOP', 'GDOP']], logger=logger)
+
+    if not plots:
+        return dStages, lstFailed
+
+    # each of the plots created by pyrtkplot
+    lstPlots = []
+    lstPlots.append(plot_scheduler.plot_task('plotUTMOffset', plot_position.plotUTMOffset, dRtk=amc.dRTK, dfPos=dfPosn, dfCrd=dfCrd, dCrdLim=dCrdLim))
+    lstPlots.append(plot_scheduler.plot_task('plotUTMScatter', plot_scatter.plotUTMScatter, dRtk=amc.dRTK, dfPos=dfPosn, dfCrd=dfCrd, dCrdLim=dCrdLim))
+    lstPlots.append(plot_scheduler.plot_task('plotUTMScatterBin', plot_scatter.plotUTMScatterBin, dRtk=amc.dRTK, dfPos=dfPosn, dfCrd=dfCrd, dCrdLim=dCrdLim))
+    lstPlots.append(plot_scheduler.plot_task('plot_enu_distribution', plot_distributions_crds.plot_enu_distribution, dRtk=amc.dRTK, dfENUdist=dfDistENU, dfENUstat=dfStatENU))
+    lstPlots.append(plot_scheduler.plot_task('plot_xdop_distribution', plot_distributions_crds.plot_xdop_distribution, dRtk=amc.dRTK, dfXDOP=dfDOPs, dfXDOPdisp=dfDistXDOP))
+    for col, yrange, title, unit in (('PRres', [-6, 6], 'PR Residuals', 'm'), ('CN0', [20, 60], 'CN0 Ratio', 'dBHz'), ('Elev', [0, 90], 'Elevation', 'Deg')):
+        dCol = {'name': col, 'yrange': yrange, 'title': title, 'unit': unit, 'linestyle': '-'}
+        lstPlots.append(plot_scheduler.plot_task('plotRTKLibSatsColumn.' + col, plot_sats_column.plotRTKLibSatsColumn, dCol=dCol, dRtk=amc.dRTK, dfSVs=dfSats))
+    lstPlots.append(plot_scheduler.plot_task('plot_elev_distribution.CN0', plot_distributions_elev.plot_elev_distribution, dRtk=amc.dRTK, df=dfDistCN0, ds=dsDistCN0, obs_name='CN0'))
+    lstPlots.append(plot_scheduler.plot_task('plot_elev_distribution.PRres', plot_distributions_elev.plot_elev_distribution, dRtk=amc.dRTK, df=dfDistPRres, ds=dsDistPRRes, obs_name='PRres'))
+    lstPlots.append(plot_scheduler.plot_task('plotClock', plot_clock.plotClock, dfClk=dfCLKs, dRtk=amc.dRTK))
+
+    # each plot on its own, then all plots by the parallel plot scheduler
+    for task in lstPlots:
+        plotName, tPlot, error = plot_scheduler.run_plot_task(task=task, logger=logger)
+        if error is not None:
+            logger.warning('{plot:s} failed ({err:s})'.format(plot=plotName, err=error))
+            lstFailed.append(plotName)
+        else:
+            dStages[plotName] = tPlot
+
+    # the parallel timing is only comparable when all plots were created
+    dParallel = {}
+    with stage_timer(dParallel, 'plots.parallel'):
+        dTimes = plot_scheduler.run_plot_tasks(lst_tasks=lstPlots, logger=logger)
+    if len(dTimes) == len(lstPlots):
+        dStages.update(dParallel)
+    else:
+        lstFailed.append('plots.parallel')
+
+    return dStages, lstFailed
+
+
+def compare_history(lstHistory: list, dRun: dict, logger: logging.Logger):
+    """
+    compare_history reports per scenario the ratio of the stage timings against the previous run in the history
+    """
+    cFuncName = colored(os.path.basename(__file__), 'yellow') + ' - ' + colored(sys._getframe().f_code.co_name, 'green')
+
+    for scenario, dScenario in dRun['scenarios'].items():
+        dPrevious = next((dPrev['scenarios'][scenario] for dPrev in reversed(lstHistory) if scenario in dPrev['scenarios']), None)
+
+        logger.info('{func:s}: timing of scenario {scen:s} ({info!s})'.format(scen=colored(scenario, 'green'), info=dScenario['info'], func=cFuncName))
+        for stage, tStage in dScenario['stages'].items():
+            if dPrevious is None or stage not in dPrevious['stages']:
+                logger.info('{func:s}:    {stage:<32s} {time:9.3f} s'.format(stage=stage, time=tStage, func=cFuncName))
+            else:
+                ratio = tStage / max(dPrevious['stages'][stage], 1e-6)
+                txtRatio = 'x{ratio:.2f}'.format(ratio=ratio)
+                logger.info('{func:s}:    {stage:<32s} {time:9.3f} s  {ratio:s}'.format(stage=stage, time=tStage, ratio=colored(txtRatio, 'red') if ratio > REGRESSION_RATIO else txtRatio, func=cFuncName))
+        for stage in dScenario['failed']:
+            logger.info('{func:s}:    {stage:<32s} {failed:s}'.format(stage=stage, failed=colored('failed', 'red'), func=cFuncName))
+        logger.info('{func:s}:    {stage:<32s} {time:9.3f} s'.format(stage='total', time=dScenario['total'], func=cFuncName))
+
+
+def main(argv):
+    """
+    main creates the synthetic files for the selected scenarios, times the pipeline and appends the results to the history
+    """
+    cFuncName = colored(os.path.basename(__file__), 'yellow') + ' - ' + colored(sys._getframe().f_code.co_name, 'green')
+
+    parser = argparse.ArgumentParser(description='benchmark the pyrtkplot pipeline on synthetic RTKLib files')
+    parser.add_argument('-s', '--scenarios', help='scenarios to run (default all)', nargs='+', required=False, type=str, default=list(dBenchScenarios.keys()), choices=list(dBenchScenarios.keys()))
+    parser.add_argument('-w', '--workdir', help='directory for the synthetic files, reused between runs (default {tmp:s})'.format(tmp=os.path.join(tempfile.gettempdir(), 'bench_rtkplot')), required=False, type=str, default=os.path.join(tempfile.gettempdir(), 'bench_rtkplot'))
+    parser.add_argument('-j', '--json', help='JSON history file (default {hist:s})'.format(hist=BENCH_HISTORY), required=False, type=str, default=BENCH_HISTORY)
+    parser.add_argument('-n', '--noplots', help='do not time the plots (default False)', action='store_true', required=False)
+    parser.add_argument('-l', '--logging', help='logging level of the pipeline (default WARNING)', required=False, default='WARNING', choices=['CRITICAL', 'ERROR', 'WARNING', 'INFO', 'DEBUG', 'NOTSET'])
+    args = parser.parse_args(argv[1:])
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+    logger = logging.getLogger(__name__)
+    pipeLogger = logging.getLogger('pipeline')
+    pipeLogger.setLevel(args.logging)
+
+    dRun = {}
+    dRun['date'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+    dRun['commit'] = git_revision()
+    dRun['versions'] = {'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__, 'matplotlib': matplotlib.__version__}
+    dRun['scenarios'] = {}
+
+    cwd = os.getcwd()
+    for scenario in args.scenarios:
+        dScen = dBenchScenarios[scenario]
+        dirScen = os.path.join(args.workdir, scenario)
+        posFile = 'bench.pos'
+        os.makedirs(dirScen, exist_ok=True)
+
+        # the synthetic files are created once and reused
+        if not os.path.isfile(os.path.join(dirScen, posFile + '.stat')):
+            synth_rtk.synth_rtk_files(posFile=os.path.join(dirScen, posFile), logger=logger, **dScen)
+
+        os.chdir(dirScen)
+        try:
+            logger.info('{func:s}: running scenario {scen:s}'.format(scen=colored(scenario, 'green'), func=cFuncName))
+            dStages, lstFailed = bench_pipeline(posFile=posFile, syst=dScen['syst'], logger=pipeLogger, plots=not args.noplots)
+        finally:
+            os.chdir(cwd)
+
+        dInfo = dict(dScen)
+        dInfo['epochs'] = amc.dRTK['Time']['epochs']
+        dInfo['statSize'] = os.path.getsize(os.path.join(dirScen, posFile + '.stat'))
+        dRun['scenarios'][scenario] = {'info': dInfo, 'stages': dStages, 'failed': lstFailed, 'total': sum(dStages.values())}
+
+    # append to the history and report differences with previous run
+    lstHistory = []
+    if os.path.isfile(args.json):
+        with open(args.json, 'r') as fHist:
+            lstHistory = json.load(fHist)
+
+    compare_history(lstHistory=lstHistory, dRun=dRun, logger=logger)
+
+    lstHistory.append(dRun)
+    with open(args.json, 'w') as fHist:
+        json.dump(lstHistory, fHist, indent=4)
+
+    logger.info('{func:s}: appended results of commit {commit:s} to {hist:s}'.format(commit=dRun['commit'], hist=colored(args.json, 'green'), func=cFuncName))
+
+
+if __name__ == "__main__":  # Only run if this file is called directly
+    main(sys.argv)
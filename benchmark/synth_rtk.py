@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+
+"""
+synth_rtk generates synthetic RTKLib position (.pos) and status (.pos.stat) files for benchmarking.
+The satellites follow simple periodic passes (elevation, azimuth) so that the number of satellites,
+the residuals and CN0 vary realistically with elevation.
+"""
+
+import sys
+import os
+import argparse
+import logging
+from typing import Tuple
+from termcolor import colored
+import numpy as np
+
+__author__ = 'amuls'
+
+# satellites per system used for the synthetic constellation
+dSynthSVs = {'GAL': ['E{:02d}'.format(prn) for prn in range(1, 25)],
+             'GPS': ['G{:02d}'.format(prn) for prn in range(1, 32)]}
+dSynthSVs['COM'] = dSynthSVs['GAL'] + dSynthSVs['GPS']
+
+# orbital period (s) of the systems
+dSynthPeriod = {'E': 14.08 * 3600, 'G': 11.97 * 3600}
+
+ELEV_MASK = 5.
+WNC_START = 2100
+MARKER_LLH = (50.8440152778, 4.3929283333, 151.39179)
+
+POS_HEADER = ('% program   : RTKPOST ver.2.4.3 b33 (synthetic)\n'
+              '% inp file  : synthetic\n'
+              '% elev mask : {mask:.1f} deg\n'
+              '% pos mode  : single\n'
+              '%\n'
+              '% (lat/lon/height=WGS84/ellipsoidal,Q=1:fix,2:float,3:sbas,4:dgps,5:single,6:ppp,ns=# of satellites)\n'
+              '%  GPST                  latitude(deg) longitude(deg)  height(m)   Q  ns   sdn(m)   sde(m)   sdu(m)  sdne(m)  sdeu(m)  sdun(m) age(s)  ratio\n')
+
+
+def orbit_parameters(svs: list, rng: np.random.RandomState) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    orbit_parameters returns for each satellite the period, the phase and the azimuth at start of its pass
+    """
+    period = np.array([dSynthPeriod[sv[0]] for sv in svs])
+
+    return period, rng.uniform(0, 1, len(svs)), rng.uniform(0, 360, len(svs))
+
+
+def satellite_geometry(tow: np.ndarray, period: np.ndarray, phase: np.ndarray, azim0: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    satellite_geometry returns the elevation and azimuth (epochs x satellites) in degrees for periodic satellite passes
+    """
+    cycle = tow[:, np.newaxis] / period + phase
+    elev = 90 * np.sin(2 * np.pi * cycle)
+    azim = np.mod(azim0 + 360 * cycle, 360)
+
+    return elev, azim
+
+
+def synth_rtk_files(posFile: str, syst: str, rate: float, duration: float, logger: logging.Logger, seed: int = 0, chunk: int = 3600) -> dict:
+    """
+    synth_rtk_files writes a RTKLib position file and its status file (posFile + '.stat') for the satellite
+    system syst (GAL, GPS or COM) with epochs at rate Hz during duration seconds.
+    returns info about the generated files
+    """
+    cFuncName = colored(os.path.basename(__file__), 'yellow') + ' - ' + colored(sys._getframe().f_code.co_name, 'green')
+
+    logger.info('{func:s}: creating synthetic {syst:s} files {pos:s} at {rate:g} Hz for {dur:g} s'.format(syst=syst, pos=posFile, rate=rate, dur=duration, func=cFuncName))
+
+    rng = np.random.RandomState(seed)
+    svs = dSynthSVs[syst]
+    nrEpochs = int(round(duration * rate))
+
+    # fixed orbit parameters for the complete file
+    period, phase, azim0 = orbit_parameters(svs=svs, rng=rng)
+    nrSatLines = 0
+
+    with open(posFile, 'w') as fPos, open(posFile + '.stat', 'w') as fStat:
+        fPos.write(POS_HEADER.format(mask=ELEV_MASK))
+
+        for start in range(0, nrEpochs, chunk):
+            tow = np.arange(start, min(start + chunk, nrEpochs)) / rate
+            elev, azim = satellite_geometry(tow=tow, period=period, phase=phase, azim0=azim0)
+            visible = elev > ELEV_MASK
+            ns = visible.sum(axis=1)
+
+            # residuals and CN0 depend on elevation
+            sinEl = np.sin(np.deg2rad(np.clip(elev, ELEV_MASK, 90)))
+            prRes = rng.normal(0, 0.3 / sinEl)
+            cn0 = 30 + 20 * sinEl + rng.normal(0, 1.5, elev.shape)
+
+            # position noise scaled with the number of satellites
+            sdENU = 3. / np.sqrt(np.maximum(ns, 1))[:, np.newaxis] * np.array([1., 0.8, 1.8])
+            dENU = rng.normal(0, 1, (len(tow), 3)) * sdENU
+            lat = MARKER_LLH[0] + dENU[:, 1] / 111111.
+            lon = MARKER_LLH[1] + dENU[:, 0] / (111111. * np.cos(np.deg2rad(MARKER_LLH[0])))
+            height = MARKER_LLH[2] + dENU[:, 2]
+            clk = rng.normal(10, 1, (len(tow), 2))
+
+            lstPos = []
+            lstStat = []
+            for i, epochTow in enumerate(tow):
+                lstPos.append('{wnc:4d} {tow:10.3f} {lat:14.9f} {lon:14.9f} {h:10.4f} {q:3d} {ns:3d} {sdn:8.4f} {sde:8.4f} {sdu:8.4f} {sdne:8.4f} {sdeu:8.4f} {sdun:8.4f} {age:6.2f} {ratio:6.1f}\n'.format(wnc=WNC_START, tow=epochTow, lat=lat[i], lon=lon[i], h=height[i], q=5, ns=ns[i], sdn=sdENU[i, 1], sde=sdENU[i, 0], sdu=sdENU[i, 2], sdne=0., sdeu=0., sdun=0., age=0., ratio=0.))
+
+                lstStat.append('$POS,{wnc:d},{tow:.3f},5,{x:.4f},{y:.4f},{z:.4f},0.0000,0.0000,0.0000\n'.format(wnc=WNC_START, tow=epochTow, x=4027881.0 + dENU[i, 0], y=306998.0 + dENU[i, 1], z=4919499.0 + dENU[i, 2]))
+                lstStat.append('$VELACC,{wnc:d},{tow:.3f},5,0.0000,0.0000,0.0000,0.00000,0.00000,0.00000,0.0000,0.0000,0.0000,0.00000,0.00000,0.00000\n'.format(wnc=WNC_START, tow=epochTow))
+                lstStat.append('$CLK,{wnc:d},{tow:.3f},5,1,{gps:.3f},0.000,{gal:.3f},0.000\n'.format(wnc=WNC_START, tow=epochTow, gps=clk[i, 0], gal=clk[i, 1]))
+                svIdx = np.flatnonzero(visible[i])
+                for j in svIdx:
+                    lstStat.append('$SAT,{wnc:d},{tow:.3f},{sv:s},1,{az:.1f},{el:.1f},{res:.4f},0.0000,1,{cn0:.0f},0,0,1,0,0,0\n'.format(wnc=WNC_START, tow=epochTow, sv=svs[j], az=azim[i, j], el=elev[i, j], res=prRes[i, j], cn0=cn0[i, j]))
+                nrSatLines += len(svIdx)
+
+            fPos.write(''.join(lstPos))
+            fStat.write(''.join(lstStat))
+
+    dInfo = {'posFile': posFile, 'syst': syst, 'rate': rate, 'duration': duration, 'epochs': nrEpochs, 'satLines': nrSatLines, 'svs': len(svs)}
+    logger.info('{func:s}: created {info!s}'.format(info=dInfo, func=cFuncName))
+
+    return dInfo
+
+
+if __name__ == "__main__":  # create a synthetic pos and stat file
+    parser = argparse.ArgumentParser(description='create synthetic RTKLib pos and stat files')
+    parser.add_argument('-f', '--file', help='name of position file to create (stat file gets extension .stat)', required=True, type=str)
+    parser.add_argument('-s', '--syst', help='satellite system (default COM)', required=False, type=str, default='COM', choices=['GAL', 'GPS', 'COM'])
+    parser.add_argument('-r', '--rate', help='observation rate in Hz (default 1)', required=False, type=float, default=1.)
+    parser.add_argument('-d', '--duration', help='duration in seconds (default 86400)', required=False, type=float, default=86400.)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+    synth_rtk_files(posFile=args.file, syst=args.syst, rate=args.rate, duration=args.duration, logger=logging.getLogger(__name__))
@@ -5,9 +5,10 @@ import json
 import logging
 from datetime import datetime
 import tempfile
+from typing import Tuple
 
 import am_config as amc
-from ampyutils import amutils
+from ampyutils import amutils, jobgraph
 
 __author__ = 'amuls'
 
@@ -146,22 +147,47 @@ def rnxobs_statistics_file(dTmpRnx: dict, logger: logging.Logger):
     pass
 
 
+def run_gfzrnx_jobs(lst_jobs: list, logger: logging.Logger) -> dict:
+    """
+    run_gfzrnx_jobs runs the graph of external program jobs and stores the time used per job. Exits when a job failed
+    """
+    cFuncName = colored(os.path.basename(__file__), 'yellow') + ' - ' + colored(sys._getframe().f_code.co_name, 'green')
+
+    dResults = jobgraph.run_graph(lst_jobs=lst_jobs, logger=logger)
+
+    amc.dRTK['rnx'].setdefault('jobs', {}).update({name: result.secs for name, result in dResults.items()})
+
+    lst_failed = jobgraph.graph_failed(dResults=dResults)
+    if lst_failed:
+        logger.error('{func:s}: jobs {jobs!s} failed or were skipped'.format(jobs=lst_failed, func=cFuncName))
+        # a program that could not be started (executable not found) is an OS error
+        lst_oserrors = jobgraph.graph_oserrors(dResults=dResults)
+        if lst_oserrors:
+            logger.error('{func:s}: {err!s}'.format(err=lst_oserrors[0], func=cFuncName))
+            sys.exit(amc.E_OSERROR)
+        sys.exit(amc.E_SBF2RIN_ERRCODE)
+
+    return dResults
+
+
 def gnss_rinex_creation(dTmpRnx: dict, logger: logging.Logger):
     """
-    gnss_rinex_creation creates the RINEX observation/navigation files per satsys
+    gnss_rinex_creation creates the RINEX observation/navigation files per satsys. The gfzrnx runs for the
+    different satellite systems and for observation and navigation files are run concurrently
     """
     cFuncName = colored(os.path.basename(__file__), 'yellow') + ' - ' + colored(sys._getframe().f_code.co_name, 'green')
 
-    for rnx_type in ('obs', 'nav'):
-        # if we have both systems GPS Galileo then we only create the COMB files
-        print('{!s}'.format(amc.dRTK['rnx']['gnss']['select']))
-        if 'M' in amc.dRTK['rnx']['gnss']['select']:
-            logger.info('{func:s}: creating COMB file'.format(func=cFuncName))
+    # if we have both systems GPS Galileo then we only create the COMB files
+    if 'M' in amc.dRTK['rnx']['gnss']['select']:
+        logger.info('{func:s}: creating COMB file'.format(func=cFuncName))
 
-            satsys2create = 'M'
-        else:
-            satsys2create = amc.dRTK['rnx']['gnss']['select']
+        satsys2create = 'M'
+    else:
+        satsys2create = amc.dRTK['rnx']['gnss']['select']
 
+    lst_jobs = []
+    lst_cruxes = []
+    for rnx_type in ('obs', 'nav'):
         # create the corresponding RINEX Obs/Nav file for each individual satellite system
         for _, satsys in enumerate(satsys2create):
             # determin ethe name of the RINEX file to be created
@@ -174,32 +200,39 @@ def gnss_rinex_creation(dTmpRnx: dict, logger: logging.Logger):
                 out_dir = amc.dRTK['rinexDir']
 
             # create the RINEX OBS or NAV file for this satsys in final dir for NAV and temporay dir for OBS
+            job_name = '{satsys:s}-{type:s}'.format(satsys=satsys, type=rnx_type)
             args4GFZRNX = [amc.dRTK['bin']['GFZRNX'], '-finp', dTmpRnx[rnx_type], '-fout', os.path.join(out_dir, amc.dRTK['rnx']['gnss'][satsys][rnx_type]), '-satsys', amc.dRTK['rnx']['gnss'][satsys]['satsys'], '-f', '-chk', '-kv']
             logger.info('{func:s}: creating RINEX file {name:s}'.format(name=colored(amc.dRTK['rnx']['gnss'][satsys][rnx_type], 'green'), func=cFuncName))
-
-            # perform the RINEX creation
-            amutils.run_subprocess(sub_proc=args4GFZRNX, logger=logger)
+            lst_jobs.append(jobgraph.job(name=job_name, args=args4GFZRNX))
 
             # when RINEX OBS adjust the headers by editing via CRUX file
             if rnx_type == 'obs':
                 # create a CRUX file to correct the header info for this satsys
                 crux_file = create_crux(satsys=satsys, logger=logger)
+                lst_cruxes.append(crux_file)
 
                 rnxobs_file = os.path.join(amc.dRTK['rinexDir'], amc.dRTK['rnx']['gnss'][satsys][rnx_type])
                 args4GFZRNX = [amc.dRTK['bin']['GFZRNX'], '-finp', os.path.join(out_dir, amc.dRTK['rnx']['gnss'][satsys][rnx_type]), '-f', '-fout', rnxobs_file, '-crux', crux_file]
-
-                # perform the RINEX header correction
-                amutils.run_subprocess(sub_proc=args4GFZRNX, logger=logger)
-                # remove temporary file created
-                os.remove(crux_file)
+                lst_jobs.append(jobgraph.job(name=job_name + '-crux', args=args4GFZRNX, deps=(job_name, )))
 
                 # only create these infos when we have no mixed observations file
                 if satsys != 'M':
                     # create e ASCII display of visibility of the SVs in the observation file
-                    amc.dRTK['rnx']['gnss'][satsys]['prns'] = create_svs_ascii_plot(satsys=satsys, rnx_type=rnx_type, logger=logger)
-
-                    # create the tabular observation file
-                    amc.dRTK['rnx']['gnss'][satsys]['obstab'] = create_tabular_observation(satsys=satsys, rnx_type=rnx_type, logger=logger)
+                    amc.dRTK['rnx']['gnss'][satsys]['prns'], args4GFZRNX = create_svs_ascii_plot(satsys=satsys, rnx_type=rnx_type, logger=logger)
+                    lst_jobs.append(jobgraph.job(name=job_name + '-prns', args=args4GFZRNX, deps=(job_name + '-crux', )))
+
+    # perform the RINEX creation, header correction and information extraction
+    try:
+        run_gfzrnx_jobs(lst_jobs=lst_jobs, logger=logger)
+    finally:
+        # remove temporary files created
+        for crux_file in lst_cruxes:
+            os.remove(crux_file)
+
+    # display the ASCII SVs overviews
+    for _, satsys in enumerate(satsys2create):
+        if satsys != 'M':
+            report_svs_ascii_plot(satsys=satsys, logger=logger)
 
     pass
 
@@ -236,58 +269,41 @@ def create_crux(satsys: str, logger: logging.Logger) -> str:
     return crux_name
 
 
-def create_tabular_observation(satsys: str, rnx_type:str, logger: logging.Logger) -> str:
-    """
-    create_tabular_observation creates a tabular view of all observables for all SVs in RINEX obs file
-    """
-    cFuncName = colored(os.path.basename(__file__), 'yellow') + ' - ' + colored(sys._getframe().f_code.co_name, 'green')
-
-    # create a tabular output file containing the observables for this satsys
-    obs_tabular = amc.dRTK['rnx']['gnss'][satsys][rnx_type].replace('.', '-') + '.obstab'
-
-    args4GFZRNX = [amc.dRTK['bin']['GFZRNX'], '-f', '-finp', os.path.join(amc.dRTK['rinexDir'], amc.dRTK['rnx']['gnss'][satsys][rnx_type]), '-fout', os.path.join(amc.dRTK['gfzrnxDir'], amc.dRTK['rnx']['gnss'][satsys]['marker'], obs_tabular), '-tab_obs', '-satsys', satsys]
-
-    logger.info('{func:s}: Creating observation tabular output {obstab:s}'.format(obstab=colored(obs_tabular, 'green'), func=cFuncName))
-
-    # run the program
-    # gfzrnx -finp GALI1340.19O -tab_obs -satsys E  2> /dev/null -fout /tmp/E-ALL.t
-    amutils.run_subprocess(sub_proc=args4GFZRNX, logger=logger)
-
-    # return the created file name
-    return obs_tabular
-
-
-def create_svs_ascii_plot(satsys: str, rnx_type:str, logger: logging.Logger) -> str:
+def create_svs_ascii_plot(satsys: str, rnx_type:str, logger: logging.Logger) -> Tuple[str, list]:
     """
-    create_svs_ascii_plot creates a ASCII plot of SVs visibility according to RINEX observation file
+    create_svs_ascii_plot returns the name of and the gfzrnx command for creating a ASCII plot of SVs visibility according to RINEX observation file
     """
     cFuncName = colored(os.path.basename(__file__), 'yellow') + ' - ' + colored(sys._getframe().f_code.co_name, 'green')
 
     prns_visibility = amc.dRTK['rnx']['gnss'][satsys][rnx_type].replace('.', '-') + '.prns'
 
+    # gfzrnx -stk_epo 300-finp data/P1710171.20O
     args4GFZRNX = [amc.dRTK['bin']['GFZRNX'], '-f', '-stk_epo', amc.dRTK['interval'], '-finp', os.path.join(amc.dRTK['rinexDir'], amc.dRTK['rnx']['gnss'][satsys][rnx_type]), '-fout', os.path.join(amc.dRTK['gfzrnxDir'], amc.dRTK['rnx']['gnss'][satsys]['marker'], prns_visibility)]
 
     logger.info('{func:s}: Creating ASCII SVs display {prns:s}'.format(prns=colored(prns_visibility, 'green'), func=cFuncName))
 
-    # run the program
-    # gfzrnx -stk_epo 300-finp data/P1710171.20O
-    amutils.run_subprocess(sub_proc=args4GFZRNX, logger=logger)
+    return prns_visibility, args4GFZRNX
+
 
+def report_svs_ascii_plot(satsys: str, logger: logging.Logger):
+    """
+    report_svs_ascii_plot displays the ASCII plot of SVs visibility created by create_svs_ascii_plot
+    """
     # display the ASCII SVs overview
-    with open(os.path.join(amc.dRTK['gfzrnxDir'], amc.dRTK['rnx']['gnss'][satsys]['marker'], prns_visibility)) as f:
+    with open(os.path.join(amc.dRTK['gfzrnxDir'], amc.dRTK['rnx']['gnss'][satsys]['marker'], amc.dRTK['rnx']['gnss'][satsys]['prns'])) as f:
         for line in f:
             if line.startswith(' ST'):
                 logger.info(line[:-1])
 
-    return prns_visibility
-
 
 def create_rnxobs_subfreq(logger: logging.Logger):
     """
-    create_rnxobs_subfreq separates per frequency band the RINEX observation file
+    create_rnxobs_subfreq separates per frequency band the RINEX observation file. The frequency bands
+    of all satellite systems are extracted and compressed concurrently
     """
     cFuncName = colored(os.path.basename(__file__), 'yellow') + ' - ' + colored(sys._getframe().f_code.co_name, 'green')
 
+    lst_jobs = []
     for _, satsys in enumerate(amc.dRTK['rnx']['gnss']['select']):
 
         obs_sysfrq = amc.dRTK['rnx']['gnss'][satsys]['sysfrq']
@@ -309,39 +325,38 @@ def create_rnxobs_subfreq(logger: logging.Logger):
             args4GFZRNX = [amc.dRTK['bin']['GFZRNX'], '-f', '-finp', os.path.join(amc.dRTK['rinexDir'], amc.dRTK['rnx']['gnss'][satsys]['obs']), '-fout', os.path.join(amc.dRTK['rinexDir'], obs_sysfrq), '-obs_types', freq, '-satsys', amc.dRTK['rnx']['gnss'][satsys]['satsys']]
 
             logger.info('{func:s}: Creating frequency specific RINEX observation {rnx:s}'.format(rnx=colored(obs_sysfrq, 'green'), func=cFuncName))
-
-            # run the program
-            amutils.run_subprocess(sub_proc=args4GFZRNX, logger=logger)
+            lst_jobs.append(jobgraph.job(name='obs-' + satsysfreq, args=args4GFZRNX))
 
             # compress the obtained RINEX file using rnx2crz with options -d (delete original) -f (overwrite)
             obs_sysfreq_cmp = '{obs:s}D.Z'.format(obs=obs_sysfrq[:-1])
             args4RNX2CRZ = [amc.dRTK['bin']['RNX2CRZ'], '-f', '-d', os.path.join(amc.dRTK['rinexDir'], obs_sysfrq)]
 
             logger.info('{func:s}: Compressing frequency specific RINEX observation {rnx:s}'.format(rnx=colored(obs_sysfreq_cmp, 'green'), func=cFuncName))
+            lst_jobs.append(jobgraph.job(name='crz-' + satsysfreq, args=args4RNX2CRZ, deps=('obs-' + satsysfreq, )))
 
-            # run the program
-            amutils.run_subprocess(sub_proc=args4RNX2CRZ, logger=logger)
-            logger.info('\n')
             # store its name in dict
             amc.dRTK['rnx']['gnss'][satsys]['obs-{freq:s}'.format(freq=satsysfreq)] = obs_sysfreq_cmp
 
+    # run the programs
+    run_gfzrnx_jobs(lst_jobs=lst_jobs, logger=logger)
+
 
 def compress_rinex_obsnav(logger: logging.Logger):
     """
-    compress_rinex_obsnav compresses using Hatanaka & UNIX compress the observation file, while using 'gzip' for navigation full files
+    compress_rinex_obsnav compresses using Hatanaka & UNIX compress the observation file, while using 'gzip' for navigation full files.
+    All files are compressed concurrently
     """
     # compress also the full observation file
     cFuncName = colored(os.path.basename(__file__), 'yellow') + ' - ' + colored(sys._getframe().f_code.co_name, 'green')
 
+    lst_jobs = []
     for _, satsys in enumerate(amc.dRTK['rnx']['gnss']['select']):
         obs_cmp = '{obs:s}D.Z'.format(obs=amc.dRTK['rnx']['gnss'][satsys]['obs'][:-1])
         args4RNX2CRZ = [amc.dRTK['bin']['RNX2CRZ'], '-f', '-d', os.path.join(amc.dRTK['rinexDir'], amc.dRTK['rnx']['gnss'][satsys]['obs'])]
 
         logger.info('{func:s}: Compressing RINEX observation {rnx:s}'.format(rnx=colored(obs_cmp, 'green'), func=cFuncName))
+        lst_jobs.append(jobgraph.job(name='crz-' + satsys, args=args4RNX2CRZ))
 
-        # run the program
-        amutils.run_subprocess(sub_proc=args4RNX2CRZ, logger=logger)
-        logger.info('\n')
         # store its name in dict
         amc.dRTK['rnx']['gnss'][satsys]['obs'] = obs_cmp
 
@@ -350,8 +365,10 @@ def compress_rinex_obsnav(logger: logging.Logger):
         args4COMPRESS = [amc.dRTK['bin']['COMPRESS'], '-f', os.path.join(amc.dRTK['rinexDir'], amc.dRTK['rnx']['gnss'][satsys]['nav'])]
 
         logger.info('{func:s}: Compressing RINEX observation {rnx:s}'.format(rnx=colored(nav_cmp, 'green'), func=cFuncName))
+        lst_jobs.append(jobgraph.job(name='compress-' + satsys, args=args4COMPRESS))
 
-        # run the program
-        amutils.run_subprocess(sub_proc=args4COMPRESS, logger=logger)
         # store its name in dict
         amc.dRTK['rnx']['gnss'][satsys]['nav'] = nav_cmp
+
+    # run the programs
+    run_gfzrnx_jobs(lst_jobs=lst_jobs, logger=logger)
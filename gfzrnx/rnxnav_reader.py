@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+
+"""
+rnxnav_reader reads the GPS and Galileo broadcast ephemerides of (compressed) RINEX v3 navigation files into a
+NumPy structured array with a row per ephemeris record.
+"""
+
+import sys
+import os
+import argparse
+import time
+import logging
+from typing import Tuple
+from termcolor import colored
+import numpy as np
+
+from gfzrnx import rnxobs_reader
+
+__author__ = 'amuls'
+
+# the broadcast orbit parameters per record line (after the SV / epoch / clock line), same layout for GPS and Galileo.
+# codes is the data source for Galileo, tgd2_iodc is the BGD E5b/E1 for Galileo and the IODC for GPS
+nav_fields = ('iode', 'crs', 'deltan', 'm0',
+              'cuc', 'ecc', 'cus', 'sqrta',
+              'toe', 'cic', 'omega0', 'cis',
+              'i0', 'crc', 'omega', 'omegadot',
+              'idot', 'codes', 'week', 'l2p',
+              'accuracy', 'health', 'tgd', 'tgd2_iodc',
+              'ttr', 'fit')
+
+# toc is the time of clock in GPS seconds since 1980-01-06, toe the time of ephemeris in seconds of week
+nav_dtype = np.dtype([('prn', 'U3'), ('toc', np.float64), ('af0', np.float64), ('af1', np.float64), ('af2', np.float64)] + [(field, np.float64) for field in nav_fields])
+
+# Galileo data sources (bits of codes) for the I/NAV (E1-B, E5b) and F/NAV (E5a) messages
+gal_sources = {'INAV': 0b101, 'FNAV': 0b010}
+
+gps_epoch = np.datetime64('1980-01-06T00:00:00', 'ns')
+
+
+def nav_values(line: str, nr_values: int, start: int = 4) -> list:
+    """
+    nav_values returns the nr_values (D19.12) values starting at column start of a navigation record line
+    """
+    values = []
+    for i in range(nr_values):
+        field = line[start + 19 * i:start + 19 * (i + 1)].strip()
+        values.append(float(field.replace('D', 'E')) if field else np.nan)
+
+    return values
+
+
+def read_rnxnav(rnx_file: str, logger: logging.Logger, satsys: str = 'EG', gal_source: str = 'INAV') -> Tuple[dict, np.ndarray]:
+    """
+    read_rnxnav reads the GPS and/or Galileo (satsys) ephemerides of a (compressed) RINEX v3 navigation file.
+    For Galileo only the records of the gal_source messages (INAV, FNAV or None for all) are kept.
+    Returns the header information and the ephemerides sorted by PRN and time of ephemeris
+    """
+    cFuncName = colored(os.path.basename(__file__), 'yellow') + ' - ' + colored(sys._getframe().f_code.co_name, 'green')
+
+    logger.info('{func:s}: reading RINEX navigation file {rnx:s}'.format(rnx=colored(rnx_file, 'green'), func=cFuncName))
+    tStart = time.perf_counter()
+
+    lines = rnxobs_reader.rnx_lines(rnx_file)
+
+    line = next(lines, '')
+    if not line[60:].startswith('RINEX VERSION / TYPE') or line[20] != 'N':
+        raise ValueError('not a RINEX navigation file')
+    dHdr = {'version': float(line[:9]), 'satsys': line[40], 'leap': None}
+    if dHdr['version'] < 3:
+        raise ValueError('RINEX version {vers:.2f} is not supported'.format(vers=dHdr['version']))
+
+    for line in lines:
+        label = line[60:].strip()
+        if label == 'END OF HEADER':
+            break
+        elif label == 'LEAP SECONDS':
+            dHdr['leap'] = int(line[:6])
+
+    lst_records = []
+    for line in lines:
+        if not line[:1].isalpha():
+            continue
+
+        # number of broadcast orbit lines following the SV / epoch / clock line
+        nr_lines = {'R': 3, 'S': 3}.get(line[0], 7)
+        orbit_lines = [next(lines, '') for _ in range(nr_lines)]
+        if line[0] not in satsys:
+            continue
+
+        prn = line[:3].replace(' ', '0')
+        toc = (np.datetime64('{yyyy:s}-{mm:s}-{dd:s}T{hh:s}:{mi:s}:{ss:s}'.format(yyyy=line[4:8], mm=line[9:11], dd=line[12:14], hh=line[15:17], mi=line[18:20], ss=line[21:23]), 'ns') - gps_epoch) / np.timedelta64(1, 's')
+
+        values = nav_values(line, 3, start=23)
+        for orbit_line in orbit_lines:
+            values += nav_values(orbit_line, 4)
+
+        lst_records.append(tuple([prn, toc] + values[:len(nav_dtype) - 2]))
+
+    naEph = np.array(lst_records, dtype=nav_dtype)
+
+    if gal_source is not None:
+        gal = np.char.startswith(naEph['prn'], 'E')
+        naEph = naEph[~gal | ((naEph['codes'].astype(np.int64) & gal_sources[gal_source]) > 0)]
+
+    naEph = naEph[np.lexsort((naEph['week'] * 604800. + naEph['toe'], naEph['prn']))]
+
+    logger.info('{func:s}: read {nr:d} ephemerides of {sats:d} satellites in {secs:.2f} s'.format(nr=naEph.size, sats=np.unique(naEph['prn']).size, secs=time.perf_counter() - tStart, func=cFuncName))
+
+    return dHdr, naEph
+
+
+if __name__ == "__main__":  # Only run if this file is called directly
+    parser = argparse.ArgumentParser(description='reads the GPS / Galileo ephemerides of a (compressed) RINEX v3 navigation file')
+    parser.add_argument('rnx_file', help='RINEX v3 navigation file (optionally .gz, .bz2 or .Z)', type=str)
+    parser.add_argument('-s', '--satsys', help='satellite systems to read (default EG)', required=False, type=str, default='EG')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    dHdr, naEph = read_rnxnav(rnx_file=args.rnx_file, logger=logging.getLogger(), satsys=args.satsys)
+
+    print('header = {hdr!s}'.format(hdr=dHdr))
+    for prn in np.unique(naEph['prn']):
+        naPRN = naEph[naEph['prn'] == prn]
+        print('{prn:s}: {nr:3d} ephemerides, toe {first:.0f} .. {last:.0f} (week {week:.0f})'.format(prn=prn, nr=naPRN.size, first=naPRN['toe'][0], last=naPRN['toe'][-1], week=naPRN['week'][0]))
@@ -0,0 +1,427 @@
+#!/usr/bin/env python
+
+"""
+rnxobs_reader reads RINEX v3 observation files epoch by epoch into a column per observable (NumPy arrays).
+Compact RINEX (Hatanaka, .crx / .??d) and gzip (.gz), bzip2 (.bz2) or UNIX compress (.Z) files are decompressed
+while streaming, so no gfzrnx / crx2rnx run nor intermediate files are needed.
+"""
+
+import sys
+import os
+import argparse
+import gzip
+import bz2
+import time
+import logging
+from array import array
+from typing import Tuple
+from termcolor import colored
+import numpy as np
+
+__author__ = 'amuls'
+
+rnx_block_size = 1 << 20
+
+
+def lzw_decompress(fd, block_size: int = rnx_block_size):
+    """
+    lzw_decompress yields the decompressed blocks of the UNIX compress (.Z) stream fd
+    """
+    header = fd.read(3)
+    if len(header) < 3 or header[:2] != b'\x1f\x9d':
+        raise ValueError('not a UNIX compressed (.Z) file')
+    max_bits = header[2] & 0x1f
+    block_mode = header[2] & 0x80
+
+    table = [bytes([i]) for i in range(256)] + ([b''] if block_mode else [])
+    n_bits = 9
+    prev = None
+    nr_codes = 0  # codes read with the current code width (compress writes groups of 8 codes)
+    buf = b''
+    pos = 0  # bit position in buf
+
+    for block in iter(lambda: fd.read(block_size), b''):
+        # drop the bytes already decoded, the skip of a group of codes may reach beyond the data read so far
+        nr_drop = min(pos >> 3, len(buf))
+        buf = buf[nr_drop:] + block
+        pos -= nr_drop << 3
+        end = len(buf) << 3
+        lst_out = []
+
+        while pos + n_bits <= end:
+            code = (int.from_bytes(buf[pos >> 3:(pos >> 3) + 3], 'little') >> (pos & 7)) & ((1 << n_bits) - 1)
+            pos += n_bits
+            nr_codes += 1
+
+            if block_mode and code == 256:
+                # clear the table and skip the remainder of the group of codes
+                pos += ((8 - nr_codes % 8) % 8) * n_bits
+                del table[257:]
+                n_bits, nr_codes, prev = 9, 0, None
+                continue
+
+            if code < len(table):
+                entry = table[code]
+            elif code == len(table) and prev is not None:
+                entry = prev + prev[:1]
+            else:
+                raise ValueError('corrupt UNIX compressed (.Z) data')
+            lst_out.append(entry)
+
+            if prev is not None and len(table) < (1 << max_bits):
+                table.append(prev + entry[:1])
+                if len(table) > (1 << n_bits) - 1 and n_bits < max_bits:
+                    # code width increases, skip the remainder of the group of codes
+                    pos += ((8 - nr_codes % 8) % 8) * n_bits
+                    n_bits += 1
+                    nr_codes = 0
+            prev = entry
+
+        yield b''.join(lst_out)
+
+
+def lzw_compress(data: bytes, max_bits: int = 16, nr_clear: int = None) -> bytes:
+    """
+    lzw_compress returns data as UNIX compress (.Z) stream in block mode. The table is cleared when it is full or
+    (like compress does when the compression ratio drops) after every nr_clear codes
+    """
+    out = bytearray(b'\x1f\x9d' + bytes([0x80 | max_bits]))
+    acc = nr_acc = 0  # bits not yet written to out
+
+    def put_code(code: int, n_bits: int):
+        nonlocal acc, nr_acc
+        acc |= code << nr_acc
+        nr_acc += n_bits
+        while nr_acc >= 8:
+            out.append(acc & 0xff)
+            acc >>= 8
+            nr_acc -= 8
+
+    def put_padding(nr_codes: int, n_bits: int):
+        # compress writes the codes of the same width in groups of 8
+        for _ in range((8 - nr_codes % 8) % 8):
+            put_code(0, n_bits)
+
+    table = {bytes([i]): i for i in range(256)}
+    n_bits, nr_codes, nr_table_codes = 9, 0, 0
+    prefix = b''
+
+    for char in (data[i:i + 1] for i in range(len(data))):
+        if prefix + char in table:
+            prefix += char
+            continue
+
+        put_code(table[prefix], n_bits)
+        nr_codes += 1
+        nr_table_codes += 1
+        if len(table) + 1 > (1 << n_bits) - 1 and n_bits < max_bits:
+            put_padding(nr_codes, n_bits)
+            n_bits, nr_codes = n_bits + 1, 0
+        table[prefix + char] = len(table) + 1  # code 256 is the CLEAR code
+
+        if len(table) + 1 == 1 << max_bits or nr_table_codes == nr_clear:
+            put_code(256, n_bits)
+            put_padding(nr_codes + 1, n_bits)
+            table = {bytes([i]): i for i in range(256)}
+            n_bits, nr_codes, nr_table_codes = 9, 0, 0
+        prefix = char
+
+    if prefix:
+        put_code(table[prefix], n_bits)
+    if nr_acc:
+        out.append(acc & 0xff)
+
+    return bytes(out)
+
+
+def test_lzw_block_sizes():
+    """
+    test_lzw_block_sizes checks that the .Z decompression does not depend on the block size, also when the skip
+    after a CLEAR code or code width increase reaches beyond a block
+    """
+    import io
+
+    data = b''.join(b'> 2020 01 %02d 00 00 %02d.0000000  0 %2d\nG%02d  %14.3f %14.3f\n' % (i % 28 + 1, i % 60, i % 13, i % 32, i * 1.37, i * 7.13) for i in range(5000))
+    for max_bits, nr_clear in ((9, None), (12, None), (16, None), (16, 300), (16, 1001)):
+        compressed = lzw_compress(data, max_bits=max_bits, nr_clear=nr_clear)
+        for block_size in (rnx_block_size, 4096, 1000, 333, 17, 1):
+            decompressed = b''.join(lzw_decompress(io.BytesIO(compressed), block_size=block_size))
+            assert decompressed == data, 'max_bits {bits:d} clear {clear!s} block size {size:d}'.format(bits=max_bits, clear=nr_clear, size=block_size)
+    print('test_lzw_block_sizes: OK')
+
+
+def rnx_lines(rnx_file: str):
+    """
+    rnx_lines yields the lines of the (gzip, bzip2 or UNIX compressed) text file rnx_file
+    """
+    ext = os.path.splitext(rnx_file)[1]
+
+    if ext == '.gz':
+        fd = gzip.open(rnx_file, 'rb')
+    elif ext == '.bz2':
+        fd = bz2.open(rnx_file, 'rb')
+    else:
+        fd = open(rnx_file, 'rb')
+
+    with fd:
+        blocks = lzw_decompress(fd) if ext == '.Z' else iter(lambda: fd.read(rnx_block_size), b'')
+
+        remainder = b''
+        for block in blocks:
+            lines = (remainder + block).split(b'\n')
+            remainder = lines.pop()
+            for line in lines:
+                yield line.decode('ascii', errors='replace').rstrip('\r')
+
+        if remainder:
+            yield remainder.decode('ascii', errors='replace').rstrip('\r')
+
+
+def read_rnxobs_header(lines) -> dict:
+    """
+    read_rnxobs_header reads the header lines of a (compact) RINEX v3 observation file and returns the version,
+    marker and per satellite system the observation types
+    """
+    dHdr = {'crinex': None, 'marker': '', 'obstypes': {}}
+
+    line = next(lines, '')
+    if line[60:].startswith('CRINEX VERS') or 'COMPACT RINEX FORMAT' in line[20:60]:
+        dHdr['crinex'] = line[:20].strip()
+        if not dHdr['crinex'].startswith('3'):
+            raise ValueError('compact RINEX version {vers:s} is not supported'.format(vers=dHdr['crinex']))
+        next(lines, '')  # CRINEX PROG / DATE
+        line = next(lines, '')
+
+    if not line[60:].startswith('RINEX VERSION / TYPE') or line[20] != 'O':
+        raise ValueError('not a RINEX observation file')
+    dHdr['version'] = float(line[:9])
+    if dHdr['version'] < 3:
+        raise ValueError('RINEX version {vers:.2f} is not supported'.format(vers=dHdr['version']))
+
+    satsys = None
+    for line in lines:
+        label = line[60:].strip()
+
+        if label == 'END OF HEADER':
+            return dHdr
+        elif label == 'MARKER NAME':
+            dHdr['marker'] = line[:60].strip()
+        elif label == 'SYS / # / OBS TYPES':
+            # continuation lines have no satellite system
+            if line[0] != ' ':
+                satsys = line[0]
+                dHdr['obstypes'][satsys] = []
+            dHdr['obstypes'][satsys] += line[7:60].split()
+
+    raise ValueError('RINEX header has no END OF HEADER')
+
+
+def epoch_time(epoch_line: str) -> np.datetime64:
+    """
+    epoch_time returns the time of a RINEX v3 epoch line
+    """
+    dt = np.datetime64('{yyyy:s}-{mm:s}-{dd:s}T{hh:s}:{mi:s}'.format(yyyy=epoch_line[2:6], mm=epoch_line[7:9].replace(' ', '0'), dd=epoch_line[10:12].replace(' ', '0'), hh=epoch_line[13:15].replace(' ', '0'), mi=epoch_line[16:18].replace(' ', '0')), 'ns')
+
+    return dt + np.timedelta64(int(round(float(epoch_line[18:29]) * 1e9)), 'ns')
+
+
+def rnx_epochs(lines, dHdr: dict):
+    """
+    rnx_epochs yields per observation epoch of a RINEX v3 file its time and the list of (PRN, observations)
+    """
+    for line in lines:
+        if not line.startswith('>'):
+            continue
+
+        flag = int(line[31:32].strip() or 0)
+        nr_sats = int(line[32:35])
+        sat_lines = [next(lines, '') for _ in range(nr_sats)]
+        if flag > 1:
+            # event records
+            continue
+
+        lst_sats = []
+        for sat_line in sat_lines:
+            prn = sat_line[:3].replace(' ', '0')
+            values = []
+            for i in range(len(dHdr['obstypes'].get(prn[0], []))):
+                field = sat_line[3 + 16 * i:17 + 16 * i]
+                values.append(float(field) if field.strip() else np.nan)
+            lst_sats.append((prn, values))
+
+        yield epoch_time(line), lst_sats
+
+
+def crx_repair(old: str, diff: str) -> str:
+    """
+    crx_repair applies the text difference diff (space unchanged, '&' a space) of compact RINEX on old
+    """
+    new = list(old.ljust(len(diff)))
+    for i, char in enumerate(diff):
+        if char == '&':
+            new[i] = ' '
+        elif char != ' ':
+            new[i] = char
+
+    return ''.join(new)
+
+
+def crx_epochs(lines, dHdr: dict):
+    """
+    crx_epochs yields per observation epoch of a compact RINEX v3 (Hatanaka) file its time and the list of
+    (PRN, observations). The observations are restored from the differences of order up to the one given at
+    initialisation of each arc ('order&value')
+    """
+    epoch_line = ''
+    dsats = {}  # per PRN per observable [order, current order, value, differences...] of the previous epoch
+
+    for line in lines:
+        if line.startswith('>'):
+            new_line = line
+        else:
+            new_line = crx_repair(old=epoch_line, diff=line)
+
+        flag = int(new_line[31:32].strip() or 0)
+        nr_sats = int(new_line[32:35])
+
+        if flag > 1:
+            # event records are not compressed
+            for _ in range(nr_sats):
+                next(lines, '')
+            continue
+
+        epoch_line = new_line
+        next(lines, '')  # receiver clock offset
+
+        dsats_epoch = {}
+        lst_sats = []
+        for i in range(nr_sats):
+            prn = epoch_line[41 + 3 * i:44 + 3 * i].replace(' ', '0')
+            nr_obs = len(dHdr['obstypes'].get(prn[0], []))
+
+            states = dsats.get(prn, [None] * nr_obs)
+            fields = next(lines, '').split(' ', nr_obs)[:nr_obs]
+
+            values = []
+            for j in range(nr_obs):
+                field = fields[j] if j < len(fields) else ''
+                state = states[j]
+
+                if not field:
+                    # observation not available, a new arc starts when it comes back
+                    states[j] = None
+                    values.append(np.nan)
+                    continue
+
+                if field[1:2] == '&':
+                    # initialisation of the arc with the maximum order of differences
+                    state = states[j] = [int(field[0]), 0, int(field[2:])]
+                elif state is None:
+                    raise ValueError('compact RINEX difference without initialisation for {prn:s} at {epoch:s}'.format(prn=prn, epoch=epoch_line[2:29]))
+                else:
+                    if state[1] < state[0]:
+                        state[1] += 1
+                        state.append(0)
+                    state[2 + state[1]] = int(field)
+                    for k in range(state[1], 0, -1):
+                        state[1 + k] += state[2 + k]
+
+                values.append(state[2] / 1000.)
+
+            dsats_epoch[prn] = states
+            lst_sats.append((prn, values))
+
+        dsats = dsats_epoch
+
+        yield epoch_time(epoch_line), lst_sats
+
+
+def iter_rnxobs(rnx_file: str) -> Tuple[dict, object]:
+    """
+    iter_rnxobs returns the header information of the (compact, compressed) RINEX v3 observation file and a
+    generator of its epochs (time, list of (PRN, observations))
+    """
+    lines = rnx_lines(rnx_file)
+    dHdr = read_rnxobs_header(lines)
+
+    return dHdr, (crx_epochs if dHdr['crinex'] else rnx_epochs)(lines, dHdr)
+
+
+def read_rnxobs(rnx_file: str, logger: logging.Logger, satsys: str = None, obstypes: list = None) -> Tuple[dict, dict]:
+    """
+    read_rnxobs reads the (compact, compressed) RINEX v3 observation file for the satellite systems in satsys
+    (default all) and returns the header information and the columns DATE_TIME, PRN and per observable type
+    (default all in obstypes) as NumPy arrays (NaN when not observed)
+    """
+    cFuncName = colored(os.path.basename(__file__), 'yellow') + ' - ' + colored(sys._getframe().f_code.co_name, 'green')
+
+    logger.info('{func:s}: reading RINEX observation file {rnx:s}'.format(rnx=colored(rnx_file, 'green'), func=cFuncName))
+    tStart = time.perf_counter()
+
+    dHdr, epochs = iter_rnxobs(rnx_file)
+
+    systems = [sys_obs for sys_obs in dHdr['obstypes'] if satsys is None or sys_obs in satsys]
+    if obstypes is None:
+        obstypes = []
+        for sys_obs in systems:
+            obstypes += [obstype for obstype in dHdr['obstypes'][sys_obs] if obstype not in obstypes]
+
+    # per satellite system the rows (epoch index, row number, PRN) and the observations of the rows one after the other
+    drows = {sys_obs: {'epoch': array('l'), 'row': array('l'), 'prn': [], 'obs': array('d')} for sys_obs in systems}
+    lst_epochs = []
+    nr_rows = 0
+
+    for dt, lst_sats in epochs:
+        for prn, values in lst_sats:
+            drow = drows.get(prn[0])
+            if drow is not None:
+                drow['epoch'].append(len(lst_epochs))
+                drow['row'].append(nr_rows)
+                drow['prn'].append(prn)
+                drow['obs'].extend(values)
+                nr_rows += 1
+        lst_epochs.append(dt)
+
+    # gather the rows of all satellite systems in the order of the file
+    order = np.argsort(np.concatenate([np.asarray(drows[sys_obs]['row']) for sys_obs in systems] + [np.zeros(0, dtype=np.intp)]), kind='mergesort')
+
+    dCols = {}
+    dCols['DATE_TIME'] = np.array(lst_epochs, dtype='datetime64[ns]')[np.concatenate([np.asarray(drows[sys_obs]['epoch']) for sys_obs in systems] + [np.zeros(0, dtype=np.intp)])[order]]
+    dCols['PRN'] = np.array(sum((drows[sys_obs]['prn'] for sys_obs in systems), []), dtype=object)[order]
+
+    for obstype in obstypes:
+        lst_col = []
+        for sys_obs in systems:
+            nr_obs = len(dHdr['obstypes'][sys_obs])
+            naObs = np.frombuffer(drows[sys_obs]['obs'], dtype=np.float64).reshape(-1, nr_obs)
+            if obstype in dHdr['obstypes'][sys_obs]:
+                lst_col.append(naObs[:, dHdr['obstypes'][sys_obs].index(obstype)])
+            else:
+                lst_col.append(np.full(naObs.shape[0], np.nan))
+        dCols[obstype] = np.concatenate(lst_col + [np.zeros(0)])[order]
+
+    logger.info('{func:s}: read {epochs:d} epochs, {rows:d} observation records of {nr:d} observables in {secs:.2f} s'.format(epochs=len(lst_epochs), rows=nr_rows, nr=len(obstypes), secs=time.perf_counter() - tStart, func=cFuncName))
+
+    return dHdr, dCols
+
+
+if __name__ == "__main__":  # Only run if this file is called directly
+    parser = argparse.ArgumentParser(description='reads a (compact, compressed) RINEX v3 observation file and reports its observables')
+    parser.add_argument('rnx_file', help='RINEX v3 observation file (.rnx, .??o, .crx, .??d, optionally .gz, .bz2 or .Z)', type=str, nargs='?')
+    parser.add_argument('-s', '--satsys', help='satellite systems to read (default all)', required=False, type=str, default=None)
+    parser.add_argument('-t', '--test', help='check the UNIX compress (.Z) decompression for different block sizes', action='store_true', required=False)
+    args = parser.parse_args()
+
+    if args.test:
+        test_lzw_block_sizes()
+    if args.rnx_file is None:
+        if not args.test:
+            parser.error('the following arguments are required: rnx_file')
+        sys.exit(0)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    dHdr, dCols = read_rnxobs(rnx_file=args.rnx_file, logger=logging.getLogger(), satsys=args.satsys)
+
+    print('obstypes = {obs!s}'.format(obs=dHdr['obstypes']))
+    for key, naCol in dCols.items():
+        print('{key:>9s}: {nr:d} values, {obs:d} observed, first {first!s}'.format(key=key, nr=naCol.size, obs=int(naCol.size if naCol.dtype.kind in 'OM' else np.count_nonzero(~np.isnan(naCol))), first=naCol[:1]))
@@ -10,6 +10,7 @@ import numpy as np
 
 import am_config as amc
 from ampyutils import amutils
+from gfzrnx import rnxobs_reader
 
 __author__ = 'amuls'
 
@@ -34,6 +35,30 @@ def read_obs_tabular(gnss: str, logger: logging.Logger) -> pd.DataFrame:
     return df
 
 
+def read_obs_rinex(gnss: str, logger: logging.Logger) -> pd.DataFrame:
+    """
+    read_obs_rinex reads the observation data of gnss directly from its (compressed) RINEX observation file into a dataframe.
+    For directories processed earlier without the RINEX observation file, the obstab file created by gfzrnx is read
+    """
+    cFuncName = colored(os.path.basename(__file__), 'yellow') + ' - ' + colored(sys._getframe().f_code.co_name, 'green')
+
+    # use the combined observation file when no observation file was created for gnss itself
+    dGNSSs = amc.dRTK['rnx']['gnss']
+    gnss_rnxobs = os.path.join(amc.dRTK['rinexDir'], dGNSSs[gnss]['obs'] if 'obs' in dGNSSs[gnss] else dGNSSs['M']['obs'])
+
+    if not os.path.isfile(gnss_rnxobs) and 'obstab' in dGNSSs[gnss]:
+        logger.warning('{func:s}: RINEX observation file {obs:s} not found, using the obstab file'.format(obs=colored(gnss_rnxobs, 'red'), func=cFuncName))
+        return read_obs_tabular(gnss=gnss, logger=logger)
+
+    try:
+        _, dCols = rnxobs_reader.read_rnxobs(rnx_file=gnss_rnxobs, logger=logger, satsys=gnss)
+    except (KeyError, FileNotFoundError, ValueError) as e:
+        logger.critical('{func:s}: Error = {err!s}'.format(err=e, func=cFuncName))
+        sys.exit(amc.E_FILE_NOT_EXIST)
+
+    return pd.DataFrame(dCols)
+
+
 def rise_set_times(prn: str, df_obstab: pd.DataFrame, nomint_multi: int, logger: logging.Logger) -> Tuple[int, list, list, list]:
     """
     rise_set_times determines observed rise and set times for PRN
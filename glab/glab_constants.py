@@ -127,3 +127,36 @@ dOUTPUT['ZTD'] = dOUTPUT['columns'][40:43]
 dOUTPUT['UTM'] = ['UTM.N', 'UTM.E']
 
 dgLab['OUTPUT'] = dOUTPUT
+
+# the GNSS systems used in the gLAB messages
+dgLab['gnss_systems'] = ['GPS', 'GAL', 'GLO', 'GEO', 'BDS', 'QZS', 'IRN']
+
+# the SATSEL message fields (last field is the free text reason for (de)selection)
+dSATSEL = {}
+dSATSEL['columns'] = ['SATSEL', 'Year', 'DoY', 'sod', 'Time', 'GNSS', 'PRN', 'reason']
+dSATSEL['dtypes'] = {'Year': 'int16', 'DoY': 'int16', 'sod': 'float64', 'PRN': 'uint8'}
+
+dgLab['SATSEL'] = dSATSEL
+
+# the MEAS message fields, followed by #meas values in the order given by meas_list (eg C1C:L1C:D1C:S1C)
+dMEAS = {}
+dMEAS['columns'] = ['MEAS', 'Year', 'DoY', 'sod', 'Time', 'GNSS', 'PRN', 'Elev', 'Azim', '#meas', 'meas_list']
+dMEAS['dtypes'] = {'Year': 'int16', 'DoY': 'int16', 'sod': 'float64', 'PRN': 'uint8', 'Elev': 'float32', 'Azim': 'float32', '#meas': 'int8'}
+
+dgLab['MEAS'] = dMEAS
+
+# the MODEL message fields
+dMODEL = {}
+dMODEL['columns'] = ['MODEL', 'Year', 'DoY', 'sod', 'Time', 'GNSS', 'PRN', 'arc', 'meas', 'freq', 'Elev', 'Azim', 'meas_value', 'model', 'sv_X', 'sv_Y', 'sv_Z', 'sv_vX', 'sv_vY', 'sv_vZ', 'geom_range', 'sv_clk', 'sv_pco', 'rx_pco', 'rx_arp', 'relativity', 'windup', 'tropo', 'iono', 'grav_delay', 'tgd', 'solid_tides']
+dMODEL['corrections'] = dMODEL['columns'][22:]
+dMODEL['dtypes'] = {'Year': 'int16', 'DoY': 'int16', 'sod': 'float64', 'PRN': 'uint8', 'arc': 'float32', 'freq': 'int8', 'Elev': 'float32', 'Azim': 'float32', 'meas_value': 'float64', 'model': 'float64', 'sv_X': 'float64', 'sv_Y': 'float64', 'sv_Z': 'float64', 'sv_vX': 'float32', 'sv_vY': 'float32', 'sv_vZ': 'float32', 'geom_range': 'float64', 'sv_clk': 'float64'}
+dMODEL['dtypes'].update({col: 'float32' for col in dMODEL['corrections']})
+
+dgLab['MODEL'] = dMODEL
+
+# the FILTER message fields, followed by the remaining estimated parameters (ISBs, ambiguities)
+dFILTER = {}
+dFILTER['columns'] = ['FILTER', 'Year', 'DoY', 'sod', 'Time', 'dX', 'dY', 'dZ', 'rx_clk', 'ZTD']
+dFILTER['dtypes'] = {'Year': 'int16', 'DoY': 'int16', 'sod': 'float64', 'dX': 'float32', 'dY': 'float32', 'dZ': 'float32', 'rx_clk': 'float64', 'ZTD': 'float32'}
+
+dgLab['FILTER'] = dFILTER
@@ -0,0 +1,121 @@
+import pandas as pd
+from termcolor import colored
+import sys
+import os
+import io
+import json
+import time
+import tempfile
+import logging
+import numpy as np
+from typing import Tuple
+
+from ampyutils import amutils
+from glab import glab_constants as glc
+from glab import glab_split_outfile
+from stats import enu_statistics as enu_stat
+from stats import running_statistics as run_stat
+
+__author__ = 'amuls'
+
+
+def parse_output_lines(output_lines: bytes) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    parse_output_lines parses complete OUTPUT lines and returns the ENU coordinates, their standard deviations and the PDOP
+    """
+    use_cols = glc.dgLab['OUTPUT']['dENU'] + glc.dgLab['OUTPUT']['sdENU'] + ['PDOP']
+
+    df = pd.read_csv(io.BytesIO(output_lines), header=None, delim_whitespace=True, names=glc.dgLab['OUTPUT']['columns'], usecols=use_cols)
+
+    return df[glc.dgLab['OUTPUT']['dENU']].to_numpy(dtype=np.float64), df[glc.dgLab['OUTPUT']['sdENU']].to_numpy(dtype=np.float64), df['PDOP'].to_numpy(dtype=np.float64)
+
+
+def follow_snapshot(drun_crd: dict, drun_bin: dict, nr_epochs: int) -> dict:
+    """
+    follow_snapshot returns the running statistics in the structure of glab_statistics (keys 'crd' and 'dop_bin')
+    """
+    crds = glc.dgLab['OUTPUT']['dENU']
+
+    dStats = {'epochs': nr_epochs, 'updated': time.strftime('%Y-%m-%dT%H:%M:%S')}
+    dStats['crd'] = {crd: run_stat.running_results(drun=drun_crd, group=0, var=i) for i, crd in enumerate(crds)}
+
+    dStats['dop_bin'] = {}
+    for j, bin_label in enumerate(enu_stat.dopbin_labels(dop_bins=glc.dop_bins)):
+        bin_count = int(drun_bin['count'][j, 0])
+        dStats['dop_bin'][bin_label] = {'perc': bin_count / max(nr_epochs, 1), 'count': bin_count}
+        for i, crd in enumerate(crds):
+            dStats['dop_bin'][bin_label][crd] = run_stat.running_results(drun=drun_bin, group=j, var=i)
+
+    return dStats
+
+
+def write_json_snapshot(dStats: dict, json_out: str):
+    """
+    write_json_snapshot replaces the JSON file json_out at once by the snapshot of the statistics
+    """
+    fd, tmp_name = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(json_out)), suffix='.json')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(dStats, f, ensure_ascii=False, indent=4, default=amutils.DT_convertor)
+    os.replace(tmp_name, json_out)
+
+
+def follow_glab_outfile(glab_outfile: str, json_out: str, logger: logging.Logger, interval: float = 60., poll: float = 1., idle: float = 600.) -> dict:
+    """
+    follow_glab_outfile tails the gLAB out file while gLAB is still writing it. The new OUTPUT lines are parsed
+    incrementally and added to the running statistics per ENU coordinate and per PDOP bin. Every interval seconds
+    the statistics are written as JSON snapshot to json_out. Stops when the file did not grow during idle seconds
+    (or on Ctrl-C). Memory use does not depend on the length of the run.
+    returns the final statistics
+    """
+    cFuncName = colored(os.path.basename(__file__), 'yellow') + ' - ' + colored(sys._getframe().f_code.co_name, 'green')
+
+    logger.info('{func:s}: following {file:s} (snapshot to {json:s} every {intv:g} s, stop after {idle:g} s idle)'.format(file=colored(glab_outfile, 'green'), json=colored(json_out, 'green'), intv=interval, idle=idle, func=cFuncName))
+
+    nr_crds = len(glc.dgLab['OUTPUT']['dENU'])
+    drun_crd = run_stat.running_init(nr_groups=1, nr_vars=nr_crds)
+    drun_bin = run_stat.running_init(nr_groups=len(glc.dop_bins) - 1, nr_vars=nr_crds)
+    nr_epochs = 0
+
+    dmsg_lines = {b'OUTPUT': []}
+    remainder = b''
+    t_data = t_snapshot = time.monotonic()
+
+    with open(glab_outfile, 'rb') as fd:
+        try:
+            while True:
+                block = fd.read(glab_split_outfile.glab_block_size)
+
+                if block:
+                    t_data = time.monotonic()
+                    block = remainder + block
+
+                    # only treat complete lines, keep the partial last line until gLAB has written it completely
+                    cut = block.rfind(b'\n') + 1
+                    remainder = block[cut:]
+                    output_lines = glab_split_outfile.dispatch_glab_lines(block=block[:cut - 1], dmsg_lines=dmsg_lines).get('OUTPUT') if cut else None
+
+                    if output_lines is not None:
+                        naENU, naSD, naPDOP = parse_output_lines(output_lines=output_lines)
+                        run_stat.running_update(drun=drun_crd, values=naENU, sds=naSD)
+                        run_stat.running_update(drun=drun_bin, values=naENU, groups=enu_stat.dopbin_index(naDOP=naPDOP, dop_bins=glc.dop_bins), sds=naSD)
+                        nr_epochs += naENU.shape[0]
+                elif time.monotonic() - t_data > idle:
+                    logger.info('{func:s}: {file:s} did not grow during {idle:g} s'.format(file=glab_outfile, idle=idle, func=cFuncName))
+                    break
+                else:
+                    time.sleep(poll)
+
+                if time.monotonic() - t_snapshot >= interval:
+                    write_json_snapshot(dStats=follow_snapshot(drun_crd=drun_crd, drun_bin=drun_bin, nr_epochs=nr_epochs), json_out=json_out)
+                    t_snapshot = time.monotonic()
+                    logger.info('{func:s}: snapshot of {nr:d} epochs written'.format(nr=nr_epochs, func=cFuncName))
+        except KeyboardInterrupt:
+            logger.info('{func:s}: following {file:s} interrupted'.format(file=glab_outfile, func=cFuncName))
+
+    # write the final statistics
+    dStats = follow_snapshot(drun_crd=drun_crd, drun_bin=drun_bin, nr_epochs=nr_epochs)
+    write_json_snapshot(dStats=dStats, json_out=json_out)
+
+    logger.info('{func:s}: statistics of {nr:d} epochs =\n{json!s}'.format(nr=nr_epochs, json=json.dumps(dStats, sort_keys=False, indent=4, default=amutils.DT_convertor), func=cFuncName))
+
+    return dStats
@@ -3,6 +3,7 @@ import sys
 import os
 import logging
 import re
+import io
 import json
 from typing import Tuple
 
@@ -13,40 +14,85 @@ from GNSS import wgs84
 __author__ = 'amuls'
 
 
-def parse_glab_info(glab_info: str, logger: logging.Logger) -> dict:
+# precompiled patterns used on the INFO lines
+re_spaces = re.compile(r'\s\s+')
+re_meas = re.compile(r'[A-Z]\d\d-\d\d')
+
+
+def info_prefix(line: str) -> str:
+    """
+    info_prefix returns the first two words of an INFO line (eg 'INFO PREPROCESSING') used as dispatch key
+    """
+    return ' '.join(line.split(None, 2)[:2])
+
+
+def build_info_dispatch(dParse: dict) -> dict:
+    """
+    build_info_dispatch creates from the INFO patterns in dParse (cfr glc.dgLab['parse']) a dispatch map
+    from the first two words of the pattern to the list of (section, key, pattern) starting with these words
+    """
+    dDispatch = {}
+    for section, dPatterns in dParse.items():
+        # the summary is a single pattern instead of a dict of patterns
+        for key, val in (dPatterns.items() if isinstance(dPatterns, dict) else [(section, dPatterns)]):
+            dDispatch.setdefault(info_prefix(val), []).append((section, key, val))
+
+    return dDispatch
+
+
+# dispatch map for the INFO sections we want to parse
+dinfo_dispatch = build_info_dispatch(dParse=glc.dgLab['parse'])
+
+
+def collect_glab_info_lines(glab_lines: list, dDispatch: dict = dinfo_dispatch) -> dict:
+    """
+    collect_glab_info_lines walks once over the INFO lines and returns per section and key the lines
+    containing the corresponding pattern
+    """
+    dLines = {section: {} for section, _, _ in (item for items in dDispatch.values() for item in items)}
+
+    for line in glab_lines:
+        for section, key, val in dDispatch.get(info_prefix(line), ()):
+            if val in line:
+                dLines[section].setdefault(key, []).append(line)
+
+    return dLines
+
+
+def parse_glab_info(glab_info: io.BytesIO, logger: logging.Logger) -> dict:
     """
     parse_glab_info parses the INFO section from gLAB out file
     """
     cFuncName = colored(os.path.basename(__file__), 'yellow') + ' - ' + colored(sys._getframe().f_code.co_name, 'green')
 
-    logger.info('{func:s}: Parsing gLab INFO section {file:s} ({info:s})'.format(func=cFuncName, file=glab_info.name, info=colored('be patient', 'red')))
+    logger.info('{func:s}: Parsing gLab INFO section'.format(func=cFuncName))
 
-    # read in all lines from gLAB INFO output
-    with open(glab_info.name) as fh:
-        glab_info_lines = [line.rstrip() for line in fh]  # fh.readlines()  # [line.rstrip() for line in fh]
+    # read in all lines from gLAB INFO output and collect in a single scan the lines per section
+    glab_info_lines = [line.rstrip() for line in glab_info.getvalue().decode(errors='replace').splitlines()]
+    dinfo_lines = collect_glab_info_lines(glab_lines=glab_info_lines)
 
     # create a dictionary for storing/returning the information
     dInfo = {}
 
     # get the info about the input files (cfr glc.dgLab['parse']['files'])
-    dInfo['files'] = parse_glab_info_files(glab_lines=glab_info_lines, dFiles=glc.dgLab['parse']['files'])
+    dInfo['files'] = parse_glab_info_files(dLines=dinfo_lines['files'])
     # get the receiver information
-    dInfo['rx'] = parse_glab_info_rx(glab_lines=glab_info_lines, dRx=glc.dgLab['parse']['rx'])
+    dInfo['rx'] = parse_glab_info_rx(dLines=dinfo_lines['rx'])
 
     # get the preprocessing output
-    dInfo['pp'] = parse_glab_info_preprocessing(glab_lines=glab_info_lines, dPP=glc.dgLab['parse']['pp'])
+    dInfo['pp'] = parse_glab_info_preprocessing(dLines=dinfo_lines['pp'])
 
     # get info about th eModelling
-    dInfo['model'] = parse_glab_info_model(glab_lines=glab_info_lines, dModel=glc.dgLab['parse']['model'])
+    dInfo['model'] = parse_glab_info_model(dLines=dinfo_lines['model'])
 
     # get info about gLABs Filter
-    dInfo['filter'], marker, dInfo['rx']['gnss'] = parse_glab_info_filter(glab_lines=glab_info_lines, dFilter=glc.dgLab['parse']['filter'])
+    dInfo['filter'], marker, dInfo['rx']['gnss'] = parse_glab_info_filter(dLines=dinfo_lines['filter'])
 
     if dInfo['rx']['marker'] != 'GPRS':
         dInfo['rx']['marker'] = marker
 
     # get info about th summary
-    dInfo['summary'] = parse_glab_info_summary(glab_lines=glab_info_lines, dSummary=glc.dgLab['parse']['summary'])
+    dInfo['summary'] = parse_glab_info_summary(summary_line=dinfo_lines['summary']['summary'][0])
 
     # report
     logger.info('{func:s}: Information summary =\n{json!s}'.format(func=cFuncName, json=json.dumps(dInfo, sort_keys=False, indent=4, default=amutils.DT_convertor)))
@@ -58,17 +104,22 @@ def parse_glab_info(glab_info: str, logger: logging.Logger) -> dict:
     return dInfo
 
 
-def parse_glab_info_files(glab_lines: list, dFiles: dict) -> dict:
+def info_value(line: str) -> str:
+    """
+    info_value returns the information behind the colon ":" of an INFO line with multiple spaces reduced to one
+    """
+    return re_spaces.sub(' ', line.partition(':')[-1].strip())
+
+
+def parse_glab_info_files(dLines: dict) -> dict:
     """
     parse_glab_info_files parses the lines containg info about the input files
     """
     # get the info about the input files (cfr glc.dgLab['parse']['files'])
     dfile_info = {}
-    for key, val in dFiles.items():
-        line = [x for x in glab_lines if x.startswith(val)][0]
-
+    for key in glc.dgLab['parse']['files']:
         # usefull file information is behind the colon ":"
-        file_info = line.partition(':')[-1].strip()
+        file_info = dLines[key][0].partition(':')[-1].strip()
 
         # store the info for corresponding key
         dfile_info[key] = [os.path.basename(fname) for fname in file_info.split(' ')]
@@ -76,51 +127,46 @@ def parse_glab_info_files(glab_lines: list, dFiles: dict) -> dict:
     return dfile_info
 
 
-def parse_glab_info_rx(glab_lines: list, dRx: dict) -> dict:
+def parse_glab_info_rx(dLines: dict) -> dict:
     """
     parse_glab_info_ex parses the lines containg info about the receiver
     """
     # get the info about the receiver(cfr glc.dgLab['parse']['rx'])
-    drx_info = {}
-    for key, val in dRx.items():
-        line = [x for x in glab_lines if x.startswith(val)][0]
-
-
-        # usefull file information is behind the colon ":"
-        drx_info[key] = re.sub("\\s\\s+", " ", line.partition(':')[-1].strip())
+    drx_info = {key: info_value(dLines[key][0]) for key in glc.dgLab['parse']['rx']}
 
     # return the info about the receiver
     return drx_info
 
 
-def parse_glab_info_preprocessing(glab_lines: list, dPP: dict) -> dict:
+def freqs_order(line: str) -> Tuple[str, str]:
+    """
+    freqs_order returns the available frequencies (between first/last symbol "|") and the satellites they apply to
+    """
+    first_occ = line.find('|')
+    last_occ = line.rfind('|')
+
+    return line[first_occ - 1: last_occ + 2], line[last_occ + 2:].strip()
+
+
+def parse_glab_info_preprocessing(dLines: dict) -> dict:
     """
     parse_glab_info_preprocessing parses the lines containg info about the preprocessing
     """
     # get the info about the PP(cfr glc.dgLab['parse']['pp'])
     dpp_info = {}
-    for key, val in dPP.items():
-        # create subset of glab_lines for this key
-        val_lines = [line for line in glab_lines if val in line and 'No' not in line]
+    for key in glc.dgLab['parse']['pp']:
+        # subset of the INFO lines for this key
+        val_lines = [line for line in dLines.get(key, []) if 'No' not in line]
 
         if len(val_lines) == 1:
             line = val_lines[0]
 
             if ':' in line:
                 # usefull file information is behind the colon ":"
-                dpp_info[key] = re.sub("\\s\\s+", " ", line.partition(':')[-1].strip())
-            else:
-                if key == 'freqs_order':
-                    dpp_info[key] = {}
-
-                    # find fisrt/last occurences of the symbol "|"
-                    first_occ = line.find('|')
-                    last_occ = line.rfind('|')
-
-                    freqs_avail = line[first_occ - 1: last_occ + 2]
-                    freqs_svs = line[last_occ + 2:].strip()
-
-                    dpp_info[key][freqs_avail] = freqs_svs
+                dpp_info[key] = info_value(line)
+            elif key == 'freqs_order':
+                freqs_avail, freqs_svs = freqs_order(line)
+                dpp_info[key] = {freqs_avail: freqs_svs}
 
             # treat the ECEF coordinates
             if key == 'rx_ecef':
@@ -135,131 +181,84 @@ def parse_glab_info_preprocessing(glab_lines: list, dPP: dict) -> dict:
             if key == 'freqs':
                 for gnss_line in val_lines:
                     GNSS = gnss_line[gnss_line.find('[') + 1: gnss_line.find(']')]
-                    GNSS_freqs = re.sub("\\s\\s+", " ", gnss_line.partition(':')[-1].strip())
-
-                    dpp_info[key][GNSS] = GNSS_freqs
+                    dpp_info[key][GNSS] = info_value(gnss_line)
 
             elif key == 'freqs_order':
                 for freq_line in val_lines:
-                    # find fisrt/last occurences of the symbol "|"
-                    first_occ = freq_line.find('|')
-                    last_occ = freq_line.rfind('|')
-
-                    freqs_avail = freq_line[first_occ - 1: last_occ + 2]
-                    freqs_svs = freq_line[last_occ + 2:].strip()
-
+                    freqs_avail, freqs_svs = freqs_order(freq_line)
                     dpp_info[key][freqs_avail] = freqs_svs
 
     # return the preprocessing info
     return dpp_info
 
 
-def parse_glab_info_model(glab_lines: list, dModel: dict) -> dict:
+def parse_glab_info_model(dLines: dict) -> dict:
     """
     parse_glab_info_model parses the lines containg info about the modelling
     """
-    # get the info about the PP(cfr glc.dgLab['parse']['pp'])
+    # get the info about the modelling (cfr glc.dgLab['parse']['model'])
     dmodel_info = {}
-    for key, val in dModel.items():
-        # create subset of glab_lines for this key
-        val_lines = [line for line in glab_lines if val in line]
+    for key in glc.dgLab['parse']['model']:
+        val_lines = dLines.get(key, [])
 
         if len(val_lines) == 1:
             # usefull file information is behind the colon ":"
-            dmodel_info[key] = re.sub("\\s\\s+", " ", val_lines[0].partition(':')[-1].strip())
-
-        else:
-            if key == 'tropo':
-                # combine all into 1 value
-                tropo_info = ''
-                for line in val_lines:
-                    tropo_info += re.sub("\\s\\s+", " ", line.partition(':')[-1].strip()) + ' '
-                dmodel_info[key] = tropo_info.strip()
+            dmodel_info[key] = info_value(val_lines[0])
+        elif key == 'tropo':
+            # combine all into 1 value
+            dmodel_info[key] = ' '.join(info_value(line) for line in val_lines).strip()
 
     return dmodel_info
 
 
-def parse_glab_info_filter(glab_lines: list, dFilter: dict) -> Tuple[dict, str, str]:
+def parse_glab_info_filter(dLines: dict) -> Tuple[dict, str, str]:
     """
     parse_glab_info_filter parses the lines containg info about the Filterling
     """
-    # get the info about the PP(cfr glc.dgLab['parse']['pp'])
+    # get the info about the filter (cfr glc.dgLab['parse']['filter'])
     dFilter_info = {}
-    for key, val in dFilter.items():
-        # create subset of glab_lines for this key
-        val_lines = [line for line in glab_lines if val in line]
-
+    for key in glc.dgLab['parse']['filter']:
+        val_lines = dLines.get(key, [])
 
         if len(val_lines) == 1:
             line = val_lines[0]
 
             if ':' in line:
                 # usefull file information is behind the colon ":"
-                dFilter_info[key] = re.sub("\\s\\s+", " ", line.partition(':')[-1].strip())
+                dFilter_info[key] = info_value(line)
 
             if key == 'meas':
-                # split the found FILTER info on spaces
+                # the systems used are determined from the measurement info (eg G01-32)
+                dFilter_info['gnss'] = ''.join(info[0] for info in dFilter_info[key].split(' ') if re_meas.match(info))
 
-                syst_meas = dFilter_info[key].split(' ')
+        elif key == 'meas':  # more than 1 line for the measurements
+            dFilter_info[key] = ', '.join(info_value(line) for line in val_lines if ':' in line)
+            dFilter_info['gnss'] = ''
 
-                # regex for checking the systems we have
-                re_meas = r'[A-Z]\d\d-\d\d'
-
-                dFilter_info['gnss'] = ''
-                for info in syst_meas:
-                    if re.match(re_meas, info):
+            for line in val_lines:
+                for info in line.split(' '):
+                    if re_meas.match(info) and info[0] not in dFilter_info['gnss']:
                         dFilter_info['gnss'] += info[0]
 
-
-        else:  # more than 1 element in 'val_lines'
-            if key == 'meas':
-                dFilter_info[key] = ''
-                dFilter_info['gnss'] = ''
-                # regex for checking the systems we have
-                re_meas = r'[A-Z]\d\d-\d\d'
-
-                for line in val_lines:
-                    if ':' in line:
-                        if len(dFilter_info[key]) > 0:
-                            dFilter_info[key] += ', '
-                        # usefull file information is behind the colon ":"
-                        dFilter_info[key] += re.sub("\\s\\s+", " ", line.partition(':')[-1].strip())
-
-                    syst_meas = line.split(' ')
-                    for info in syst_meas:
-                        if re.match(re_meas, info) and info[0] not in dFilter_info['gnss']:
-                            dFilter_info['gnss'] += info[0]
-
-
     # lookup corresponding MARKER name and GNSS
     marker = glc.dgLab['GNSS'][dFilter_info['gnss']]['marker']
     gnss = glc.dgLab['GNSS'][dFilter_info['gnss']]['gnss']
 
-
     return dFilter_info, marker, gnss
 
 
-def parse_glab_info_summary(glab_lines: list, dSummary: dict) -> dict:
+def parse_glab_info_summary(summary_line: str) -> dict:
     """
-    parse_glab_info_summary parses the lines containg info about the Filterling
+    parse_glab_info_summary parses the summary line (starting with glc.dgLab['parse']['summary'])
     """
-    # get the info about the PP(cfr glc.dgLab['parse']['pp'])
-    dSummary_info = {}
-
-    summary_line = [line for line in glab_lines if dSummary in line][0]
     posn_colon = summary_line.find('Lon:')
-    info_line = summary_line[posn_colon:]
-
-    list_tmp = info_line.split()[::2]
-    list_of_keys = [key.strip(':') for key in list_tmp]
-    list_of_str_values = info_line.split()[1::2]
+    info_line = summary_line[posn_colon:].split()
 
-    list_of_values = [RepresentsNumber(value) for value in list_of_str_values]
+    list_of_keys = [key.strip(':') for key in info_line[::2]]
+    list_of_values = [RepresentsNumber(value) for value in info_line[1::2]]
 
     # create dictionary of key:values
-    dSummary_info = dict(zip(list_of_keys, list_of_values))
-
-    return dSummary_info
+    return dict(zip(list_of_keys, list_of_values))
 
 
 def RepresentsNumber(s: str):
@@ -3,7 +3,8 @@ from termcolor import colored
 import sys
 import os
 import logging
-import tempfile
+import io
+import time
 import datetime as dt
 from datetime import datetime
 import numpy as np
@@ -23,23 +24,45 @@ def make_datetime(year: int, doy: int, t: datetime.time) -> dt.datetime:
     return dt.datetime.strptime('{!s} {!s} {!s}'.format(year, doy, t.strftime('%H:%M:%S')), '%Y %j %H:%M:%S')
 
 
-def parse_glab_output(glab_output: tempfile._TemporaryFileWrapper, logger: logging.Logger) -> pd.DataFrame:
+def sod_from_time(times: np.ndarray) -> np.ndarray:
+    """
+    sod_from_time converts the time strings HH:MM:SS.fff to seconds of day by slicing the characters
+    """
+    naTimes = np.asarray(times, dtype='S')
+    naChars = naTimes.view('S1').reshape(-1, naTimes.dtype.itemsize)
+
+    hours = np.ascontiguousarray(naChars[:, 0:2]).view('S2').ravel().astype(np.int64)
+    minutes = np.ascontiguousarray(naChars[:, 3:5]).view('S2').ravel().astype(np.int64)
+    seconds = np.ascontiguousarray(naChars[:, 6:]).view('S{:d}'.format(naTimes.dtype.itemsize - 6)).ravel().astype(np.float64)
+
+    return hours * 3600 + minutes * 60 + seconds
+
+
+def glab_datetime(year: np.ndarray, doy: np.ndarray, sod: np.ndarray) -> np.ndarray:
+    """
+    glab_datetime converts the Year, DoY and seconds of day of gLAB messages to datetime64[ns]
+    """
+    day = (np.asarray(year, dtype=np.int64) - 1970).astype('datetime64[Y]').astype('datetime64[D]') + (np.asarray(doy, dtype=np.int64) - 1).astype('timedelta64[D]')
+
+    return day.astype('datetime64[ns]') + np.round(np.asarray(sod, dtype=np.float64) * 1e6).astype(np.int64).astype('timedelta64[us]')
+
+
+def parse_glab_output(glab_output: io.BytesIO, logger: logging.Logger) -> pd.DataFrame:
     """
     parse_glab_output parses the OUTPUT section of the glab out file
     """
     cFuncName = colored(os.path.basename(__file__), 'yellow') + ' - ' + colored(sys._getframe().f_code.co_name, 'green')
 
-    logger.info('{func:s}: Parsing gLab OUTPUT section {file:s} ({info:s})'.format(func=cFuncName, file=glab_output.name, info=colored('be patient', 'red')))
+    logger.info('{func:s}: Parsing gLab OUTPUT section {file:s} ({info:s})'.format(func=cFuncName, file=amc.dRTK['glab_out'], info=colored('be patient', 'red')))
 
     # read gLABs OUTPUT into dataframe (cropping cartesian colmuns)
-    df_output = pd.read_csv(glab_output.name, header=None, delim_whitespace=True, usecols=[*range(1, 11), *range(20, len(glc.dgLab['OUTPUT']['columns']))])
+    df_output = pd.read_csv(glab_output, header=None, delim_whitespace=True, usecols=[*range(1, 11), *range(20, len(glc.dgLab['OUTPUT']['columns']))])
 
     # name the colmuns
     df_output.columns = glc.dgLab['OUTPUT']['use_cols']
 
-    # tranform time column to python datetime.time and add a DT column
-    df_output['Time'] = df_output['Time'].apply(lambda x: dt.datetime.strptime(x, '%H:%M:%S.%f').time())
-    df_output['DT'] = df_output.apply(lambda x: make_datetime(x['Year'], x['DoY'], x['Time']), axis=1)
+    # add a DT column from the day (Year, DoY) and the time of day (HH:MM:SS.fff)
+    df_output['DT'] = glab_datetime(year=df_output['Year'].to_numpy(), doy=df_output['DoY'].to_numpy(), sod=sod_from_time(df_output['Time'].to_numpy()))
 
     # find gaps in the data by comparing to mean value of difference in time
     df_output['dt_diff'] = df_output['DT'].diff(1)
@@ -56,3 +79,28 @@ def parse_glab_output(glab_output: tempfile._TemporaryFileWrapper, logger: loggi
     amutils.printHeadTailDataFrame(df=df_output, name='OUTPUT section of {name:s}'.format(name=amc.dRTK['glab_out']), index=False)
 
     return df_output
+
+
+def test_glab_datetime():
+    """test and time the vectorized DT construction against the row-wise one for a full day at 1 Hz"""
+    nr_epochs = 86400
+    df = pd.DataFrame({'Year': np.full(nr_epochs, 2019), 'DoY': np.full(nr_epochs, 134)})
+    df['Time'] = ['{:02d}:{:02d}:{:02d}.000'.format(sod // 3600, (sod % 3600) // 60, sod % 60) for sod in range(nr_epochs)]
+
+    tStart = time.perf_counter()
+    dsTime = df['Time'].apply(lambda x: dt.datetime.strptime(x, '%H:%M:%S.%f').time())
+    dsDT = pd.concat([df[['Year', 'DoY']], dsTime], axis=1).apply(lambda x: make_datetime(x['Year'], x['DoY'], x['Time']), axis=1)
+    tRowWise = time.perf_counter() - tStart
+
+    tStart = time.perf_counter()
+    naDT = glab_datetime(year=df['Year'].to_numpy(), doy=df['DoY'].to_numpy(), sod=sod_from_time(df['Time'].to_numpy()))
+    tVector = time.perf_counter() - tStart
+
+    print('row-wise strptime (%d epochs): %8.4f s' % (nr_epochs, tRowWise))
+    print('vectorized        (%d epochs): %8.4f s  speedup x%.0f' % (nr_epochs, tVector, tRowWise / tVector))
+    print('identical results: ', np.array_equal(dsDT.to_numpy(dtype='datetime64[ns]'), naDT))
+    print('12:34:56.789 of 2020 DoY 366: ', glab_datetime(year=[2020], doy=[366], sod=sod_from_time(['12:34:56.789']))[0])
+
+
+if __name__ == "__main__":  # time the DT construction
+    test_glab_datetime()
@@ -0,0 +1,166 @@
+import pandas as pd
+from termcolor import colored
+import sys
+import os
+import io
+import logging
+import numpy as np
+
+from ampyutils import amutils
+from glab import glab_constants as glc
+from glab import glab_split_outfile, glab_parser_output
+
+__author__ = 'amuls'
+
+
+def count_fields(chunk: bytes) -> int:
+    """
+    count_fields returns the maximum number of whitespace separated fields of the lines in chunk
+    """
+    naChunk = np.frombuffer(chunk, dtype=np.uint8)
+    is_space = (naChunk == ord(' ')) | (naChunk == ord('\t')) | (naChunk == ord('\n')) | (naChunk == ord('\r'))
+
+    # a field starts at a non-space character preceded by a space (or at the start of the chunk)
+    field_start = ~is_space
+    field_start[1:] &= is_space[:-1]
+    line_nr = np.cumsum(naChunk == ord('\n'))
+
+    return int(np.bincount(line_nr[field_start]).max()) if field_start.any() else 0
+
+
+def read_glab_chunk(chunk: bytes, glab_msg: str, extra: str = None) -> pd.DataFrame:
+    """
+    read_glab_chunk reads the lines of message glab_msg in chunk into a typed dataframe. The fields beyond the
+    columns of glc.dgLab[glab_msg] are kept as columns extra0, extra1, ... when extra is given, else dropped.
+    The message name and time string are replaced by the DT column
+    """
+    columns = glc.dgLab[glab_msg]['columns']
+    nr_extra = max(count_fields(chunk) - len(columns), 0)
+    names = columns + ['{extra:s}{nr:d}'.format(extra=extra or 'extra', nr=i) for i in range(nr_extra)]
+    use_cols = [col for col in names[1:len(columns) if extra is None else None] if col != 'Time']
+
+    dtypes = dict(glc.dgLab[glab_msg]['dtypes'])
+    dtypes['GNSS'] = pd.CategoricalDtype(glc.dgLab['gnss_systems'])
+
+    df = pd.read_csv(io.BytesIO(chunk), header=None, names=names, usecols=use_cols, delim_whitespace=True, dtype={col: dtype for col, dtype in dtypes.items() if col in use_cols})
+    df.insert(0, 'DT', glab_parser_output.glab_datetime(df['Year'].to_numpy(), df['DoY'].to_numpy(), df['sod'].to_numpy()))
+
+    return df
+
+
+def parse_glab_satsel(chunk: bytes) -> pd.DataFrame:
+    """
+    parse_glab_satsel parses SATSEL messages, the reason for (de)selection is kept as category
+    """
+    columns = glc.dgLab['SATSEL']['columns']
+
+    # the reason is free text so split on the first fields only
+    df = pd.Series(chunk.decode(errors='replace').splitlines()).str.split(n=len(columns) - 1, expand=True)
+    df.columns = columns[:df.shape[1]]
+    df = df.drop(columns=['SATSEL', 'Time']).astype(glc.dgLab['SATSEL']['dtypes'])
+
+    df['GNSS'] = df['GNSS'].astype(pd.CategoricalDtype(glc.dgLab['gnss_systems']))
+    df['reason'] = df['reason'].astype('category') if 'reason' in df.columns else ''
+    df.insert(0, 'DT', glab_parser_output.glab_datetime(df['Year'].to_numpy(), df['DoY'].to_numpy(), df['sod'].to_numpy()))
+
+    return df
+
+
+def parse_glab_meas(chunk: bytes) -> pd.DataFrame:
+    """
+    parse_glab_meas parses MEAS messages into a long dataframe with a row per satellite and measurement
+    (columns meas and value), the measurement names are taken from the meas_list of each message
+    """
+    df = read_glab_chunk(chunk=chunk, glab_msg='MEAS', extra='value')
+    value_cols = [col for col in df.columns if col.startswith('value')]
+    head_cols = [col for col in df.columns if col not in value_cols + ['#meas', 'meas_list']]
+    naValues = df[value_cols].to_numpy(dtype=np.float64)
+
+    # distribute the values over the measurements named in meas_list (only few distinct lists are used)
+    lst_rows, lst_codes, lst_values = [], [], []
+    dmeas = {}
+    for meas_list, rows in df.groupby('meas_list', sort=False).indices.items():
+        for i, meas in enumerate(meas_list.split(':')):
+            lst_rows.append(rows)
+            lst_codes.append(np.full(len(rows), dmeas.setdefault(meas, len(dmeas)), dtype=np.int16))
+            lst_values.append(naValues[rows, i])
+
+    if not lst_rows:
+        return df[head_cols].assign(meas=pd.Categorical([]), value=np.zeros(0))
+
+    # keep the order of the messages
+    naRows = np.concatenate(lst_rows)
+    order = np.argsort(naRows, kind='stable')
+
+    df_meas = df[head_cols].iloc[naRows[order]].reset_index(drop=True)
+    df_meas['meas'] = pd.Categorical.from_codes(np.concatenate(lst_codes)[order], categories=list(dmeas))
+    df_meas['value'] = np.concatenate(lst_values)[order]
+
+    return df_meas
+
+
+def parse_glab_model(chunk: bytes) -> pd.DataFrame:
+    """
+    parse_glab_model parses MODEL messages, measurement type is kept as category
+    """
+    df = read_glab_chunk(chunk=chunk, glab_msg='MODEL')
+    df['meas'] = df['meas'].astype('category')
+
+    return df
+
+
+def parse_glab_filter(chunk: bytes) -> pd.DataFrame:
+    """
+    parse_glab_filter parses FILTER messages, the estimated parameters beyond the columns in glc are kept as param0, param1, ...
+    """
+    return read_glab_chunk(chunk=chunk, glab_msg='FILTER', extra='param')
+
+
+# parsers for the chunks of the gLAB messages
+dglab_chunk_parsers = {'SATSEL': parse_glab_satsel, 'MEAS': parse_glab_meas, 'MODEL': parse_glab_model, 'FILTER': parse_glab_filter}
+
+
+def concat_glab_chunks(lst_chunks: list) -> pd.DataFrame:
+    """
+    concat_glab_chunks concatenates the dataframes of the parsed chunks keeping the categorical columns
+    categorical (union of the categories) and converts the PRN column to a category
+    """
+    if not lst_chunks:
+        return pd.DataFrame()
+
+    for col in lst_chunks[0].select_dtypes(include='category').columns:
+        categories = pd.Index(sorted(set().union(*(df_chunk[col].cat.categories for df_chunk in lst_chunks))))
+        for df_chunk in lst_chunks:
+            if not df_chunk[col].cat.categories.equals(categories):
+                df_chunk[col] = df_chunk[col].cat.set_categories(categories)
+
+    df = pd.concat(lst_chunks, ignore_index=True, sort=False)
+    if 'PRN' in df.columns:
+        df['PRN'] = df['PRN'].astype('category')
+
+    return df
+
+
+def parse_glab_sections(msgs: tuple, glab_outfile: str, logger: logging.Logger) -> dict:
+    """
+    parse_glab_sections parses the selected SATSEL, MEAS, MODEL and/or FILTER messages while reading
+    the gLAB out file once block by block, so that multi-GB files are parsed in chunks
+    returns a dict with a dataframe per message
+    """
+    cFuncName = colored(os.path.basename(__file__), 'yellow') + ' - ' + colored(sys._getframe().f_code.co_name, 'green')
+
+    logger.info('{func:s}: parsing {msgs!s} sections of {file:s} ({info:s})'.format(msgs=list(msgs), file=glab_outfile, info=colored('be patient', 'red'), func=cFuncName))
+
+    dlst_chunks = {glab_msg: [] for glab_msg in msgs}
+    for dblock in glab_split_outfile.iter_glab_blocks(msgs=msgs, glab_outfile=glab_outfile):
+        for glab_msg, chunk in dblock.items():
+            dlst_chunks[glab_msg].append(dglab_chunk_parsers[glab_msg](chunk))
+
+    dglab_sections = {}
+    for glab_msg in msgs:
+        dglab_sections[glab_msg] = concat_glab_chunks(dlst_chunks.pop(glab_msg))
+
+        logger.info('{func:s}: {msg:s} section has {rows:d} rows using {mem:.1f} MB'.format(msg=glab_msg, rows=dglab_sections[glab_msg].shape[0], mem=dglab_sections[glab_msg].memory_usage(deep=True).sum() / 1024 / 1024, func=cFuncName))
+        amutils.logHeadTailDataFrame(logger=logger, callerName=cFuncName, df=dglab_sections[glab_msg], dfName=glab_msg)
+
+    return dglab_sections
@@ -1,39 +1,72 @@
 from termcolor import colored
 import sys
 import os
+import io
 import logging
-import tempfile
 
 __author__ = 'amuls'
 
+# size of the blocks read from the gLAB out file
+glab_block_size = 1 << 24
 
-def split_glab_outfile(msgs: str, glab_outfile: str, logger: logging.Logger) -> dict:
+
+def dispatch_glab_lines(block: bytes, dmsg_lines: dict) -> dict:
     """
-    splitStatusFile splits the statistics file into the POS, SAT, CLK & VELACC parts
+    dispatch_glab_lines distributes the complete lines of block over the messages in dmsg_lines (keyed by the
+    encoded message name) based on the first token of each line. Returns for each message found the joined lines
+    """
+    for msg_lines in dmsg_lines.values():
+        msg_lines.clear()
+
+    for line in block.split(b'\n'):
+        msg_lines = dmsg_lines.get(line.partition(b' ')[0])
+        if msg_lines is not None:
+            msg_lines.append(line)
+
+    return {msg.decode(): b'\n'.join(msg_lines) + b'\n' for msg, msg_lines in dmsg_lines.items() if msg_lines}
+
+
+def iter_glab_blocks(msgs: tuple, glab_outfile: str, block_size: int = glab_block_size):
+    """
+    iter_glab_blocks reads the gLAB out file once in binary blocks and yields per block a dict with the
+    complete lines of the selected messages (see glc.dgLab['messages']) that can be passed to pandas or NumPy
+    """
+    dmsg_lines = {msg.encode(): [] for msg in msgs}
+
+    with open(glab_outfile, 'rb') as fd:
+        remainder = b''
+        for block in iter(lambda: fd.read(block_size), b''):
+            block = remainder + block
+
+            # only dispatch complete lines, keep the partial last line for the next block
+            cut = block.rfind(b'\n') + 1
+            remainder = block[cut:]
+            if cut:
+                yield dispatch_glab_lines(block=block[:cut - 1], dmsg_lines=dmsg_lines)
+
+        if remainder:
+            yield dispatch_glab_lines(block=remainder, dmsg_lines=dmsg_lines)
+
+
+def split_glab_outfile(msgs: tuple, glab_outfile: str, logger: logging.Logger) -> dict:
+    """
+    split_glab_outfile splits the gLAB out file in a single read into the selected messages. Each message
+    part is returned as an in-memory buffer (rewound) that can be passed directly to pandas
     """
     cFuncName = colored(os.path.basename(__file__), 'yellow') + ' - ' + colored(sys._getframe().f_code.co_name, 'green')
 
-    logger.info('{func:s}: splitting gLABs out file {statf:s} ({info:s})'.format(func=cFuncName, statf=colored(glab_outfile, 'yellow'), info=colored('be patient', 'red')))
+    logger.info('{func:s}: splitting gLABs out file {statf:s} into {msgs!s}'.format(func=cFuncName, statf=colored(glab_outfile, 'yellow'), msgs=list(msgs)))
+
+    dglab_msgs = {glab_msg: io.BytesIO() for glab_msg in msgs}
+
+    for dblock in iter_glab_blocks(msgs=msgs, glab_outfile=glab_outfile):
+        for glab_msg, msg_lines in dblock.items():
+            dglab_msgs[glab_msg].write(msg_lines)
 
-    # create the temporary files needed for this parsing
-    dtmp_fnames = {}
-    dtmp_fds = {}
-    for glab_msg in msgs:
-        dtmp_fnames[glab_msg] = tempfile.NamedTemporaryFile(prefix='{:s}_'.format(glab_outfile), suffix='_{:s}'.format(glab_msg), delete=True)
-        dtmp_fds[glab_msg] = open(dtmp_fnames[glab_msg].name, 'w')
-
-    # open gLABng '*.out' file for reading and start processing its lines parsing the selected messages
-    with open(glab_outfile, 'r') as fd:
-        line = fd.readline()
-        while line:
-            for glab_msg in msgs:
-                if line.startswith(glab_msg):
-                    dtmp_fds[glab_msg].write(line)
-            line = fd.readline()
-
-    # close the opened files
     for glab_msg in msgs:
-        dtmp_fds[glab_msg].close()
+        logger.info('{func:s}: size of {msg:s} part = {size:d}'.format(size=dglab_msgs[glab_msg].tell(), msg=glab_msg, func=cFuncName))
+        # reset at start of buffer
+        dglab_msgs[glab_msg].seek(0)
 
-        # return the dict with the temporary filenames created
-    return dtmp_fnames
+    # return the dict with the in-memory buffers created
+    return dglab_msgs
@@ -11,6 +11,7 @@ from typing import Tuple
 from ampyutils import amutils
 from glab import glab_constants as glc
 from GNSS import wgs84
+from stats import enu_statistics as enu_stat
 
 __author__ = 'amuls'
 
@@ -88,39 +89,10 @@ def statistics_dopbin(df_dop_enu: pd.DataFrame, logger: logging.Logger) -> dict:
 
     logger.info('{func:s}: calculating statistics of xDOP'.format(func=cFuncName))
 
-    dStats_dop = {}
-
     amutils.printHeadTailDataFrame(df=df_dop_enu, name='df_dop_enu')
 
-    # go over all PDOP bins and plot according to the markersBin defined
-    for i in range(len(glc.dop_bins) - 1):
-        bin_PDOP = 'bin{:d}-{:.0f}'.format(glc.dop_bins[i], glc.dop_bins[i + 1])
-        logger.debug('{func:s}: bin_PDOP = {bin!s}'.format(bin=bin_PDOP, func=cFuncName))
-
-        # create the dict for this PDOP interval
-        dStats_dop[bin_PDOP] = {}
-
-        # find the indices within this bin
-        index4Bin = (df_dop_enu['PDOP'] > glc.dop_bins[i]) & (df_dop_enu['PDOP'] <= glc.dop_bins[i + 1])
-
-        dStats_dop[bin_PDOP]['perc'] = index4Bin.mean()
-        dStats_dop[bin_PDOP]['count'] = int(index4Bin.count() * index4Bin.mean())
-
-        for dENU, sdENU in zip(glc.dgLab['OUTPUT']['dENU'], glc.dgLab['OUTPUT']['sdENU']):
-            dENU_stats = {}
-
-            dENU_stats['wavg'] = amutils.wavg(df_dop_enu.loc[index4Bin], dENU, sdENU)
-            dENU_stats['sdwavg'] = amutils.stddev(df_dop_enu.loc[index4Bin, dENU], dENU_stats['wavg'])
-            dENU_stats['mean'] = df_dop_enu.loc[index4Bin, dENU].mean()
-            dENU_stats['median'] = df_dop_enu.loc[index4Bin, dENU].median()
-            dENU_stats['std'] = df_dop_enu.loc[index4Bin, dENU].std()
-            dENU_stats['min'] = df_dop_enu.loc[index4Bin, dENU].min()
-            dENU_stats['max'] = df_dop_enu.loc[index4Bin, dENU].max()
-
-            # add for this crd dENU
-            dStats_dop[bin_PDOP][dENU] = dENU_stats
-
-            logger.debug('{func:s}: in {bin:s} statistics for {crd:s} are {stat!s}'.format(func=cFuncName, bin=bin_PDOP, crd=dENU, stat=dENU_stats))
+    # statistics of the ENU coordinates for all PDOP bins
+    dStats_dop, _ = enu_stat.dopbin_statistics(df=df_dop_enu, crds=glc.dgLab['OUTPUT']['dENU'], sdcrds=glc.dgLab['OUTPUT']['sdENU'], dop_bins=glc.dop_bins, logger=logger)
 
     # report to the user
     logger.info('{func:s}: dStats_dop =\n{json!s}'.format(func=cFuncName, json=json.dumps(dStats_dop, sort_keys=False, indent=4, default=amutils.DT_convertor)))
@@ -2,86 +2,234 @@ import sys
 import os
 from termcolor import colored
 import logging
-from tempfile import mkstemp
-from shutil import move, copymode
+import sqlite3
+import tempfile
+import time
+import random
+import argparse
+import multiprocessing
+from contextlib import contextmanager
+from shutil import copymode
 
 __author__ = 'amuls'
 
+# table containing per day/gnss/marker/signals (line_id) and coordinate (crd) the statistics line
+db_table = 'glab_stats'
+# table containing the gLAB out files already indexed (bulk indexing)
+db_files_table = 'glab_files'
 
-def open_database(db_name: str, logger: logging.Logger):
+# waiting for locks held by other processes: sqlite busy timeout (s) and retries with exponential backoff (s)
+db_timeout = 30.
+db_retries = 8
+db_backoff = 0.1
+
+
+def db_store_name(db_name: str) -> str:
+    """
+    db_store_name returns the name of the SQLite store belonging to the CSV database db_name
+    """
+    return os.path.splitext(db_name)[0] + '.sqlite'
+
+
+def open_database(db_name: str, logger: logging.Logger) -> sqlite3.Connection:
+    """
+    open_database opens (or creates) the SQLite store for the statistics belonging to the CSV database db_name.
+    The store uses write-ahead logging so that several processes can update it at the same time.
+    When the store is created, the lines of an existing CSV database are imported
+    """
+    cFuncName = colored(os.path.basename(__file__), 'yellow') + ' - ' + colored(sys._getframe().f_code.co_name, 'green')
+
+    db_store = db_store_name(db_name)
+    logger.info('{func:s}: Creating / Opening database {file:s}'.format(func=cFuncName, file=colored(db_store, 'green')))
+
+    # transactions are started explicitly (see immediate_transaction)
+    db_conn = sqlite3.connect(db_store, timeout=db_timeout, isolation_level=None)
+    db_retry(lambda: db_conn.execute('PRAGMA journal_mode=WAL'), logger=logger)
+
+    def create_table():
+        with immediate_transaction(db_conn):
+            db_conn.execute('CREATE TABLE IF NOT EXISTS {table:s} (line_id TEXT NOT NULL, crd TEXT NOT NULL, info_line TEXT NOT NULL, PRIMARY KEY (line_id, crd))'.format(table=db_table))
+            db_conn.execute('CREATE TABLE IF NOT EXISTS {table:s} (glab_out TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime REAL NOT NULL, line_id TEXT NOT NULL)'.format(table=db_files_table))
+
+            # import the lines from the CSV database used before
+            nr_lines = db_conn.execute('SELECT COUNT(*) FROM {table:s}'.format(table=db_table)).fetchone()[0]
+            if nr_lines == 0 and os.path.isfile(db_name):
+                db_import_csv(db_conn=db_conn, db_name=db_name, logger=logger)
+
+    db_retry(create_table, logger=logger)
+
+    return db_conn
+
+
+@contextmanager
+def immediate_transaction(db_conn: sqlite3.Connection):
+    """
+    immediate_transaction takes the write lock at the start of the transaction, commits at exit or rolls back on error
+    """
+    db_conn.execute('BEGIN IMMEDIATE')
+    try:
+        yield db_conn
+    except BaseException:
+        db_conn.execute('ROLLBACK')
+        raise
+    else:
+        db_conn.execute('COMMIT')
+
+
+def db_retry(db_func, logger: logging.Logger):
+    """
+    db_retry calls db_func and retries with exponential backoff (and jitter) while the database is locked by another process
+    """
+    cFuncName = colored(os.path.basename(__file__), 'yellow') + ' - ' + colored(sys._getframe().f_code.co_name, 'green')
+
+    for retry in range(db_retries + 1):
+        try:
+            return db_func()
+        except sqlite3.OperationalError as e:
+            if retry == db_retries or ('locked' not in str(e) and 'busy' not in str(e)):
+                raise
+
+            wait = db_backoff * 2**retry * (1 + random.random())
+            logger.warning('{func:s}: database busy ({err!s}), retry in {wait:.2f} s'.format(err=e, wait=wait, func=cFuncName))
+            time.sleep(wait)
+
+
+def split_info_line(info_line: str) -> tuple:
     """
-    open_database opens (or creates the database file for storing the statistics on daily basis
+    split_info_line returns the line_id (YYYY,DOY,gnss,marker,signals) and the coordinate name of a database line
+    """
+    fields = info_line.split(',', 6)
+
+    return ','.join(fields[:5]), fields[5]
+
+
+def db_import_csv(db_conn: sqlite3.Connection, db_name: str, logger: logging.Logger):
+    """
+    db_import_csv imports the lines of the CSV database db_name into the SQLite store (within the transaction of the caller)
     """
     cFuncName = colored(os.path.basename(__file__), 'yellow') + ' - ' + colored(sys._getframe().f_code.co_name, 'green')
 
-    logger.info('{func:s}: Creating / Opening database file {file:s}'.format(func=cFuncName, file=colored(db_name, 'green')))
+    with open(db_name, 'r') as inf:
+        info_lines = [line.rstrip() for line in inf if line.count(',') >= 6]
+
+    db_conn.executemany('INSERT OR REPLACE INTO {table:s} (line_id, crd, info_line) VALUES (?, ?, ?)'.format(table=db_table), ((*split_info_line(info_line), info_line) for info_line in info_lines))
 
-    if not os.path.exists(db_name):
-        open(db_name, 'w').close()
+    logger.info('{func:s}: imported {nr:d} lines from {file:s}'.format(nr=len(info_lines), file=colored(db_name, 'green'), func=cFuncName))
 
 
-def db_update_line(db_name: str, line_id: str, info_line: str, logger: logging.Logger):
+def db_update_lines(db_conn: sqlite3.Connection, line_id: str, dinfo_lines: dict, logger: logging.Logger):
     """
-    db_update_line updates a line in the database, when the line exists it will be replaced, else it will be added
+    db_update_lines inserts or replaces in one transaction the lines for line_id, one per coordinate (key of dinfo_lines)
     """
     cFuncName = colored(os.path.basename(__file__), 'yellow') + ' - ' + colored(sys._getframe().f_code.co_name, 'green')
 
-    logger.info('{func:s}: Updating database file {file:s}'.format(func=cFuncName, file=colored(db_name, 'green')))
+    logger.info('{func:s}: Updating {nr:d} lines for {id:s}'.format(nr=len(dinfo_lines), id=colored(line_id, 'green'), func=cFuncName))
+
+    def update_lines():
+        with immediate_transaction(db_conn):
+            db_conn.executemany('INSERT OR REPLACE INTO {table:s} (line_id, crd, info_line) VALUES (?, ?, ?)'.format(table=db_table), [(line_id, crd, '{id:s},{info:s}'.format(id=line_id, info=info)) for crd, info in dinfo_lines.items()])
 
-    # update is set to false, we first search if this line is already existing
-    db_updated = False
+    db_retry(update_lines, logger=logger)
 
-    # Create temp file
-    fd, abs_path = mkstemp()
 
-    with os.fdopen(fd, 'w') as outf:
-        with open(db_name, 'r') as inf:
-            for line in inf:
-                if line.rstrip().startswith(line_id):
-                    outf.write(info_line + '\n')
-                    db_updated = True
-                else:
-                    outf.write(line)
+def db_indexed_files(db_conn: sqlite3.Connection) -> dict:
+    """
+    db_indexed_files returns for the gLAB out files already indexed their (size, mtime) at time of indexing
+    """
+    return {glab_out: (size, mtime) for glab_out, size, mtime in db_conn.execute('SELECT glab_out, size, mtime FROM {table:s}'.format(table=db_files_table))}
 
-        # if update has not happened, than add the line to the database
-        if not db_updated:
-            # print('adding info_line {:s}'.format(info_line))
-            outf.write(info_line + '\n')
 
-    # Copy the file permissions from the old file to the new file
-    copymode(db_name, abs_path)
+def db_update_batch(db_conn: sqlite3.Connection, lst_indexed: list, logger: logging.Logger):
+    """
+    db_update_batch stores in one transaction the lines of several gLAB out files. lst_indexed contains per file
+    a dict with keys glab_out, size, mtime, line_id and dinfo_lines (as for db_update_lines)
+    """
+    cFuncName = colored(os.path.basename(__file__), 'yellow') + ' - ' + colored(sys._getframe().f_code.co_name, 'green')
 
-    # Remove original file
-    os.remove(db_name)
+    logger.info('{func:s}: Updating lines of {nr:d} gLAB out files'.format(nr=len(lst_indexed), func=cFuncName))
 
-    # Move new file
-    move(abs_path, db_name)
+    def update_batch():
+        with immediate_transaction(db_conn):
+            db_conn.executemany('INSERT OR REPLACE INTO {table:s} (line_id, crd, info_line) VALUES (?, ?, ?)'.format(table=db_table), [(dindexed['line_id'], crd, '{id:s},{info:s}'.format(id=dindexed['line_id'], info=info)) for dindexed in lst_indexed for crd, info in dindexed['dinfo_lines'].items()])
+            db_conn.executemany('INSERT OR REPLACE INTO {table:s} (glab_out, size, mtime, line_id) VALUES (?, ?, ?, ?)'.format(table=db_files_table), [(dindexed['glab_out'], dindexed['size'], dindexed['mtime'], dindexed['line_id']) for dindexed in lst_indexed])
 
+    db_retry(update_batch, logger=logger)
 
-def db_sort(db_name: str, logger: logging.Logger):
+
+def db_export_csv(db_conn: sqlite3.Connection, db_name: str, logger: logging.Logger):
     """
-    db_sort sorts the database
+    db_export_csv writes the sorted lines of the store to the CSV database db_name
     """
     cFuncName = colored(os.path.basename(__file__), 'yellow') + ' - ' + colored(sys._getframe().f_code.co_name, 'green')
 
-    logger.info('{func:s}: Sorting database file {file:s}'.format(func=cFuncName, file=colored(db_name, 'green')))
+    logger.info('{func:s}: Exporting database to {file:s}'.format(func=cFuncName, file=colored(db_name, 'green')))
+
+    def export_csv():
+        # hold the write lock so that the CSV files of concurrent writers are replaced in commit order
+        with immediate_transaction(db_conn):
+            # write to a temporary file in the same directory and replace the CSV database at once
+            fd, abs_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(db_name)), suffix='.csv')
+            try:
+                with os.fdopen(fd, 'w') as outf:
+                    for (info_line, ) in db_conn.execute('SELECT info_line FROM {table:s} ORDER BY info_line'.format(table=db_table)):
+                        outf.write(info_line + '\n')
+
+                # Copy the file permissions from the old file to the new file
+                if os.path.isfile(db_name):
+                    copymode(db_name, abs_path)
+
+                os.replace(abs_path, db_name)
+            except BaseException:
+                os.remove(abs_path)
+                raise
+
+    db_retry(export_csv, logger=logger)
+
+
+def stress_worker(args: tuple) -> int:
+    """
+    stress_worker opens the database and updates and exports the lines of a day as glab_msg_output does
+    """
+    db_name, doy, nr_crds = args
+    logger = logging.getLogger('stress_worker')
+
+    db_conn = open_database(db_name=db_name, logger=logger)
+    dinfo_lines = {'crd{:02d}'.format(i): 'crd{:02d},{:+.3f}'.format(i, random.random()) for i in range(nr_crds)}
+    db_update_lines(db_conn=db_conn, line_id='2020,{:03d},E,GALI,C1C'.format(doy), dinfo_lines=dinfo_lines, logger=logger)
+    db_export_csv(db_conn=db_conn, db_name=db_name, logger=logger)
+    db_conn.close()
+
+    return doy
+
+
+def stress_test(db_name: str, nr_workers: int, nr_days: int, nr_crds: int = 10):
+    """stress test the database with nr_workers processes updating nr_days days in parallel"""
+    for db_file in (db_name, db_store_name(db_name)):
+        if os.path.exists(db_file):
+            os.remove(db_file)
 
-    # Create temp file
-    fd, abs_path = mkstemp()
+    tStart = time.perf_counter()
+    with multiprocessing.Pool(processes=nr_workers) as pool:
+        pool.map(stress_worker, [(db_name, doy, nr_crds) for doy in range(1, nr_days + 1)], chunksize=1)
+    tStress = time.perf_counter() - tStart
 
-    # sort database lines
     with open(db_name, 'r') as inf:
-        lines = inf.readlines()
-    lines.sort()
+        csv_lines = inf.readlines()
+    db_conn = sqlite3.connect(db_store_name(db_name))
+    nr_rows = db_conn.execute('SELECT COUNT(*) FROM {table:s}'.format(table=db_table)).fetchone()[0]
+    db_conn.close()
 
-    with os.fdopen(fd, 'w') as outf:
-        outf.writelines(lines)
+    print('%d workers updating %d days: %8.3f s' % (nr_workers, nr_days, tStress))
+    print('database rows: %d, CSV lines: %d, expected: %d' % (nr_rows, len(csv_lines), nr_days * nr_crds))
+    print('no lost updates: ', nr_rows == len(csv_lines) == nr_days * nr_crds and csv_lines == sorted(csv_lines))
 
-    # Copy the file permissions from the old file to the new file
-    copymode(db_name, abs_path)
 
-    # Remove original file
-    os.remove(db_name)
+if __name__ == "__main__":  # stress test with parallel writers
+    parser = argparse.ArgumentParser(description='stress test the gLAB statistics database with parallel writers')
+    parser.add_argument('-d', '--db', help='CSV database to create (default stress_db.csv in temp dir)', required=False, type=str, default=os.path.join(tempfile.gettempdir(), 'stress_db.csv'))
+    parser.add_argument('-w', '--workers', help='number of parallel writers (default 16)', required=False, type=int, default=16)
+    parser.add_argument('-n', '--days', help='number of days to update (default 366)', required=False, type=int, default=366)
+    args = parser.parse_args()
 
-    # Move new file
-    move(abs_path, db_name)
+    logging.basicConfig(level=logging.ERROR, format='%(levelname)s: %(message)s')
+    stress_test(db_name=args.db, nr_workers=args.workers, nr_days=args.days)
@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+
+import sys
+import os
+import io
+import argparse
+from termcolor import colored
+import logging
+import pathlib
+import multiprocessing
+import contextlib
+from shutil import copyfile
+
+import am_config as amc
+from glab import glab_constants as glc
+from glab import glab_split_outfile, glab_parser_output, glab_parser_info, glab_statistics, glab_updatedb
+
+__author__ = 'amuls'
+
+
+dir_default_root = os.path.join(os.path.expanduser("~"), 'RxTURP')
+db_default_name = os.path.join(os.path.expanduser("~"), 'RxTURP', 'glab_output_db.csv')
+lst_logging_choices = ['CRITICAL', 'ERROR', 'WARNING', 'INFO', 'DEBUG', 'NOTSET']
+
+# logger used by the worker processes
+worker_logger = logging.getLogger('glab_bulk_index_worker')
+
+
+class logging_action(argparse.Action):
+    def __call__(self, parser, namespace, log_actions, option_string=None):
+        for log_action in log_actions:
+            if log_action not in lst_logging_choices:
+                raise argparse.ArgumentError(self, "log_actions must be in {!s}".format(lst_logging_choices))
+        setattr(namespace, self.dest, log_actions)
+
+
+def treatCmdOpts(argv):
+    """
+    Treats the command line options
+
+    :param argv: the options
+    :type argv: list of string
+    """
+    baseName = os.path.basename(__file__)
+    amc.cBaseName = colored(baseName, 'yellow')
+
+    helpTxt = amc.cBaseName + ' (re-)indexes the statistics of all gLAB (v6) out files below a directory into the database'
+
+    # create the parser for command line arguments
+    parser = argparse.ArgumentParser(description=helpTxt)
+    parser.add_argument('-r', '--rootdir', help='Root directory searched for gLAB out files (default {:s})'.format(colored(dir_default_root, 'green')), required=False, type=str, default=dir_default_root)
+    parser.add_argument('-g', '--glob', help='pattern of gLAB out files below root directory (default {:s})'.format(colored('**/glab/*.out', 'green')), required=False, type=str, default='**/glab/*.out')
+
+    parser.add_argument('-d', '--db', help='CVS database (default {:s})'.format(colored(db_default_name, 'green')), required=False, default=db_default_name, type=str)
+
+    parser.add_argument('-w', '--workers', help='number of worker processes (default {:d})'.format(os.cpu_count()), required=False, type=int, default=os.cpu_count())
+    parser.add_argument('-b', '--batch', help='number of files stored per database transaction (default 50)', required=False, type=int, default=50)
+    parser.add_argument('-f', '--force', help='re-index files already indexed (default False)', action='store_true', required=False, default=False)
+
+    parser.add_argument('-l', '--logging', help='specify logging level console/file (two of {choices:s}, default {choice:s})'.format(choices='|'.join(lst_logging_choices), choice=colored(' '.join(lst_logging_choices[3:5]), 'green')), nargs=2, required=False, default=lst_logging_choices[3:5], action=logging_action)
+
+    # drop argv[0]
+    args = parser.parse_args(argv[1:])
+
+    # return arguments
+    return args.rootdir, args.glob, args.db, args.workers, args.batch, args.force, args.logging
+
+
+def find_glab_outfiles(dir_root: str, glob_pattern: str, dindexed: dict, force: bool, logger: logging.Logger) -> list:
+    """
+    find_glab_outfiles returns the sorted gLAB out files below dir_root which are not yet indexed or have changed
+    since (size or modification time differ), all files when force is set
+    """
+    cFuncName = colored(os.path.basename(__file__), 'yellow') + ' - ' + colored(sys._getframe().f_code.co_name, 'green')
+
+    lst_outfiles = sorted(str(path.resolve()) for path in pathlib.Path(dir_root).glob(glob_pattern) if path.is_file())
+
+    lst_todo = []
+    for glab_out in lst_outfiles:
+        stat = os.stat(glab_out)
+        if force or dindexed.get(glab_out) != (stat.st_size, stat.st_mtime):
+            lst_todo.append(glab_out)
+
+    logger.info('{func:s}: found {nr:d} gLAB out files below {root:s}, {todo:d} to index'.format(nr=len(lst_outfiles), root=colored(dir_root, 'green'), todo=len(lst_todo), func=cFuncName))
+
+    return lst_todo
+
+
+def init_worker(log_level: str):
+    """
+    init_worker sets up the logging of a worker process
+    """
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(levelname)s: %(message)s'))
+    worker_logger.addHandler(handler)
+    worker_logger.setLevel(amc.dLogLevel[log_level])
+
+
+def index_glab_outfile(glab_out: str) -> dict:
+    """
+    index_glab_outfile parses the INFO and OUTPUT messages of a gLAB out file and calculates its statistics.
+    returns a dict with the file info, the line_id and the lines for the database (or the error encountered)
+    """
+    cFuncName = colored(os.path.basename(__file__), 'yellow') + ' - ' + colored(sys._getframe().f_code.co_name, 'green')
+
+    stat = os.stat(glab_out)
+    dindexed = {'glab_out': glab_out, 'size': stat.st_size, 'mtime': stat.st_mtime}
+
+    amc.dRTK = {'glab_out': glab_out}
+
+    try:
+        # the dataframes printed by the parsers are not shown
+        with contextlib.redirect_stdout(io.StringIO()):
+            dglab_msgs = glab_split_outfile.split_glab_outfile(msgs=glc.dgLab['messages'][0:2], glab_outfile=glab_out, logger=worker_logger)
+            dinfo = glab_parser_info.parse_glab_info(glab_info=dglab_msgs['INFO'], logger=worker_logger)
+            df_output = glab_parser_output.parse_glab_output(glab_output=dglab_msgs['OUTPUT'], logger=worker_logger)
+            _, dindexed['dinfo_lines'] = glab_statistics.statistics_glab_outfile(df_outp=df_output, logger=worker_logger)
+        dindexed['line_id'] = dinfo['db_lineID']
+    except Exception as e:
+        dindexed['error'] = '{type:s}: {err!s}'.format(type=type(e).__name__, err=e)
+        worker_logger.error('{func:s}: indexing {file:s} failed ({err:s})'.format(file=colored(glab_out, 'red'), err=dindexed['error'], func=cFuncName))
+
+    return dindexed
+
+
+def main(argv) -> int:
+    """
+    glab_bulk_index indexes the statistics of the OUTPUT messages of all gLAB out files in a process pool
+    """
+    amc.cBaseName = colored(os.path.basename(__file__), 'yellow')
+    cFuncName = colored(os.path.basename(__file__), 'yellow') + ' - ' + colored(sys._getframe().f_code.co_name, 'green')
+
+    # treat command line options
+    dir_root, glob_pattern, db_cvs, nr_workers, batch_size, force, log_levels = treatCmdOpts(argv)
+
+    # create logging for better debugging
+    logger, log_name = amc.createLoggers(os.path.basename(__file__), dir=dir_root, logLevels=log_levels)
+
+    # check whether the given dir_root exist
+    if not pathlib.Path(dir_root).is_dir():
+        logger.info('{func:s}: directory {root:s} does not exist'.format(root=colored(dir_root, 'red'), func=cFuncName))
+        return amc.E_DIR_NOT_EXIST
+
+    # create the directory for the database if needed
+    pathlib.Path(db_cvs).parent.mkdir(parents=True, exist_ok=True)
+
+    # open the database and determine the files still to index (resume)
+    db_conn = glab_updatedb.open_database(db_name=db_cvs, logger=logger)
+    lst_glab_outs = find_glab_outfiles(dir_root=dir_root, glob_pattern=glob_pattern, dindexed=glab_updatedb.db_indexed_files(db_conn=db_conn), force=force, logger=logger)
+
+    # parse the files in a process pool and store the statistics in batches so that an interrupted run can be resumed
+    lst_batch = []
+    lst_failed = []
+    with multiprocessing.Pool(processes=nr_workers, initializer=init_worker, initargs=(log_levels[0], )) as pool:
+        for i, dindexed in enumerate(pool.imap_unordered(index_glab_outfile, lst_glab_outs), start=1):
+            if 'error' in dindexed:
+                lst_failed.append(dindexed['glab_out'])
+            else:
+                lst_batch.append(dindexed)
+                logger.info('{func:s}: ({i:d}/{nr:d}) indexed {file:s} as {id:s}'.format(i=i, nr=len(lst_glab_outs), file=dindexed['glab_out'], id=colored(dindexed['line_id'], 'green'), func=cFuncName))
+
+            if len(lst_batch) >= batch_size:
+                glab_updatedb.db_update_batch(db_conn=db_conn, lst_indexed=lst_batch, logger=logger)
+                lst_batch = []
+
+    if lst_batch:
+        glab_updatedb.db_update_batch(db_conn=db_conn, lst_indexed=lst_batch, logger=logger)
+
+    # export the sorted database as CSV once
+    glab_updatedb.db_export_csv(db_conn=db_conn, db_name=db_cvs, logger=logger)
+    db_conn.close()
+
+    # report to the user
+    logger.info('{func:s}: indexed {nr:d} gLAB out files, {failed:d} failed'.format(nr=len(lst_glab_outs) - len(lst_failed), failed=len(lst_failed), func=cFuncName))
+    for glab_out in lst_failed:
+        logger.warning('{func:s}: failed indexing {file:s}'.format(file=colored(glab_out, 'red'), func=cFuncName))
+
+    # copy temp log file to the database directory
+    copyfile(log_name, os.path.splitext(db_cvs)[0] + '-bulk_index.log')
+    os.remove(log_name)
+
+    return amc.E_SUCCESS if not lst_failed else amc.E_FAILURE
+
+
+if __name__ == "__main__":  # Only run if this file is called directly
+    sys.exit(main(sys.argv))
@@ -13,8 +13,9 @@ from shutil import copyfile
 import am_config as amc
 from ampyutils import amutils
 from glab import glab_constants as glc
-from glab import glab_split_outfile, glab_parser_output, glab_parser_info, glab_statistics, glab_updatedb
+from glab import glab_split_outfile, glab_parser_output, glab_parser_info, glab_parser_sections, glab_statistics, glab_updatedb, glab_follow
 from glab_plot import glab_plot_output_enu, glab_plot_output_stats
+from plot import plot_scheduler
 
 __author__ = 'amuls'
 
@@ -71,6 +72,11 @@ def treatCmdOpts(argv):
     parser.add_argument('-s', '--scale', help='display ENU plots with +/- this scale range (default 5m)', required=False, default=5, type=float, action=scale_action)
     parser.add_argument('-c', '--center', help='center ENU plots (Select from {!s})'.format('|'.join(lst_centers)), required=False, default=lst_centers[0], type=str, action=center_action)
 
+    parser.add_argument('-m', '--messages', help='parse also these gLAB messages (select from {!s})'.format('|'.join(glab_parser_sections.dglab_chunk_parsers)), nargs='+', required=False, default=[], choices=list(glab_parser_sections.dglab_chunk_parsers))
+
+    parser.add_argument('-t', '--tail', help='follow the out file while gLAB is writing it and keep running statistics (default False)', action='store_true', required=False, default=False)
+    parser.add_argument('-i', '--interval', help='interval in seconds for writing the JSON snapshot of the running statistics (default 60)', required=False, default=60., type=float)
+
     parser.add_argument('-d', '--db', help='CVS database (default {:s})'.format(colored(db_default_name, 'green')), required=False, default=db_default_name, type=str)
 
     parser.add_argument('-p', '--plots', help='displays interactive plots (default True)', action='store_true', required=False, default=False)
@@ -82,7 +88,7 @@ def treatCmdOpts(argv):
     args = parser.parse_args(argv[1:])
 
     # return arguments
-    return args.rootdir, args.file, args.scale, args.center, args.db, args.plots, args.logging
+    return args.rootdir, args.file, args.scale, args.center, args.messages, args.tail, args.interval, args.db, args.plots, args.logging
 
 
 def check_arguments(logger: logging.Logger) -> int:
@@ -149,7 +155,7 @@ def main(argv) -> bool:
     # pd.options.display.float_format = "{:,.3f}".format
 
     # treat command line options
-    dir_root, glab_out, scale_enu, center_enu, db_cvs, show_plot, log_levels = treatCmdOpts(argv)
+    dir_root, glab_out, scale_enu, center_enu, glab_sections, follow, snapshot_interval, db_cvs, show_plot, log_levels = treatCmdOpts(argv)
 
     # create logging for better debugging
     logger, log_name = amc.createLoggers(os.path.basename(__file__), dir=dir_root, logLevels=log_levels)
@@ -171,56 +177,61 @@ def main(argv) -> bool:
     if ret_val != amc.E_SUCCESS:
         sys.exit(ret_val)
 
-    # open or create the database file for storing the statistics
-    glab_updatedb.open_database(db_name=amc.dRTK['dgLABng']['db'], logger=logger)
+    # follow the out file while gLAB is running, only the running statistics are determined
+    if follow:
+        amc.dRTK['dgLABng']['stats'] = glab_follow.follow_glab_outfile(glab_outfile=amc.dRTK['glab_out'], json_out=amc.dRTK['glab_out'].split('.')[0] + '-follow.json', interval=snapshot_interval, logger=logger)
 
-    # glab_updatedb.db_update_line(db_name=amc.dRTK['dgLABng']['db'], line_id='2019,134', info_line='2019,134,new thing whole line for ', logger=logger)
+        return amc.E_SUCCESS
 
-    # split gLABs out file in parts
+    # open or create the database for storing the statistics
+    db_conn = glab_updatedb.open_database(db_name=amc.dRTK['dgLABng']['db'], logger=logger)
+
+    # split gLABs out file in parts (single read into in-memory buffers)
     glab_msgs = glc.dgLab['messages'][0:2]  # INFO & OUTPUT messages needed
-    dglab_tmpfiles = glab_split_outfile.split_glab_outfile(msgs=glab_msgs, glab_outfile=amc.dRTK['glab_out'], logger=logger)
+    dglab_msgs = glab_split_outfile.split_glab_outfile(msgs=glab_msgs, glab_outfile=amc.dRTK['glab_out'], logger=logger)
 
-    # read in the INFO messages from INFO temp file
-    amc.dRTK['INFO'] = glab_parser_info.parse_glab_info(glab_info=dglab_tmpfiles['INFO'], logger=logger)
+    # read in the INFO messages from INFO buffer
+    amc.dRTK['INFO'] = glab_parser_info.parse_glab_info(glab_info=dglab_msgs['INFO'], logger=logger)
     # write the identification to the database file for glabng output messages
     # glab_updatedb.db_update_line(db_name=amc.dRTK['dgLABng']['db'], line_id=amc.dRTK['INFO']['db_lineID'], info_line=amc.dRTK['INFO']['db_lineID'], logger=logger)
 
-    # read in the OUTPUT messages from OUTPUT temp file
-    df_output = glab_parser_output.parse_glab_output(glab_output=dglab_tmpfiles['OUTPUT'], logger=logger)
+    # read in the OUTPUT messages from OUTPUT buffer
+    df_output = glab_parser_output.parse_glab_output(glab_output=dglab_msgs['OUTPUT'], logger=logger)
     # save df_output as CSV file
     store_to_cvs(df=df_output, ext='pos', logger=logger, index=False)
 
+    # parse the requested SATSEL, MEAS, MODEL and FILTER messages (in chunks) and save them as CSV files
+    if len(glab_sections) > 0:
+        dglab_sections = glab_parser_sections.parse_glab_sections(msgs=tuple(glab_sections), glab_outfile=amc.dRTK['glab_out'], logger=logger)
+        for glab_msg, df_section in dglab_sections.items():
+            store_to_cvs(df=df_section, ext=glab_msg.lower(), logger=logger, index=False)
+
     # calculate statitics gLAB OUTPUT messages
     amc.dRTK['dgLABng']['stats'], dDB_crds = glab_statistics.statistics_glab_outfile(df_outp=df_output, logger=logger)
 
-    for key, val in dDB_crds.items():
-        glab_updatedb.db_update_line(db_name=amc.dRTK['dgLABng']['db'],
-                                     line_id='{id:s},{crd:s}'.format(id=amc.dRTK['INFO']['db_lineID'], crd=key),
-                                     info_line='{id:s},{val:s}'.format(id=amc.dRTK['INFO']['db_lineID'], val=val),
-                                     logger=logger)
+    # store the statistics per coordinate in one transaction and export the sorted database as CSV
+    glab_updatedb.db_update_lines(db_conn=db_conn, line_id=amc.dRTK['INFO']['db_lineID'], dinfo_lines=dDB_crds, logger=logger)
+    glab_updatedb.db_export_csv(db_conn=db_conn, db_name=amc.dRTK['dgLABng']['db'], logger=logger)
+    db_conn.close()
 
-    # sort the glab_output_db
-    glab_updatedb.db_sort(db_name=amc.dRTK['dgLABng']['db'], logger=logger)
-    sys.exit(2)
-
-    # plot the gLABs OUTPUT messages
+    # plot the gLABs OUTPUT messages (independent plots created in parallel)
+    lst_plots = []
     # - position ENU and PDOP plots
-    glab_plot_output_enu.plot_glab_position(dfCrd=df_output, scale=scale_enu, showplot=show_plot, logger=logger)
+    lst_plots.append(plot_scheduler.plot_task('plot_glab_position', glab_plot_output_enu.plot_glab_position, dfCrd=df_output, scale=scale_enu))
     # - scatter plot of EN per dop bind
-    glab_plot_output_enu.plot_glab_scatter(dfCrd=df_output, scale=scale_enu, center=center_enu, showplot=show_plot, logger=logger)
+    lst_plots.append(plot_scheduler.plot_task('plot_glab_scatter', glab_plot_output_enu.plot_glab_scatter, dfCrd=df_output, scale=scale_enu, center=center_enu))
     # - scatter plot of EN per dop bind (separate)
-    glab_plot_output_enu.plot_glab_scatter_bin(dfCrd=df_output, scale=scale_enu, center=center_enu, showplot=show_plot, logger=logger)
+    lst_plots.append(plot_scheduler.plot_task('plot_glab_scatter_bin', glab_plot_output_enu.plot_glab_scatter_bin, dfCrd=df_output, scale=scale_enu, center=center_enu))
     # - plot the DOP parameters
-    glab_plot_output_enu.plot_glab_xdop(dfCrd=df_output, showplot=show_plot, logger=logger)
+    lst_plots.append(plot_scheduler.plot_task('plot_glab_xdop', glab_plot_output_enu.plot_glab_xdop, dfCrd=df_output))
     # - plot the ENU box plots per DOP bin
-    glab_plot_output_stats.plot_glab_statistics(df_dopenu=df_output[glc.dgLab['OUTPUT']['XDOP'] + glc.dgLab['OUTPUT']['dENU']], scale=scale_enu, showplot=show_plot, logger=logger)
+    lst_plots.append(plot_scheduler.plot_task('plot_glab_statistics', glab_plot_output_stats.plot_glab_statistics, df_dopenu=df_output[glc.dgLab['OUTPUT']['XDOP'] + glc.dgLab['OUTPUT']['dENU']], scale=scale_enu))
+
+    dplot_times = plot_scheduler.run_plot_tasks(lst_tasks=lst_plots, logger=logger, showplot=show_plot)
 
     # report to the user
     logger.info('{func:s}: Project information =\n{json!s}'.format(func=cFuncName, json=json.dumps(amc.dRTK, sort_keys=False, indent=4, default=amutils.DT_convertor)))
 
-    # sort the glab_output_db
-    glab_updatedb.db_sort(db_name=amc.dRTK['dgLABng']['db'], logger=logger)
-
     # store the json structure
     json_out = amc.dRTK['glab_out'].split('.')[0] + '.json'
     with open(json_out, 'w') as f:
@@ -231,8 +242,12 @@ def main(argv) -> bool:
     copyfile(log_name, os.path.join(amc.dRTK['dir_root'], '{obs:s}-{prog:s}'.format(obs=amc.dRTK['glab_out'].split('.')[0], prog='output.log')))
     os.remove(log_name)
 
+    # a failing plot is reported by the exit code (after the results are saved)
+    if len(dplot_times) < len(lst_plots):
+        return amc.E_FAILURE
+
     return amc.E_SUCCESS
 
 
 if __name__ == "__main__":  # Only run if this file is called directly
-    main(sys.argv)
+    sys.exit(main(sys.argv))
@@ -10,7 +10,7 @@ import numpy as np
 
 from ampyutils import amutils
 import am_config as amc
-from plot import plot_utils
+from plot import plot_utils, plot_lod
 from glab import glab_constants as glc
 
 from pandas.plotting import register_matplotlib_converters
@@ -19,9 +19,10 @@ register_matplotlib_converters()
 __author__ = 'amuls'
 
 
-def plot_glab_position(dfCrd: pd.DataFrame, scale: float, logger: logging.Logger, showplot: bool = False):
+def plot_glab_position(dfCrd: pd.DataFrame, scale: float, logger: logging.Logger, showplot: bool = False, lod: bool = True):
     """
     plot_glab_position plots the position difference wrt to Nominal a priori position
+    lod: long time series are decimated to the pixel columns of the figure (min/max preserving)
     """
     cFuncName = colored(os.path.basename(__file__), 'yellow') + ' - ' + colored(sys._getframe().f_code.co_name, 'green')
 
@@ -58,8 +59,9 @@ def plot_glab_position(dfCrd: pd.DataFrame, scale: float, logger: logging.Logger
         rgb = mpcolors.colorConverter.to_rgb(glc.enu_colors[i])
         rgb_error = amutils.make_rgb_transparent(rgb, (1, 1, 1), 0.4)
 
-        # plot coordinate differences and error bars
-        axis.errorbar(x=dfCrd['DT'].values, y=dfCrd[crd], yerr=dfCrd[sdCrd], linestyle='none', fmt='.', ecolor=rgb_error, capthick=1, markersize=1, color=glc.enu_colors[i])
+        # plot coordinate differences and error bars (keeping per pixel column the extremes of the error bars)
+        dfPlot = plot_lod.decimate_dataframe(df=dfCrd, x_col='DT', lst_y=[dfCrd[crd] - dfCrd[sdCrd], dfCrd[crd], dfCrd[crd] + dfCrd[sdCrd]], fig=fig) if lod else dfCrd
+        axis.errorbar(x=dfPlot['DT'].values, y=dfPlot[crd], yerr=dfPlot[sdCrd], linestyle='none', fmt='.', ecolor=rgb_error, capthick=1, markersize=1, color=glc.enu_colors[i])
 
         # set dimensions of y-axis (double for UP scale)
         if crd == 'dU0':
@@ -78,7 +80,7 @@ def plot_glab_position(dfCrd: pd.DataFrame, scale: float, logger: logging.Logger
                              r'Range=[{:.2f}..{:.2f}]'.format(crd_stats['max'], crd_stats['min'])
                              ))
         # place a text box in upper left in axes coords
-        axis.text(1.01, 0.95, stat_str, transform=axis.transAxes, fontsize='small', verticalalignment='top', color=glc.enu_colors[i], weight='strong')
+        axis.text(1.01, 0.95, stat_str, transform=axis.transAxes, fontsize='small', verticalalignment='top', color=glc.enu_colors[i], weight='bold')
 
         # annotatetxt = markerAnnotation(crd, sdCrd)
         # axis.annotate(annotatetxt, xy=(1, 1), xycoords='axes fraction', xytext=(0, 0), textcoords='offset pixels', horizontalalignment='right', verticalalignment='bottom', weight='ultrabold', fontsize='large')
@@ -95,11 +97,12 @@ def plot_glab_position(dfCrd: pd.DataFrame, scale: float, logger: logging.Logger
     # axis.set_xlabel('Time [sec]', fontsize='large')
 
     # plot the number of SVs and color as function of the GNSSs used
+    dfPlot = plot_lod.decimate_dataframe(df=dfCrd, x_col='DT', lst_y=[dfCrd['#SVs'], dfCrd['PDOP']], fig=fig) if lod else dfCrd
     for (i_gnss, gnss, gnss_color) in zip([1, 1, 2], ['GAL', 'GPS', ''], ['blue', 'red', 'grey']):
         if i_gnss == 2:
-            axis.fill_between(dfCrd['DT'].values, 0, dfCrd['#SVs'], where=(dfCrd['#GNSSs'] == i_gnss), alpha=0.25, linestyle='-', linewidth=2, color=gnss_color, interpolate=False)
+            axis.fill_between(dfPlot['DT'].values, 0, dfPlot['#SVs'], where=(dfPlot['#GNSSs'] == i_gnss), alpha=0.25, linestyle='-', linewidth=2, color=gnss_color, interpolate=False)
         else:
-            axis.fill_between(dfCrd['DT'].values, 0, dfCrd['#SVs'], where=((dfCrd['#GNSSs'] == i_gnss) & (gnss == dfCrd['GNSSs'])), alpha=0.25, linestyle='-', linewidth=2, color=gnss_color, interpolate=False)
+            axis.fill_between(dfPlot['DT'].values, 0, dfPlot['#SVs'], where=((dfPlot['#GNSSs'] == i_gnss) & (gnss == dfPlot['GNSSs'])), alpha=0.25, linestyle='-', linewidth=2, color=gnss_color, interpolate=False)
 
     # plot PDOP on second y-axis
     axis_right = axis.twinx()
@@ -108,7 +111,7 @@ def plot_glab_position(dfCrd: pd.DataFrame, scale: float, logger: logging.Logger
     axis_right.set_ylabel('PDOP [-]', fontsize='large', color='darkorchid', weight='ultrabold')
 
     # plot PDOP value
-    axis_right.plot(dfCrd['DT'], dfCrd['PDOP'], linestyle='', marker='.', markersize=1, color='darkorchid', label='PDOP')
+    axis_right.plot(dfPlot['DT'], dfPlot['PDOP'], linestyle='', marker='.', markersize=1, color='darkorchid', label='PDOP')
 
     # set limits for the x-axis
     axis.set_xlim([dfCrd['DT'].iloc[0], dfCrd['DT'].iloc[-1]])
@@ -144,9 +147,10 @@ def plot_glab_position(dfCrd: pd.DataFrame, scale: float, logger: logging.Logger
     return
 
 
-def plot_glab_scatter(dfCrd: pd.DataFrame, scale: float, center: str, logger: logging.Logger, showplot: bool = False):
+def plot_glab_scatter(dfCrd: pd.DataFrame, scale: float, center: str, logger: logging.Logger, showplot: bool = False, lod: bool = True):
     """
     plot_glab_scatter plots the horizontal position difference wrt to Nominal a priori position
+    lod: PDOP bins with many points are drawn as density image
     """
     cFuncName = colored(os.path.basename(__file__), 'yellow') + ' - ' + colored(sys._getframe().f_code.co_name, 'green')
     logger.info('{func:s}: plotting EN scattering'.format(func=cFuncName))
@@ -174,7 +178,7 @@ def plot_glab_scatter(dfCrd: pd.DataFrame, scale: float, center: str, logger: lo
     # annotate with reference position
     txt_rx_posn = r'$\varphi = ${lat:.8f}, $\lambda = ${lon:.8f}'.format(lat=rx_geod[0], lon=rx_geod[1])
 
-    ax.annotate(txt_rx_posn, xy=(0, 0), xycoords='axes fraction', xytext=(0, -45), textcoords='offset pixels', horizontalalignment='left', verticalalignment='bottom', weight='strong', fontsize='medium')
+    ax.annotate(txt_rx_posn, xy=(0, 0), xycoords='axes fraction', xytext=(0, -45), textcoords='offset pixels', horizontalalignment='left', verticalalignment='bottom', weight='bold', fontsize='medium')
 
     # draw circles for distancd evaluation on plot
     if center == 'origin':
@@ -204,7 +208,11 @@ def plot_glab_scatter(dfCrd: pd.DataFrame, scale: float, center: str, logger: lo
 
         # get th epercentage of observations within this dop_bin
         bin_percentage = '{perc:.1f}'.format(perc=amc.dRTK['dgLABng']['stats']['dop_bin'][binInterval]['perc'] * 100)
-        ax.plot(dfCrd.loc[index4Bin, 'dE0'], dfCrd.loc[index4Bin, 'dN0'], label=r'{!s} $\leq$ PDOP $<$ {!s} ({:s}%)'.format(glc.dop_bins[i - 1], glc.dop_bins[i], bin_percentage), **markerBins[i - 1])
+        lblBin = r'{!s} $\leq$ PDOP $<$ {!s} ({:s}%)'.format(glc.dop_bins[i - 1], glc.dop_bins[i], bin_percentage)
+        if lod and index4Bin.sum() > plot_lod.lod_max_points:
+            plot_lod.density_image(axis=ax, x=dfCrd.loc[index4Bin, 'dE0'], y=dfCrd.loc[index4Bin, 'dN0'], extent=[wavg_E - scale, wavg_E + scale, wavg_N - scale, wavg_N + scale], marker_style=markerBins[i - 1], label=lblBin)
+        else:
+            ax.plot(dfCrd.loc[index4Bin, 'dE0'], dfCrd.loc[index4Bin, 'dN0'], label=lblBin, **markerBins[i - 1])
 
         print('i = {:d} color = {!s}'.format(i, markerBins[i]['color']))
 
@@ -234,9 +242,10 @@ def plot_glab_scatter(dfCrd: pd.DataFrame, scale: float, center: str, logger: lo
     # plt.close(fig)
 
 
-def plot_glab_scatter_bin(dfCrd: pd.DataFrame, scale: float, center: str, logger: logging.Logger, showplot: bool = False):
+def plot_glab_scatter_bin(dfCrd: pd.DataFrame, scale: float, center: str, logger: logging.Logger, showplot: bool = False, lod: bool = True):
     """
     plot_glab_scatter plots the horizontal position difference wrt to Nominal a priori position
+    lod: PDOP bins with many points are drawn as density image
     """
     cFuncName = colored(os.path.basename(__file__), 'yellow') + ' - ' + colored(sys._getframe().f_code.co_name, 'green')
     logger.info('{func:s}: plotting EN scattering'.format(func=cFuncName))
@@ -268,7 +277,7 @@ def plot_glab_scatter_bin(dfCrd: pd.DataFrame, scale: float, center: str, logger
     # annotate with reference position
     txt_rx_posn = r'$\varphi = ${lat:.8f}, $\lambda = ${lon:.8f}'.format(lat=rx_geod[0], lon=rx_geod[1])
 
-    ax[1][0].annotate(txt_rx_posn, xy=(0, 0), xycoords='axes fraction', xytext=(0, -70), textcoords='offset pixels', horizontalalignment='left', verticalalignment='bottom', weight='strong', fontsize='medium')
+    ax[1][0].annotate(txt_rx_posn, xy=(0, 0), xycoords='axes fraction', xytext=(0, -70), textcoords='offset pixels', horizontalalignment='left', verticalalignment='bottom', weight='bold', fontsize='medium')
 
     # get the marker styles
     markerBins = glc.predefined_marker_styles()
@@ -306,7 +315,11 @@ def plot_glab_scatter_bin(dfCrd: pd.DataFrame, scale: float, center: str, logger
             axis.annotate('{radius:.2f}m'.format(radius=radius), xy=(wavg_E + np.cos(np.pi / 4) * radius, wavg_N + np.sin(np.pi / 4) * radius), xytext=(wavg_E + np.cos(np.pi / 4) * radius, wavg_N + np.sin(np.pi / 4) * radius), clip_on=True, color='blue', alpha=0.4)
 
         # plot the coordinates for each bin
-        axis.plot(dfCrd.loc[index4Bin, 'dE0'], dfCrd.loc[index4Bin, 'dN0'], label=r'{!s} $\leq$ PDOP $<$ {!s} ({:s}%)'.format(glc.dop_bins[i], glc.dop_bins[i + 1], bin_percentage), **markerBins[(i)])
+        lblBin = r'{!s} $\leq$ PDOP $<$ {!s} ({:s}%)'.format(glc.dop_bins[i], glc.dop_bins[i + 1], bin_percentage)
+        if lod and index4Bin.sum() > plot_lod.lod_max_points:
+            plot_lod.density_image(axis=axis, x=dfCrd.loc[index4Bin, 'dE0'], y=dfCrd.loc[index4Bin, 'dN0'], extent=[wavg_E - scale, wavg_E + scale, wavg_N - scale, wavg_N + scale], marker_style=markerBins[i], label=lblBin)
+        else:
+            axis.plot(dfCrd.loc[index4Bin, 'dE0'], dfCrd.loc[index4Bin, 'dN0'], label=lblBin, **markerBins[(i)])
 
         # lcoation of legend
         axis.legend(loc='best', markerscale=6, fontsize='x-small')
@@ -51,8 +51,8 @@ def plot_enu_distribution(dRtk: dict, dfENUdist: pd.DataFrame, dfENUstat: pd.Dat
         axis.set_title(label=crd, color=color, fontsize='large')
 
         # annotate the plot with the statistics calculated
-        axis.annotate(r'Mean = {:.3f}'.format(dfENUstat.loc['mean', crd]), xy=(1, 1), xycoords='axes fraction', xytext=(0, -25), textcoords='offset pixels', horizontalalignment='right', verticalalignment='bottom', weight='strong', fontsize='medium')
-        axis.annotate(r'$\sigma$ = {:.3f}'.format(dfENUstat.loc['std', crd]), xy=(1, 1), xycoords='axes fraction', xytext=(0, -45), textcoords='offset pixels', horizontalalignment='right', verticalalignment='bottom', weight='strong', fontsize='medium')
+        axis.annotate(r'Mean = {:.3f}'.format(dfENUstat.loc['mean', crd]), xy=(1, 1), xycoords='axes fraction', xytext=(0, -25), textcoords='offset pixels', horizontalalignment='right', verticalalignment='bottom', weight='bold', fontsize='medium')
+        axis.annotate(r'$\sigma$ = {:.3f}'.format(dfENUstat.loc['std', crd]), xy=(1, 1), xycoords='axes fraction', xytext=(0, -45), textcoords='offset pixels', horizontalalignment='right', verticalalignment='bottom', weight='bold', fontsize='medium')
 
     # add the 3 distributions on 1 subplot for comparing
     width = .25
@@ -66,7 +66,7 @@ def plot_enu_distribution(dRtk: dict, dfENUdist: pd.DataFrame, dfENUstat: pd.Dat
     ax[0].xaxis.set_major_locator(FixedLocator(ind))
 
     # copyright this
-    ax[-1].annotate(r'$\copyright$ Alain Muls (alain.muls@mil.be)', xy=(1, 1), xycoords='axes fraction', xytext=(0, +25), textcoords='offset pixels', horizontalalignment='right', verticalalignment='bottom', weight='strong', fontsize='medium')
+    ax[-1].annotate(r'$\copyright$ Alain Muls (alain.muls@mil.be)', xy=(1, 1), xycoords='axes fraction', xytext=(0, +25), textcoords='offset pixels', horizontalalignment='right', verticalalignment='bottom', weight='bold', fontsize='medium')
 
     # save the plot in subdir png of GNSSSystem
     amutils.mkdir_p(os.path.join(dRtk['info']['dir'], 'png'))
@@ -153,8 +153,8 @@ def plot_xdop_svs(dfDops: pd.DataFrame, colors: tuple, axis, logger: logging.Log
     axRight.set_ylim([0, 15])
     axRight.set_ylabel('XDOP [-]', fontsize='large')
 
-    # plot XDOPs (last 4 columns)
-    for dop, color in zip(dfDops.columns[-4:], colors):
+    # plot XDOPs
+    for dop, color in zip(('HDOP', 'VDOP', 'PDOP', 'GDOP'), colors):
         axRight.plot(dfDops['DT'], dfDops[dop], linestyle='-', marker='.', markersize=1, color=color, label=dop)
 
     # add the legend to the plot
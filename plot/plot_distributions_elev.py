@@ -56,11 +56,9 @@ def plot_elev_distribution(dRtk: dict, df: pd.DataFrame, ds:pd.Series, obs_name:
     else:
         nrRows = int(tmpValue[0]) + 1
 
-    # get the elevation bins used
-    elev_bins = list(set([col[3:] for col in df.columns]))
-    elev_bins.sort()
+    # get the elevation bins used (in increasing order of the columns)
+    elev_bins = list(dict.fromkeys([col[3:] for col in df.columns]))
     logger.info('{func:s}: elevation bins {bins!s}'.format(bins=elev_bins, func=cFuncName))
-    logger.info('{func:s}: elevation bins sorted {bins!s}'.format(bins=elev_bins.sort(), func=cFuncName))
 
     fig, ax = plt.subplots(nrows=nrRows, ncols=nrCols, sharex=True, sharey=True, figsize=(20.0, 12.0))
     fig.suptitle('{syst:s} - {posf:s} - {date:s}: {obs:s} Statistics'.format(posf=dRtk['info']['rtkPosFile'], syst=syst_names, date=dRtk['Time']['date'], obs=obs_name), fontsize='xx-large')
@@ -103,7 +101,7 @@ def plot_elev_distribution(dRtk: dict, df: pd.DataFrame, ds:pd.Series, obs_name:
                 axis.set_xticks(idx)
                 axis.set_xticklabels(df.index.tolist(), rotation='vertical')
 
-                axis.annotate('#{:.0f} ({:.2f}%)'.format(ds[col], ds[col] / ds.sum() * 100), xy=(1, 1), xycoords='axes fraction', xytext=(0, -25), textcoords='offset pixels', horizontalalignment='right', verticalalignment='bottom', weight='strong', fontsize='large')
+                axis.annotate('#{:.0f} ({:.2f}%)'.format(ds[col], ds[col] / ds.sum() * 100), xy=(1, 1), xycoords='axes fraction', xytext=(0, -25), textcoords='offset pixels', horizontalalignment='right', verticalalignment='bottom', weight='bold', fontsize='large')
 
                 # set the title for sub-plot
                 axis.set_title(label='Elevation bin {bin:s}'.format(bin=col[3:]), fontsize='x-large')
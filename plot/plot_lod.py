@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+from matplotlib import colors as mpcolors
+
+__author__ = 'amuls'
+
+# above this number of points time series are decimated and scatter plots are drawn as density images
+lod_max_points = 20000
+
+
+def lod_columns(fig) -> int:
+    """
+    lod_columns returns the number of pixel columns of the figure
+    """
+    return int(fig.get_figwidth() * fig.dpi)
+
+
+def envelope_indices(x: np.ndarray, lst_y: list, nr_columns: int) -> np.ndarray:
+    """
+    envelope_indices returns the sorted indices of the points to draw for the time series in lst_y. Per pixel column
+    (nr_columns over the range of x) the first, last, minimum and maximum of each series is kept, so the drawn
+    envelope and the outliers are identical to drawing all points. Returns all valid indices for short series
+    """
+    x = np.asarray(x)
+    xs = (x.astype('datetime64[ns]').astype(np.int64) if np.issubdtype(x.dtype, np.datetime64) else x).astype(np.float64)
+
+    lst_idx = []
+    for y in lst_y:
+        y = np.asarray(y, dtype=np.float64)
+        idx = np.flatnonzero(~np.isnan(y) & ~np.isnan(xs))
+
+        if idx.size <= 4 * nr_columns:
+            lst_idx.append(idx)
+            continue
+
+        # pixel column of each point
+        span = xs[idx].max() - xs[idx].min()
+        col = np.minimum(((xs[idx] - xs[idx].min()) / (span if span > 0 else 1) * nr_columns).astype(np.int64), nr_columns - 1)
+
+        # sort per column on the value, so that the first / last of each column are its minimum / maximum
+        order = np.lexsort((y[idx], col))
+        starts = np.flatnonzero(np.r_[True, col[order][1:] != col[order][:-1]])
+        ends = np.r_[starts[1:], order.size] - 1
+
+        lst_idx += [idx[order[starts]], idx[order[ends]], np.minimum.reduceat(idx[order], starts), np.maximum.reduceat(idx[order], starts)]
+
+    return np.unique(np.concatenate(lst_idx)) if lst_idx else np.zeros(0, dtype=np.int64)
+
+
+def decimate_dataframe(df: pd.DataFrame, x_col: str, lst_y: list, fig) -> pd.DataFrame:
+    """
+    decimate_dataframe returns the rows of df needed to draw the time series lst_y vs x_col in the pixel columns
+    of fig (see envelope_indices), df itself when it has at most lod_max_points rows
+    """
+    if df.shape[0] <= lod_max_points:
+        return df
+
+    return df.iloc[envelope_indices(x=df[x_col].to_numpy(), lst_y=lst_y, nr_columns=lod_columns(fig))]
+
+
+def density_image(axis, x: np.ndarray, y: np.ndarray, extent: list, marker_style: dict, label: str = None, nr_bins: int = 400, alpha_min: float = 0.3):
+    """
+    density_image draws the scatter of (x, y) within extent [xmin, xmax, ymin, ymax] as a 2-D histogram image in
+    the color of marker_style. The opacity grows with the (log) number of points per cell while each occupied cell
+    keeps at least alpha_min so that isolated points (outliers) stay visible. A proxy is added for the legend
+    """
+    counts, _, _ = np.histogram2d(np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64), bins=nr_bins, range=[extent[:2], extent[2:]])
+    counts = counts.T
+
+    rgba = np.zeros(counts.shape + (4, ))
+    rgba[..., :3] = mpcolors.to_rgb(marker_style['color'])
+    if counts.max() > 0:
+        rgba[..., 3] = np.where(counts > 0, alpha_min + (1 - alpha_min) * np.log1p(counts) / np.log1p(counts.max()), 0)
+
+    axis.imshow(rgba, extent=extent, origin='lower', interpolation='nearest', aspect='auto')
+
+    # proxy artist for the legend
+    axis.plot([], [], label=label, **marker_style)
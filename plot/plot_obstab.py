@@ -18,6 +18,25 @@ register_matplotlib_converters()
 __author__ = 'amuls'
 
 
+def png_basename(gnss: str) -> str:
+    """
+    png_basename returns the base name for the plots of gnss, derived from its RINEX observation file (or the obstab file for older directories)
+    """
+    dGNSS = amc.dRTK['rnx']['gnss'][gnss]
+
+    # directories processed before reading the RINEX file directly still name the plots after the obstab file
+    if 'obstab' in dGNSS:
+        return os.path.splitext(dGNSS['obstab'])[0]
+
+    # use the combined observation file when no observation file was created for gnss itself
+    obs_name = dGNSS['obs'] if 'obs' in dGNSS else amc.dRTK['rnx']['gnss']['M']['obs']
+    for cmp_ext in ('.Z', '.gz', '.bz2'):
+        if obs_name.endswith(cmp_ext):
+            obs_name = obs_name[:-len(cmp_ext)]
+
+    return obs_name.replace('.', '-')
+
+
 def plot_rise_set_times(gnss: str, df_rs: pd.DataFrame, logger: logging.Logger, showplot: bool = False):
     """
     plot_rise_set_times plots the rise/set times vs time per SVs as observed / predicted
@@ -85,7 +104,7 @@ def plot_rise_set_times(gnss: str, df_rs: pd.DataFrame, logger: logging.Logger,
     # save the plot in subdir png of GNSSSystem
     png_dir = os.path.join(amc.dRTK['gfzrnxDir'], amc.dRTK['rnx']['gnss'][gnss]['marker'], 'png')
     amutils.mkdir_p(png_dir)
-    pngName = os.path.join(png_dir, os.path.splitext(amc.dRTK['rnx']['gnss'][gnss]['obstab'])[0] + '-RS.png')
+    pngName = os.path.join(png_dir, png_basename(gnss=gnss) + '-RS.png')
     fig.savefig(pngName, dpi=fig.dpi)
 
     logger.info('{func:s}: created plot {plot:s}'.format(func=cFuncName, plot=colored(pngName, 'green')))
@@ -160,7 +179,7 @@ def plot_rise_set_stats(gnss: str, df_arcs: pd.DataFrame, nr_arcs: int, logger:
     # save the plot in subdir png of GNSSSystem
     png_dir = os.path.join(amc.dRTK['gfzrnxDir'], amc.dRTK['rnx']['gnss'][gnss]['marker'], 'png')
     amutils.mkdir_p(png_dir)
-    pngName = os.path.join(png_dir, os.path.splitext(amc.dRTK['rnx']['gnss'][gnss]['obstab'])[0] + '-obs.png')
+    pngName = os.path.join(png_dir, png_basename(gnss=gnss) + '-obs.png')
     fig.savefig(pngName, dpi=fig.dpi)
 
     logger.info('{func:s}: created plot {plot:s}'.format(func=cFuncName, plot=colored(pngName, 'green')))
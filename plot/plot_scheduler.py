@@ -0,0 +1,107 @@
+import sys
+import os
+import time
+import logging
+import multiprocessing
+from typing import Tuple
+from termcolor import colored
+
+import am_config as amc
+
+__author__ = 'amuls'
+
+# tasks of the running pool, inherited (not copied) by forked workers
+lst_pool_tasks = []
+
+
+def plot_task(name: str, func, **kwargs) -> tuple:
+    """
+    plot_task describes a figure to create by calling func(**kwargs, logger=logger, showplot=showplot).
+    func must be a module level plot function so that it can be run in a worker process
+    """
+    return name, func, kwargs
+
+
+def init_plot_worker(dRtk: dict, logger: logging.Logger):
+    """
+    init_plot_worker selects the non-interactive Agg backend and sets the global information used by the plots.
+    pyplot is already imported by the plot modules, so the backend is switched (matplotlib.use has no effect then)
+    """
+    import matplotlib.pyplot as plt
+    plt.switch_backend('Agg')
+
+    amc.dRTK = dRtk
+    init_plot_worker.logger = logger
+
+
+def run_plot_task(task: tuple, logger: logging.Logger = None, showplot: bool = False) -> Tuple:
+    """
+    run_plot_task creates the figure of the task and returns its name, the time used and the error (None if successful)
+    """
+    import matplotlib.pyplot as plt
+
+    name, func, kwargs = task
+    logger = logger or init_plot_worker.logger
+
+    tStart = time.perf_counter()
+    try:
+        func(**kwargs, logger=logger, showplot=showplot)
+        error = None
+    except Exception as e:
+        error = '{type:s}: {err!s}'.format(type=type(e).__name__, err=e)
+    finally:
+        plt.close('all')
+
+    return name, time.perf_counter() - tStart, error
+
+
+def run_pool_task(index: int) -> Tuple:
+    """
+    run_pool_task creates the figure of the task at index in lst_pool_tasks, which a forked worker shares with its parent
+    """
+    return run_plot_task(task=lst_pool_tasks[index])
+
+
+def run_plot_tasks(lst_tasks: list, logger: logging.Logger, showplot: bool = False, workers: int = None) -> dict:
+    """
+    run_plot_tasks creates the independent figures of lst_tasks in a process pool (Agg backend). Workers are forked
+    so that they use the dataframes of this process without copying or pickling them (copy-on-write memory). Where
+    fork is not available, the arguments are pickled per task. Interactive plots (showplot) are created one after
+    the other in this process. Returns per successfully created figure the time used (s)
+    """
+    cFuncName = colored(os.path.basename(__file__), 'yellow') + ' - ' + colored(sys._getframe().f_code.co_name, 'green')
+
+    if not lst_tasks:
+        return {}
+
+    workers = min(workers or os.cpu_count(), len(lst_tasks))
+    logger.info('{func:s}: creating {nr:d} plots using {workers:d} processes'.format(nr=len(lst_tasks), workers=1 if showplot else workers, func=cFuncName))
+
+    dTimes = {}
+    tStart = time.perf_counter()
+
+    if showplot or workers <= 1:
+        lst_results = [run_plot_task(task=task, logger=logger, showplot=showplot) for task in lst_tasks]
+    else:
+        global lst_pool_tasks
+        if 'fork' in multiprocessing.get_all_start_methods():
+            lst_pool_tasks = lst_tasks
+            try:
+                with multiprocessing.get_context('fork').Pool(processes=workers, initializer=init_plot_worker, initargs=(amc.dRTK, logger)) as pool:
+                    lst_results = pool.map(run_pool_task, range(len(lst_tasks)), chunksize=1)
+            finally:
+                lst_pool_tasks = []
+        else:
+            with multiprocessing.Pool(processes=workers, initializer=init_plot_worker, initargs=(amc.dRTK, logger)) as pool:
+                lst_results = pool.map(run_plot_task, lst_tasks, chunksize=1)
+
+    for name, tPlot, error in lst_results:
+        if error is not None:
+            logger.error('{func:s}: plot {name:s} failed ({err:s})'.format(name=colored(name, 'red'), err=error, func=cFuncName))
+        else:
+            dTimes[name] = tPlot
+
+    if dTimes:
+        logger.info('{func:s}: created plots in {total:.2f} s (slowest {name:s} {slow:.2f} s)'.format(total=time.perf_counter() - tStart, name=max(dTimes, key=dTimes.get), slow=max(dTimes.values()), func=cFuncName))
+
+    return dTimes
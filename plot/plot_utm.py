@@ -44,10 +44,10 @@ def plot_utm_ellh(dRtk: dict, dfUTM: pd.DataFrame, logger: logging.Logger, showp
     fig, ax = plt.subplots(nrows=len(crds2Plot), ncols=1, sharex=True, figsize=(20.0, 16.0))
 
     # make title for plot
-    ax[0].annotate('{camp:s} - {date:s} - {marker:s} ({pos:s}, quality {mode:s})'.format(camp=dRtk['campaign'], date=dRtk['obsStart'].strftime('%d %b %Y'), marker=dRtk['marker'], pos=dRtk['posFile'], mode=dRtk['rtkqual'].upper()), xy=(0.5, 1), xycoords='axes fraction', xytext=(0, 0), textcoords='offset pixels', horizontalalignment='center', verticalalignment='bottom', weight='strong', fontsize='large')
+    ax[0].annotate('{camp:s} - {date:s} - {marker:s} ({pos:s}, quality {mode:s})'.format(camp=dRtk['campaign'], date=dRtk['obsStart'].strftime('%d %b %Y'), marker=dRtk['marker'], pos=dRtk['posFile'], mode=dRtk['rtkqual'].upper()), xy=(0.5, 1), xycoords='axes fraction', xytext=(0, 0), textcoords='offset pixels', horizontalalignment='center', verticalalignment='bottom', weight='bold', fontsize='large')
 
     # copyright this
-    ax[-1].annotate(r'$\copyright$ Alain Muls (alain.muls@mil.be)', xy=(1, 1), xycoords='axes fraction', xytext=(0, 0), textcoords='offset pixels', horizontalalignment='right', verticalalignment='bottom', weight='strong', fontsize='large')
+    ax[-1].annotate(r'$\copyright$ Alain Muls (alain.muls@mil.be)', xy=(1, 1), xycoords='axes fraction', xytext=(0, 0), textcoords='offset pixels', horizontalalignment='right', verticalalignment='bottom', weight='bold', fontsize='large')
 
     # determine the difference to weighted average or marker position of UTM (N,E), ellH to plot
     dfCrd = pd.DataFrame(columns=crds2Plot[:3])
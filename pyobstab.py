@@ -52,7 +52,7 @@ def treatCmdOpts(argv: list):
     baseName = os.path.basename(__file__)
     amc.cBaseName = colored(baseName, 'yellow')
 
-    helpTxt = baseName + ' processes the observation tabular file *.obstab'
+    helpTxt = baseName + ' processes the observations of the RINEX observation file'
 
     # create the parser for command line arguments
     parser = argparse.ArgumentParser(description=helpTxt)
@@ -130,8 +130,8 @@ def main(argv):
     # get the information from pyconvbin created json file
     read_json(dir_rnx=rnx_dir, logger=logger)
 
-    # load the requested OBSTAB file into a pandas dataframe
-    df_obs = rnxobs_tabular.read_obs_tabular(gnss=gnss, logger=logger)
+    # load the observations of the requested GNSS from its RINEX file into a pandas dataframe
+    df_obs = rnxobs_tabular.read_obs_rinex(gnss=gnss, logger=logger)
     df_obs['gap'] = np.nan
 
     amutils.logHeadTailDataFrame(logger=logger, callerName=cFuncName, df=df_obs, dfName='df_obs')
@@ -10,12 +10,13 @@ import numpy as np
 import math
 import utm
 from shutil import copyfile
+from typing import Tuple
 import logging
 
 import am_config as amc
-from ampyutils import amutils
+from ampyutils import amutils, dfcache
 from rnx2rtkp import parse_rtk_files
-from plot import plot_position, plot_scatter, plot_sats_column, plot_clock, plot_distributions_crds, plot_distributions_elev
+from plot import plot_position, plot_scatter, plot_sats_column, plot_clock, plot_distributions_crds, plot_distributions_elev, plot_scheduler
 from stats import enu_statistics as enu_stat
 
 __author__ = 'amuls'
@@ -65,6 +66,46 @@ def store_to_cvs(df: pd.DataFrame, ext: str, dInfo: dict, logger: logging.Logger
     logger.info('{func:s}: stored dataframe as csv file {csv:s}'.format(csv=colored(csv_name, 'green'), func=cFuncName))
 
 
+def parse_rtk_products(overwrite: bool, logger: logging.Logger) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    parse_rtk_products returns the position, satellites, clock and DOP dataframes. These are loaded from
+    the cache next to the position file when the pos and stat files did not change, else they are parsed and cached
+    """
+    cFuncName = colored(os.path.basename(__file__), 'yellow') + ' - ' + colored(sys._getframe().f_code.co_name, 'green')
+
+    srcFiles = [amc.dRTK['info']['rtkPosFile'], amc.dRTK['info']['rtkStatFile']]
+    dfNames = ('dfPosn', 'dfSats', 'dfCLKs', 'dfDOPs')
+
+    if overwrite:
+        dfcache.invalidate_cache(srcFile=srcFiles[0], logger=logger)
+    else:
+        dDFs, dInfo = dfcache.load_cache(srcFiles=srcFiles, names=dfNames, logger=logger)
+        if dDFs is not None:
+            amc.dRTK['Time'] = dInfo['Time']
+            return tuple(dDFs[dfName] for dfName in dfNames)
+
+    # read the position file into a dataframe and add UTM coordinates
+    logger.info('{func:s}: parsing RTKLib pos file {pos:s}'.format(pos=amc.dRTK['info']['rtkPosFile'], func=cFuncName))
+    dfPosn = parse_rtk_files.parseRTKLibPositionFile(logger=logger)
+
+    # work on the statistics file
+    # split it in relavant parts (single read, kept in memory)
+    dStatParts = parse_rtk_files.splitStatusFile(amc.dRTK['info']['rtkStatFile'], logger=logger)
+
+    # parse the satellite file (contains Az, El, PRRes, CN0)
+    dfSats = parse_rtk_files.parseSatelliteStatistics(dStatParts['sat'], logger=logger)
+
+    # parse the clock stats
+    dfCLKs = parse_rtk_files.parseClockBias(dStatParts['clk'], logger=logger)
+
+    # calculate DOP values from El, Az info for each TOW
+    dfDOPs = parse_rtk_files.calcDOPs(dfSats, logger=logger)
+
+    dfcache.store_cache(srcFiles=srcFiles, dDFs=dict(zip(dfNames, (dfPosn, dfSats, dfCLKs, dfDOPs))), dInfo={'Time': amc.dRTK['Time']}, logger=logger)
+
+    return dfPosn, dfSats, dfCLKs, dfDOPs
+
+
 def main(argv):
     """
     pyRTKPlot adds UTM coordinates to output of rnx2rtkp.
@@ -139,9 +180,8 @@ def main(argv):
 
         sys.exit(amc.E_FILE_NOT_EXIST)
 
-    # read the position file into a dataframe and add dUTM coordinates
-    logger.info('{func:s}: parsing RTKLib pos file {pos:s}'.format(pos=amc.dRTK['info']['rtkPosFile'], func=cFuncName))
-    dfPosn = parse_rtk_files.parseRTKLibPositionFile(logger=logger)
+    # get the parsed position, satellite, clock and DOP dataframes (from cache if up to date)
+    dfPosn, dfSats, dfCLKs, dfDOPs = parse_rtk_products(overwrite=overwrite, logger=logger)
 
     # calculate the weighted avergae of llh & enu
     amc.dRTK['WAvg'] = parse_rtk_files.weightedAverage(dfPos=dfPosn, logger=logger)
@@ -152,12 +192,6 @@ def main(argv):
     # merge dfCrd into dfPosn
     dfPosn[['dUTM.E', 'dUTM.N', 'dEllH']] = dfCrd[['UTM.E', 'UTM.N', 'ellH']]
 
-    # work on the statistics file
-    # split it in relavant parts
-    dTmpFiles = parse_rtk_files.splitStatusFile(amc.dRTK['info']['rtkStatFile'], logger=logger)
-
-    # parse the satellite file (contains Az, El, PRRes, CN0)
-    dfSats = parse_rtk_files.parseSatelliteStatistics(dTmpFiles['sat'], logger=logger)
     store_to_cvs(df=dfSats, ext='sats', dInfo=amc.dRTK, logger=logger)
 
     # determine statistics on PR residuals for all satellites per elevation bin
@@ -171,12 +205,10 @@ def main(argv):
     # determine statistics of PR residuals for each satellite
     amc.dRTK['PRres'] = parse_rtk_files.parse_sv_residuals(dfSat=dfSats, logger=logger)
 
-    # calculate DOP values from El, Az info for each TOW
-    dfDOPs = parse_rtk_files.calcDOPs(dfSats, logger=logger)
     store_to_cvs(df=dfDOPs, ext='XDOP', dInfo=amc.dRTK, logger=logger)
 
     # merge the PDOP column of dfDOPs into dfPosn and interpolate the PDOP column
-    dfResults = pd.merge(left=dfPosn, right=dfDOPs[['DT', 'PDOP', 'HDOP', 'VDOP', 'GDOP']], left_on='DT', right_on='DT', how='left')
+    dfResults = pd.merge(left=dfPosn, right=dfDOPs[['DT', 'PDOP', 'HDOP', 'VDOP', 'TDOP', 'GDOP']], left_on='DT', right_on='DT', how='left')
     dfPosn = dfResults.interpolate()
     store_to_cvs(df=dfPosn, ext='posn', dInfo=amc.dRTK, logger=logger)
 
@@ -201,8 +233,6 @@ def main(argv):
     # profile = pp.ProfileReport(df=dfProfile, check_correlation_pearson=False, correlations={'pearson': False, 'spearman': False, 'kendall': False, 'phi_k': False, 'cramers': False, 'recoded': False}, title=ppTitle)
     # profile.to_file(output_file=amc.dRTK['info']['posnstat'])
 
-    # parse the clock stats
-    dfCLKs = parse_rtk_files.parseClockBias(dTmpFiles['clk'], logger=logger)
     store_to_cvs(df=dfCLKs, ext='clks', dInfo=amc.dRTK, logger=logger)
 
     # BEGIN debug
@@ -213,41 +243,31 @@ def main(argv):
         amc.logDataframeInfo(df=df, dfName=dfName, callerName=cFuncName, logger=logger)
     # EOF debug
 
-    # create the position plot (use DOP to color segments)
-    plot_position.plotUTMOffset(dRtk=amc.dRTK, dfPos=dfPosn, dfCrd=dfCrd, dCrdLim=dCrdLim, logger=logger, showplot=showPlots)
+    # create the independent plots in parallel
+    dPRResInfo = {'name': 'PRres', 'yrange': [-6, 6], 'title': 'PR Residuals', 'unit': 'm', 'linestyle': '-'}
+    dCN0Info = {'name': 'CN0', 'yrange': [20, 60], 'title': 'CN0 Ratio', 'unit': 'dBHz', 'linestyle': '-'}
+    dElevInfo = {'name': 'Elev', 'yrange': [0, 90], 'title': 'Elevation', 'unit': 'Deg', 'linestyle': '-'}
 
+    lstPlots = []
+    # plot pseudo-range residus, CN0 and elevation per satellite
+    for dColInfo in (dPRResInfo, dCN0Info, dElevInfo):
+        lstPlots.append(plot_scheduler.plot_task('plotRTKLibSatsColumn.' + dColInfo['name'], plot_sats_column.plotRTKLibSatsColumn, dCol=dColInfo, dRtk=amc.dRTK, dfSVs=dfSats))
+    # create the position plot (use DOP to color segments)
+    lstPlots.append(plot_scheduler.plot_task('plotUTMOffset', plot_position.plotUTMOffset, dRtk=amc.dRTK, dfPos=dfPosn, dfCrd=dfCrd, dCrdLim=dCrdLim))
     # create the UTM N-E scatter plot
-    plot_scatter.plotUTMScatter(dRtk=amc.dRTK, dfPos=dfPosn, dfCrd=dfCrd, dCrdLim=dCrdLim, logger=logger, showplot=showPlots)
-    plot_scatter.plotUTMScatterBin(dRtk=amc.dRTK, dfPos=dfPosn, dfCrd=dfCrd, dCrdLim=dCrdLim, logger=logger, showplot=showPlots)
-
+    lstPlots.append(plot_scheduler.plot_task('plotUTMScatter', plot_scatter.plotUTMScatter, dRtk=amc.dRTK, dfPos=dfPosn, dfCrd=dfCrd, dCrdLim=dCrdLim))
+    lstPlots.append(plot_scheduler.plot_task('plotUTMScatterBin', plot_scatter.plotUTMScatterBin, dRtk=amc.dRTK, dfPos=dfPosn, dfCrd=dfCrd, dCrdLim=dCrdLim))
     # create ENU distribution plots
-    plot_distributions_crds.plot_enu_distribution(dRtk=amc.dRTK, dfENUdist=dfDistENU, dfENUstat=dfStatENU, logger=logger, showplot=showPlots)
-
+    lstPlots.append(plot_scheduler.plot_task('plot_enu_distribution', plot_distributions_crds.plot_enu_distribution, dRtk=amc.dRTK, dfENUdist=dfDistENU, dfENUstat=dfStatENU))
     # create XDOP plots
-    plot_distributions_crds.plot_xdop_distribution(dRtk=amc.dRTK, dfXDOP=dfDOPs, dfXDOPdisp=dfDistXDOP, logger=logger, showplot=showPlots)
-
-    # plot pseudo-range residus
-    dPRResInfo = {'name': 'PRres', 'yrange': [-6, 6], 'title': 'PR Residuals', 'unit': 'm', 'linestyle': '-'}
-    logger.info('{func:s}: creating dPRRes plots based on dict {dict!s}'.format(func=cFuncName, dict=dPRResInfo))
-    plot_sats_column.plotRTKLibSatsColumn(dCol=dPRResInfo, dRtk=amc.dRTK, dfSVs=dfSats, logger=logger, showplot=showPlots)
-
-    # plot CN0
-    dCN0Info = {'name': 'CN0', 'yrange': [20, 60], 'title': 'CN0 Ratio', 'unit': 'dBHz', 'linestyle': '-'}
-    logger.info('{func:s}: creating CN0 plots based on dict {dict!s}'.format(func=cFuncName, dict=dCN0Info))
-    plot_sats_column.plotRTKLibSatsColumn(dCol=dCN0Info, dRtk=amc.dRTK, dfSVs=dfSats, logger=logger, showplot=showPlots)
-
+    lstPlots.append(plot_scheduler.plot_task('plot_xdop_distribution', plot_distributions_crds.plot_xdop_distribution, dRtk=amc.dRTK, dfXDOP=dfDOPs, dfXDOPdisp=dfDistXDOP))
     # create plots for elevation distribution of CN0 and PRres
-    plot_distributions_elev.plot_elev_distribution(dRtk=amc.dRTK, df=dfDistCN0, ds=dsDistCN0, obs_name='CN0', logger=logger, showplot=showPlots)
-    plot_distributions_elev.plot_elev_distribution(dRtk=amc.dRTK, df=dfDistPRres, ds=dsDistPRRes, obs_name='PRres', logger=logger, showplot=showPlots)
+    lstPlots.append(plot_scheduler.plot_task('plot_elev_distribution.CN0', plot_distributions_elev.plot_elev_distribution, dRtk=amc.dRTK, df=dfDistCN0, ds=dsDistCN0, obs_name='CN0'))
+    lstPlots.append(plot_scheduler.plot_task('plot_elev_distribution.PRres', plot_distributions_elev.plot_elev_distribution, dRtk=amc.dRTK, df=dfDistPRres, ds=dsDistPRRes, obs_name='PRres'))
+    # plot the receiver clock
+    lstPlots.append(plot_scheduler.plot_task('plotClock', plot_clock.plotClock, dfClk=dfCLKs, dRtk=amc.dRTK))
 
-    # # plot elevation
-    dElevInfo = {'name': 'Elev', 'yrange': [0, 90], 'title': 'Elevation', 'unit': 'Deg', 'linestyle': '-'}
-    logger.info('{func:s}: creating Elev plots based on dict {dict!s}'.format(func=cFuncName, dict=dElevInfo))
-    plot_sats_column.plotRTKLibSatsColumn(dCol=dElevInfo, dRtk=amc.dRTK, dfSVs=dfSats, logger=logger, showplot=showPlots)
-
-    # # plot the receiver clock
-    logger.info('{func:s}: creating Clock plots'.format(func=cFuncName))
-    plot_clock.plotClock(dfClk=dfCLKs, dRtk=amc.dRTK, logger=logger, showplot=showPlots)
+    dPlotTimes = plot_scheduler.run_plot_tasks(lst_tasks=lstPlots, logger=logger, showplot=showPlots)
 
     logger.info('{func:s}: final amc.dRTK =\n{settings!s}'.format(func=cFuncName, settings=json.dumps(amc.dRTK, sort_keys=False, indent=4)))
 
@@ -261,6 +281,10 @@ def main(argv):
     copyfile(log_name, os.path.join(amc.dRTK['info']['dir'], '{obs:s}-{prog:s}'.format(obs=amc.dRTK['info']['rtkPosFile'].replace(';', '_'), prog='plot.log')))
     os.remove(log_name)
 
+    # a failing plot stops the run with an error code (after the results are saved)
+    if len(dPlotTimes) < len(lstPlots):
+        sys.exit(amc.E_FAILURE)
+
 
 if __name__ == "__main__":  # Only run if this file is called directly
     main(sys.argv)
@@ -5,12 +5,13 @@ import numpy as np
 import os
 import logging
 import utm
-import tempfile
+import io
 from typing import Tuple
 
 from ampyutils import amutils
-from GNSS import gpstime
+from GNSS import gpstime, dop
 from rnx2rtkp import rtklibconstants as rtkc
+from stats import enu_statistics as enu_stat
 import am_config as amc
 
 __author__ = 'amuls'
@@ -31,7 +32,7 @@ def parseRTKLibPositionFile(logger: logging.Logger) -> pd.DataFrame:
     dfPos = dfPos.rename(columns={'%': 'WNC', 'GPST': 'TOW', 'latitude(deg)': 'lat', 'longitude(deg)': 'lon', 'height(m)': 'ellH', 'sdn(m)': 'sdn', 'sde(m)': 'sde', 'sdu(m)': 'sdu', 'sdne(m)': 'sdne', 'sdeu(m)': 'sdeu', 'sdun(m)': 'sdun', 'age(s)': 'age'})
 
     # convert the GPS time to UTC
-    dfPos['DT'] = dfPos.apply(lambda x: gpstime.UTCFromWT(x['WNC'], x['TOW']), axis=1)
+    dfPos['DT'] = gpstime.UTCFromWTArray(dfPos['WNC'].to_numpy(), dfPos['TOW'].to_numpy())
 
     dTime = {}
     dTime['epochs'] = dfPos.shape[0]
@@ -57,7 +58,8 @@ def parseRTKLibPositionFile(logger: logging.Logger) -> pd.DataFrame:
 
 def splitStatusFile(statFileName: str, logger: logging.Logger) -> dict:
     """
-    splitStatusFile splits the statistics file into the POS, SAT, CLK & VELACC parts
+    splitStatusFile splits the statistics file into the POS, SAT, CLK & VELACC parts in a single read.
+    Each part is returned as an in-memory buffer (rewound) that can be passed directly to pandas
     """
     cFuncName = colored(os.path.basename(__file__), 'yellow') + ' - ' + colored(sys._getframe().f_code.co_name, 'green')
 
@@ -68,15 +70,22 @@ def splitStatusFile(statFileName: str, logger: logging.Logger) -> dict:
     lineParts = ('$POS', '$SAT', '$CLK', '$VELACC')
 
     dStat = {}
-
+    dDispatch = {}
     for statPart, linePart in zip(statParts, lineParts):
-        dStat[statPart] = tempfile.NamedTemporaryFile(prefix='{:s}_'.format(statFileName), suffix='_{:s}'.format(statPart), delete=True)
+        dStat[statPart] = io.StringIO()
+        dDispatch[linePart] = dStat[statPart].write
+
+    # dispatch each line on its record type (text before first comma), other records are skipped
+    with open(statFileName, 'r') as fStat:
+        for line in fStat:
+            write = dDispatch.get(line.partition(',')[0])
+            if write is not None:
+                write(line)
 
-        with open(dStat[statPart].name, 'w') as fTmp:
-            fTmp.writelines(line for line in open(statFileName) if linePart in line)
-            logger.info('{func:s}: size of {part:s} status file = {size:d}'.format(size=fTmp.tell(), part=statPart, func=cFuncName))
-            # reset at start of file
-            fTmp.seek(0)
+    for statPart in statParts:
+        logger.info('{func:s}: size of {part:s} status part = {size:d}'.format(size=dStat[statPart].tell(), part=statPart, func=cFuncName))
+        # reset at start of buffer
+        dStat[statPart].seek(0)
 
     return dStat
 
@@ -123,29 +132,30 @@ def wavg(group: dict, avg_name: str, weight_name: str) -> float:
         return coordinate.mean()
 
 
-def parseSatelliteStatistics(statsSat: tempfile._TemporaryFileWrapper, logger: logging.Logger) -> pd.DataFrame:
+def parseSatelliteStatistics(statsSat: io.StringIO, logger: logging.Logger) -> pd.DataFrame:
     """
     parseSatelliteStatistics reads the SAT statitics file into a dataframe
     """
     # set current function name
     cFuncName = colored(os.path.basename(__file__), 'yellow') + ' - ' + colored(sys._getframe().f_code.co_name, 'green')
 
-    logger.info('{func:s}: Parsing RTKLib satellites file {file:s} ({info:s})'.format(func=cFuncName, file=statsSat.name, info=colored('be patient', 'red')))
+    logger.info('{func:s}: Parsing RTKLib satellites status ({info:s})'.format(func=cFuncName, info=colored('be patient', 'red')))
 
-    dfSat = pd.read_csv(statsSat.name, header=None, sep=',', usecols=[*range(1, 11)])
-    dfSat.columns = rtkc.dRTKPosStat['Res']['useCols']
+    # read using compact dtypes (categorical SV, float32 observables)
+    useCols = rtkc.dRTKPosStat['Res']['useCols']
+    dfSat = pd.read_csv(statsSat, header=None, sep=',', usecols=[*range(1, 11)], dtype={i + 1: rtkc.dRTKPosStat['Res']['dtypes'][col] for i, col in enumerate(useCols)})
+    dfSat.columns = useCols
     amutils.printHeadTailDataFrame(df=dfSat, name='dfSat range')
 
-    # dfSat = pd.read_csv(statsSat.name, header=None, sep=',', names=rtkc.dRTKPosStat['Res']['colNames'], usecols=rtkc.dRTKPosStat['Res']['useCols'])
-    # amutils.printHeadTailDataFrame(df=dfSat, name='dfSat usecol')
-
-    # sys.exit(77)
-
-    # add DT column
-    dfSat['DT'] = dfSat.apply(lambda x: gpstime.UTCFromWT(x['WNC'], x['TOW']), axis=1)
+    # add DT column and keep TOW as int32 milliseconds
+    dfSat['DT'] = gpstime.UTCFromWTArray(dfSat['WNC'].to_numpy(), dfSat['TOW'].to_numpy())
+    dfSat['TOW'] = np.round(dfSat['TOW'].to_numpy() * 1000).astype(np.int32)
+    dfSat.rename(columns={'TOW': 'TOWms'}, inplace=True)
 
     # if PRres == 0.0 => than I suppose only 4 SVs used, so no residuals can be calculated, so change to NaN
-    dfSat.PRres.replace(0.0, np.nan, inplace=True)
+    dfSat['PRres'] = dfSat['PRres'].replace(0.0, np.nan)
+
+    logger.info('{func:s}: memory usage of dfSat (#{rows:d}) = {mem:.1f} MB'.format(func=cFuncName, rows=dfSat.shape[0], mem=dfSat.memory_usage(deep=True).sum() / 1024 / 1024))
 
     amc.logDataframeInfo(df=dfSat, dfName='dfSat', callerName=cFuncName, logger=logger)
 
@@ -154,16 +164,60 @@ def parseSatelliteStatistics(statsSat: tempfile._TemporaryFileWrapper, logger: l
     return dfSat
 
 
-def parse_sv_residuals(dfSat: pd.DataFrame, logger: logging.Logger) -> dict:
+def percentile_names(percentiles: tuple) -> list:
+    """
+    percentile_names returns the column names (p05, p95, p99_5, ...) of the percentiles (in %)
+    """
+    names = ['p{:02.0f}'.format(perc) if float(perc).is_integer() else 'p{:g}'.format(perc).replace('.', '_') for perc in percentiles]
+    if len(set(names)) != len(names):
+        raise ValueError('duplicate percentiles in {perc!s}'.format(perc=percentiles))
+
+    return names
+
+
+def sv_statistics(dfSat: pd.DataFrame, col: str, limits: tuple = None, percentiles: tuple = ()) -> pd.DataFrame:
     """
-    parse_sv_residuals parses the observed resiudals of the satellites
+    sv_statistics determines for each SV in a single groupby the count, mean, median, std of column col, and optionally
+    - the number and percentage of values within limits (inclusive),
+    - the requested percentiles (in %, named p05, p95, p99_5, ...)
+    returns a dataframe indexed by SV (sorted)
+    """
+    dfVal = pd.DataFrame({'val': dfSat[col].astype(np.float64)})
+    if limits is not None:
+        dfVal['inlim'] = dfVal['val'].ge(limits[0]) & dfVal['val'].le(limits[1])
+
+    grouped = dfVal.groupby(dfSat['SV'], observed=True)
+
+    dfStat = grouped['val'].agg(['count', 'mean', 'median', 'std'])
+    if limits is not None:
+        dfStat['inlim'] = grouped['inlim'].sum().astype(int)
+        dfStat['inlim%'] = np.where(dfStat['count'] > 0, dfStat['inlim'] / dfStat['count'].where(dfStat['count'] > 0, 1) * 100, 0.)
+    if len(percentiles):
+        names = percentile_names(percentiles=percentiles)
+        dfPerc = grouped['val'].quantile([perc / 100 for perc in percentiles]).unstack()
+        dfPerc.columns = names
+        dfStat = dfStat.join(dfPerc)
+    dfStat.index = dfStat.index.astype(str)
+
+    return dfStat.sort_index()
+
+
+def parse_sv_residuals(dfSat: pd.DataFrame, logger: logging.Logger, percentiles: tuple = ()) -> dict:
+    """
+    parse_sv_residuals parses the observed resiudals of the satellites and adds statistics on CN0 and elevation.
+    Extra percentiles (in %) of the residuals are added as PRp05, PRp95, PRp99_5, ...
     """
     cFuncName = colored(os.path.basename(__file__), 'yellow') + ' - ' + colored(sys._getframe().f_code.co_name, 'green')
 
     logger.info('{func:s}: parses observed resiudals of satellites'.format(func=cFuncName))
 
+    # determine statistics for all SVs at once
+    dfPRres = sv_statistics(dfSat=dfSat, col='PRres', limits=(-2, +2), percentiles=percentiles)
+    dfCN0 = sv_statistics(dfSat=dfSat, col='CN0')
+    dfElev = sv_statistics(dfSat=dfSat, col='Elev')
+
     # determine the list of satellites observed
-    obsSVs = np.sort(dfSat.SV.unique())
+    obsSVs = dfPRres.index.to_numpy()
 
     logger.info('{func:s}: observed SVs (#{nrsats:02d}):\n{sats!s}'.format(func=cFuncName, nrsats=len(obsSVs), sats=obsSVs))
 
@@ -177,19 +231,20 @@ def parse_sv_residuals(dfSat: pd.DataFrame, logger: logging.Logger) -> dict:
     dGALsv = {}
     dGPSsv = {}
 
-    for i, sv in enumerate(obsSVs):
-        # do some statistics on this sv
+    for sv in obsSVs:
+        # collect the statistics on this sv
         dSV = {}
-        dSV['count'] = int(dfSat.PRres[dfSat['SV'] == sv].count())
-        dSV['PRmean'] = dfSat.PRres[dfSat['SV'] == sv].mean()
-        dSV['PRmedian'] = dfSat.PRres[dfSat['SV'] == sv].median()
-        dSV['PRstd'] = dfSat.PRres[dfSat['SV'] == sv].std()
-        s = dfSat.PRres[dfSat['SV'] == sv].between(-2, +2, inclusive=True)
-        dSV['PRlt2'] = int(s.sum())
-        if dSV['count']:
-            dSV['PRlt2%'] = dSV['PRlt2'] / dSV['count'] * 100
-        else:
-            dSV['PRlt2%'] = 0
+        dSV['count'] = int(dfPRres.at[sv, 'count'])
+        dSV['PRmean'] = float(dfPRres.at[sv, 'mean'])
+        dSV['PRmedian'] = float(dfPRres.at[sv, 'median'])
+        dSV['PRstd'] = float(dfPRres.at[sv, 'std'])
+        dSV['PRlt2'] = int(dfPRres.at[sv, 'inlim'])
+        dSV['PRlt2%'] = float(dfPRres.at[sv, 'inlim%'])
+        for perc in percentile_names(percentiles=percentiles):
+            dSV['PR{perc:s}'.format(perc=perc)] = float(dfPRres.at[sv, perc])
+        for obs, dfObs in zip(('CN0', 'Elev'), (dfCN0, dfElev)):
+            for stat in ('mean', 'median', 'std'):
+                dSV['{obs:s}{stat:s}'.format(obs=obs, stat=stat)] = float(dfObs.at[sv, stat])
 
         if sv.startswith('E'):
             nrGAL += 1
@@ -214,167 +269,148 @@ def parse_sv_residuals(dfSat: pd.DataFrame, logger: logging.Logger) -> dict:
     return dSVList
 
 
-def parse_elevation_distribution(dRtk: dict, dfSat: pd.DataFrame, logger: logging.Logger) -> Tuple[pd.DataFrame, pd.Series, pd.DataFrame, pd.Series]:
+def bin_index(values: np.ndarray, bins: np.ndarray, right: bool = True) -> np.ndarray:
     """
-    parse_elevation_distribution parses the observed resiudals per constellation and per elevation bin of 10 degrees
+    bin_index returns for each value the index of the bin it belongs to, -1 if outside the bins or NaN.
+    Bins are closed on the right like pd.cut (right=True), or closed on the left with the last bin also
+    closed on the right (right=False)
+    """
+    nrBins = len(bins) - 1
+    if right:
+        index = np.searchsorted(bins, values, side='left') - 1
+    else:
+        index = np.searchsorted(bins, values, side='right') - 1
+        index[values == bins[-1]] = nrBins - 1
+
+    index[(index < 0) | (index >= nrBins)] = -1
+
+    return index
+
+
+def parse_elevation_distribution(dRtk: dict, dfSat: pd.DataFrame, logger: logging.Logger, elev_bins: np.ndarray = None, CN0_bins: np.ndarray = None, PRres_bins: np.ndarray = None) -> Tuple[pd.DataFrame, pd.Series, pd.DataFrame, pd.Series]:
+    """
+    parse_elevation_distribution parses the observed resiudals per constellation and per elevation bin of (default) 15 degrees.
+    The (system x elevation bin x CN0/PRres bin) counts are determined in a single pass over the data
     """
     cFuncName = colored(os.path.basename(__file__), 'yellow') + ' - ' + colored(sys._getframe().f_code.co_name, 'green')
 
-    logger.info('{func:s}: parses observed resiudals as funcion of elevation²'.format(func=cFuncName))
+    logger.info('{func:s}: parses observed resiudals as funcion of elevation'.format(func=cFuncName))
 
     # define what we use for binning
     gnssLetters = ('E', 'G')
     gnssNames = ('GAL', 'GPS')
-    cols = ['Elev', 'PRres', 'CN0']
     # define the bins used
-    elev_bins, step = np.linspace(start=0, stop=90, num=7, endpoint=True, retstep=True, dtype=int, axis=0)
+    if elev_bins is None:
+        elev_bins = np.linspace(start=0, stop=90, num=7, endpoint=True, dtype=int)
     logger.info('{func:s}: elevation bins = {bins!s}'.format(bins=elev_bins, func=cFuncName))
-    CN0_bins, step = np.linspace(start=10, stop=70, num=13, endpoint=True, retstep=True, dtype=int, axis=0)
+    if CN0_bins is None:
+        CN0_bins = np.linspace(start=10, stop=70, num=13, endpoint=True, dtype=int)
     logger.info('{func:s}: CN0 bins = {bins!s}'.format(bins=CN0_bins, func=cFuncName))
-    PRres_bins, step = np.linspace(start=-5, stop=5, num=21, endpoint=True, retstep=True, dtype=float, axis=0)
-    tmpArr = np.append(PRres_bins, np.inf)
-    PRres_bins = np.append(-np.inf, tmpArr)
+    if PRres_bins is None:
+        PRres_bins = np.concatenate(([-np.inf], np.linspace(start=-5, stop=5, num=21, endpoint=True), [np.inf]))
     logger.info('{func:s}: PRres bins = {bins!s}'.format(bins=PRres_bins, func=cFuncName))
 
-    # add to dRtk the bins used
-
-    # create dataframe for CN0 / PRres distribution
-    dfCN0dist = pd.DataFrame()
-    dfPRresdist = pd.DataFrame()
-
-    # calculate the number of PRres within [-2,+2] and CN0 statistics over the elevation bins
-    for gnssLetter, gnssName in zip(gnssLetters, gnssNames):
-        # create a dataframe to work on
-        dfGNSS = dfSat[dfSat['SV'].str.startswith(gnssLetter)][cols]
-
-        if len(dfGNSS.index):
-            # display frame for this system
-            amutils.logHeadTailDataFrame(logger=logger, callerName=cFuncName, df=dfGNSS, dfName=gnssName)
-
-            # go over the elevation bins
-            for elev_min, elev_max in zip(elev_bins[:-1], elev_bins[1:]):
-                dfGNSS['elevbin'] = dfGNSS.Elev.between(elev_min, elev_max, inclusive=True)
-
-                amutils.logHeadTailDataFrame(logger=logger, callerName=cFuncName, df=dfGNSS, dfName='{syst:s} in [{min:d}..{max:d}] deg'.format(syst=gnssName, min=elev_min, max=elev_max))
-
-                # create a distribution for PRres
-                dfPRresdist['{syst:s}[{min:d}..{max:d}]'.format(syst=gnssName, min=elev_min, max=elev_max)] = pd.cut(dfGNSS.loc[dfGNSS['elevbin']]['PRres'], bins=PRres_bins).value_counts(sort=False)
-
-                # create a distribution for CN0
-                dfCN0dist['{syst:s}[{min:d}..{max:d}]'.format(syst=gnssName, min=elev_min, max=elev_max)] = pd.cut(dfGNSS.loc[dfGNSS['elevbin']]['CN0'], bins=CN0_bins).value_counts(sort=False)
-
-            # reduce the values to percentage based on observations taken over all bins
-            dsPRres_per_bin = dfPRresdist.loc[:, dfPRresdist.columns].sum()
-            PRres_total = dsPRres_per_bin.sum() / 100
-
-            dsCN0_per_bin = dfCN0dist.loc[:, dfCN0dist.columns].sum()
-            CN0_total = dsCN0_per_bin.sum() / 100
-
-            # report the distibutions of CN0 and PRres to the user
-            amutils.logHeadTailDataFrame(logger=logger, callerName=cFuncName, df=dfPRresdist, dfName='dfPRresdist')
-            amutils.logHeadTailDataFrame(logger=logger, callerName=cFuncName, df=dfPRresdist / PRres_total, dfName='dfPRresdist in percentage')
-            logger.info('{func:s}: PRres totals per elev bin = \n{bins!s}'.format(bins=dsPRres_per_bin, func=cFuncName))
-
-            amutils.logHeadTailDataFrame(logger=logger, callerName=cFuncName, df=dfCN0dist, dfName='dfCN0dist')
-            amutils.logHeadTailDataFrame(logger=logger, callerName=cFuncName, df=dfCN0dist / CN0_total, dfName='dfCN0dist in percentage')
-            logger.info('{func:s}: CN0 totals per elev bin = \n{bins!s}'.format(bins=dsCN0_per_bin, func=cFuncName))
+    # index of the system, elevation bin and CN0/PRres bin for each observation
+    naSyst = np.full(dfSat.shape[0], -1)
+    naSVLetter = dfSat['SV'].astype(str).str[0].to_numpy() if dfSat.shape[0] else np.array([], dtype=str)
+    for i, gnssLetter in enumerate(gnssLetters):
+        naSyst[naSVLetter == gnssLetter] = i
+    naElevBin = bin_index(dfSat['Elev'].to_numpy(dtype=np.float64), elev_bins, right=False)
+
+    nrSysts = len(gnssLetters)
+    nrElevBins = len(elev_bins) - 1
+    dfDists = {}
+    for obs, obs_bins in zip(('CN0', 'PRres'), (CN0_bins, PRres_bins)):
+        naObsBin = bin_index(dfSat[obs].to_numpy(dtype=np.float64), obs_bins)
+        nrObsBins = len(obs_bins) - 1
+
+        # count cube (system x elevation bin x obs bin) in a single pass
+        valid = (naSyst >= 0) & (naElevBin >= 0) & (naObsBin >= 0)
+        cubeIndex = (naSyst[valid] * nrElevBins + naElevBin[valid]) * nrObsBins + naObsBin[valid]
+        naCube = np.bincount(cubeIndex, minlength=nrSysts * nrElevBins * nrObsBins).reshape(nrSysts, nrElevBins, nrObsBins)
+
+        # create dataframe for the distribution with a column per system (having observations) and elevation bin
+        dfDist = pd.DataFrame(index=pd.IntervalIndex.from_breaks(obs_bins))
+        for i, gnssName in enumerate(gnssNames):
+            if not (naSyst == i).any():
+                continue
+            for j, (elev_min, elev_max) in enumerate(zip(elev_bins[:-1], elev_bins[1:])):
+                dfDist['{syst:s}[{min:g}..{max:g}]'.format(syst=gnssName, min=elev_min, max=elev_max)] = naCube[i, j]
+        dfDists[obs] = dfDist
+
+    dfCN0dist = dfDists['CN0']
+    dfPRresdist = dfDists['PRres']
+
+    # reduce the values to percentage based on observations taken over all bins
+    dsPRres_per_bin = dfPRresdist.sum()
+    PRres_total = dsPRres_per_bin.sum() / 100
+
+    dsCN0_per_bin = dfCN0dist.sum()
+    CN0_total = dsCN0_per_bin.sum() / 100
+
+    # report the distibutions of CN0 and PRres to the user
+    amutils.logHeadTailDataFrame(logger=logger, callerName=cFuncName, df=dfPRresdist, dfName='dfPRresdist')
+    amutils.logHeadTailDataFrame(logger=logger, callerName=cFuncName, df=dfPRresdist / PRres_total, dfName='dfPRresdist in percentage')
+    logger.info('{func:s}: PRres totals per elev bin = \n{bins!s}'.format(bins=dsPRres_per_bin, func=cFuncName))
+
+    amutils.logHeadTailDataFrame(logger=logger, callerName=cFuncName, df=dfCN0dist, dfName='dfCN0dist')
+    amutils.logHeadTailDataFrame(logger=logger, callerName=cFuncName, df=dfCN0dist / CN0_total, dfName='dfCN0dist in percentage')
+    logger.info('{func:s}: CN0 totals per elev bin = \n{bins!s}'.format(bins=dsCN0_per_bin, func=cFuncName))
 
     return dfCN0dist, dsCN0_per_bin, dfPRresdist, dsPRres_per_bin
 
 
 def calcDOPs(dfSats: pd.DataFrame, logger: logging.Logger) -> pd.DataFrame:
     """
-    calculates the number of SVs used and corresponding DOP values
+    calculates the number of SVs used and corresponding DOP values for every epoch.
+    A receiver clock is estimated per satellite system so that combined solutions account for the
+    inter-system bias. When multiple systems are present, the xDOP values per system are added
     """
     cFuncName = colored(os.path.basename(__file__), 'yellow') + ' - ' + colored(sys._getframe().f_code.co_name, 'green')
 
     logger.info('{func:s}: calculating number of SVs in PVT and DOP values'.format(func=cFuncName))
 
-    # calculate sin/cos of elevation/azimuth
-    dfSats['sinEl'] = np.sin(np.deg2rad(dfSats.Elev))
-    dfSats['cosEl'] = np.cos(np.deg2rad(dfSats.Elev))
-    dfSats['sinAz'] = np.sin(np.deg2rad(dfSats.Azim))
-    dfSats['cosAz'] = np.cos(np.deg2rad(dfSats.Azim))
-
-    # calculate the direction cosines for each satellite
-    dfSats['alpha'] = dfSats['cosEl'] * dfSats['sinAz']
-    dfSats['beta'] = dfSats['cosEl'] * dfSats['cosAz']
-    dfSats['gamma'] = dfSats['sinEl']
+    xDOPs = ('HDOP', 'VDOP', 'PDOP', 'TDOP', 'GDOP')
 
-    amc.logDataframeInfo(df=dfSats, dfName='dfSats', callerName=cFuncName, logger=logger)
+    # multi-frequency records of a SV share the same geometry, keep one per epoch
+    dfGeom = dfSats[['DT', 'SV', 'Elev', 'Azim']].drop_duplicates(subset=['DT', 'SV'])
+    naEpochs = dfGeom['DT'].to_numpy()
+    naElev = dfGeom['Elev'].to_numpy()
+    naAzim = dfGeom['Azim'].to_numpy()
+    naSysts = dfGeom['SV'].str[0].to_numpy()
 
-    # get count of SVs
-    dfSVCount = countSVs(dfSVs=dfSats, logger=logger)
-    amc.logDataframeInfo(df=dfSVCount, dfName='dfSVCount', callerName=cFuncName, logger=logger)
+    # group the SVs per epoch and stack the geometry matrices (one clock column per system) of all epochs
+    naDTs, naGeom, naMask = dop.stackGeometry(epochs=naEpochs, elev=naElev, azim=naAzim, systems=naSysts)
+    logger.info('{func:s}: calculating xDOP values for {epochs:d} epochs (max {nsv:d} SVs, {clks:d} clocks)'.format(func=cFuncName, epochs=naGeom.shape[0], nsv=naGeom.shape[1], clks=naGeom.shape[2] - 3))
 
-    # calculating DOP is time consumig, so thin down the TOWs
-    naTOWs4DOP = getTOWs4DOP(dfNrSVs=dfSVCount, logger=logger)
-    logger.debug('{func:s} TOWs for calculating DOPs = {array!s}'.format(func=cFuncName, array=naTOWs4DOP))
+    # solve all normal matrices at once
+    dDOPs = dop.batchDOP(naGeom)
 
     # create a dataframe for DOP values containing the DateTime column (unique values)
-    dfDOPs = pd.DataFrame(naTOWs4DOP, columns=['DT'])
-    amc.logDataframeInfo(df=dfDOPs, dfName='dfDOPs start', callerName=cFuncName, logger=logger)
-
-    # select the #SVs from dfSVCount for the intervals we use for DOP calculation
-    # amutils.logHeadTailDataFrame(logger=logger, callerName=cFuncName, df=dfSVCount, dfName='dfSVCount')
-    dfNrSVs4DOP = dfSVCount.loc[dfSVCount['DT'].isin(naTOWs4DOP)]
-    dfNrSVs4DOP.reset_index(inplace=True)
-    amc.logDataframeInfo(df=dfNrSVs4DOP, dfName='dfNrSVs4DOP', callerName=cFuncName, logger=logger)
-
-    # merge last column with #SVs into dfDops
-    dfDOPs.loc[:, '#SVs'] = dfNrSVs4DOP['#SVs']
-
-    # add NA columns for xDOP values
-    dfDOPs = dfDOPs.reindex(columns=dfDOPs.columns.tolist() + ['HDOP', 'VDOP', 'PDOP', 'GDOP'])
-    # amutils.logHeadTailDataFrame(logger=logger, callerName=cFuncName, df=dfDOPs, dfName='dfDOPs')
-
-    # iterate over all unique TOWs to determine corresponding xDOP values
-    logger.info('{func:s}: calculating xDOP values for {epochs:d} epochs'.format(func=cFuncName, epochs=len(naTOWs4DOP)))
-
-    for i, DT in enumerate(naTOWs4DOP):
-        # get the index for each DT we have so that we can select the direction cosines associated
-        # DT = '2019-04-10 00:00:00'
-        # dt = DT.strptime('%Y-%m-%d %H:%M:%S')
-        # print('DT = {!s}   {!s}'.format(DT, type(DT)))
-        # print('np.datetime64(DT) = {!s}   {!s}'.format(np.datetime64(DT), type(np.datetime64(DT))))
-        # print('dfSats[DT].iloc[0] = {!s}   {!s}'.format(dfSats['DT'].iloc[0], type(dfSats['DT'].iloc[0])))
-
-        towIndices = dfSats.index[dfSats['DT'] == np.datetime64(DT)].tolist()
-        # print('towIndices = {!s}'.format(towIndices))
-
-        # create matrix with the direction cosines
-        dfTOW = dfSats[['alpha', 'beta', 'gamma']].iloc[towIndices]
-        dfTOW['delta'] = 1.
-        A = dfTOW.to_numpy()
-        # print('dfTOW = {!s}'.format(dfTOW))
-        # print('dfTOW = {!s}'.format(type(dfTOW)))
-
-        # invert ATA and retain the diagonal squared
-        ATAinvDiag = np.linalg.inv(A.transpose().dot(A)).diagonal()
-        sqDiag = np.square(ATAinvDiag)
-        # print('ATAinvDiag = \n{!s}  \n{!s}'.format(ATAinvDiag, type(ATAinvDiag)))
-        # print('sqDiag = \n{!s}  \n{!s}'.format(sqDiag, type(sqDiag)))
-
-        # get the index for this DT into the dfDOPs
-        indexTOW = dfDOPs.index[dfDOPs['DT'] == DT].tolist()[0]
-        # print('index DT = {!s}'.format(indexTOW))
-
-        # calculate the xDOP values and store them in the dfDOPs
-        PDOP = np.sqrt(sqDiag[0] + sqDiag[1] + sqDiag[2])
-
-        dfDOPs.HDOP.iloc[indexTOW] = np.sqrt(sqDiag[0] + sqDiag[1])
-        dfDOPs.VDOP.iloc[indexTOW] = ATAinvDiag[2]
-        dfDOPs.PDOP.iloc[indexTOW] = PDOP
-        dfDOPs.GDOP.iloc[indexTOW] = np.sqrt(sqDiag[0] + sqDiag[1] + sqDiag[2] + sqDiag[3])
-
-        # print('dfDOPS.iloc[indexTOW] = {!s}'.format(dfDOPs.iloc[indexTOW]))
-
-        # show progress bar
-        progbar(i, len(naTOWs4DOP), 60)
-
-    print()  # empty print statement for ending progbar
-    # drop the cos/sin & direction cosines columns from dfSats
-    dfSats.drop(['sinEl', 'cosEl', 'sinAz', 'cosAz', 'alpha', 'beta', 'gamma'], axis=1, inplace=True)
+    dfDOPs = pd.DataFrame({'DT': naDTs, '#SVs': naMask.sum(axis=1)})
+    for xDOP in xDOPs:
+        dfDOPs[xDOP] = dDOPs[xDOP]
+
+    # add the xDOP values per satellite system for multi-GNSS solutions
+    systs = np.unique(naSysts)
+    if len(systs) > 1:
+        for syst in systs:
+            sysName = rtkc.dGNSSNames.get(syst, syst)
+            sysRows = naSysts == syst
+
+            naSysDTs, naSysGeom, naSysMask = dop.stackGeometry(epochs=naEpochs[sysRows], elev=naElev[sysRows], azim=naAzim[sysRows])
+            dSysDOPs = dop.batchDOP(naSysGeom)
+
+            # locate the epochs of this system in the combined epochs
+            sysIndex = np.searchsorted(naDTs, naSysDTs)
+
+            naSysNrSVs = np.zeros(len(naDTs), dtype=int)
+            naSysNrSVs[sysIndex] = naSysMask.sum(axis=1)
+            dfDOPs['#SVs.{syst:s}'.format(syst=sysName)] = naSysNrSVs
+            for xDOP in xDOPs:
+                naSysDOP = np.full(len(naDTs), np.nan)
+                naSysDOP[sysIndex] = dSysDOPs[xDOP]
+                dfDOPs['{dop:s}.{syst:s}'.format(dop=xDOP, syst=sysName)] = naSysDOP
 
     amc.logDataframeInfo(df=dfDOPs, dfName='dfDOPs (end)', callerName=cFuncName, logger=logger)
     amutils.logHeadTailDataFrame(logger=logger, callerName=cFuncName, df=dfDOPs, dfName='dfDOPs')
@@ -382,13 +418,13 @@ def calcDOPs(dfSats: pd.DataFrame, logger: logging.Logger) -> pd.DataFrame:
     return dfDOPs
 
 
-def parseClockBias(statsClk: tempfile._TemporaryFileWrapper, logger: logging.Logger) -> pd.DataFrame:
+def parseClockBias(statsClk: io.StringIO, logger: logging.Logger) -> pd.DataFrame:
     """
     parse the clock file
     """
     cFuncName = colored(os.path.basename(__file__), 'yellow') + ' - ' + colored(sys._getframe().f_code.co_name, 'green')
 
-    logger.info('{func:s}: parsing RTKLib clock statistics {file:s}'.format(func=cFuncName, file=statsClk.name))
+    logger.info('{func:s}: parsing RTKLib clock statistics'.format(func=cFuncName))
 
     # # read in the satellite status file
     # print('colNames = {!s}'.format(rtkc.dRTKPosStat['Clk']['colNames']))
@@ -405,7 +441,7 @@ def parseClockBias(statsClk: tempfile._TemporaryFileWrapper, logger: logging.Log
     # input("Press Enter to continue...")
 
     # read in the satellite status file
-    dfCLKs = pd.read_csv(statsClk.name, header=None, sep=',', usecols=[*range(1, 9)])
+    dfCLKs = pd.read_csv(statsClk, header=None, sep=',', usecols=[*range(1, 9)])
     dfCLKs.columns = rtkc.dRTKPosStat['Clk']['useCols']
     amutils.printHeadTailDataFrame(df=dfCLKs, name='dfCLKs range')
 
@@ -419,7 +455,7 @@ def parseClockBias(statsClk: tempfile._TemporaryFileWrapper, logger: logging.Log
     # if value of clk parameters is 0 replace by NaN
     dfCLKs[cols] = dfCLKs[cols].replace({0: np.nan})
     # add DateTime
-    dfCLKs['DT'] = dfCLKs.apply(lambda x: gpstime.UTCFromWT(x['WNC'], x['TOW']), axis=1)
+    dfCLKs['DT'] = gpstime.UTCFromWTArray(dfCLKs['WNC'].to_numpy(), dfCLKs['TOW'].to_numpy())
 
     amc.logDataframeInfo(df=dfCLKs, dfName='dfCLKs', callerName=cFuncName, logger=logger)
 
@@ -428,114 +464,30 @@ def parseClockBias(statsClk: tempfile._TemporaryFileWrapper, logger: logging.Log
     return dfCLKs
 
 
-def progbar(curr, total, full_progbar):
-    frac = curr / total
-    filled_progbar = round(frac * full_progbar)
-    print('\r', '#' * filled_progbar + '-' * (full_progbar - filled_progbar), '[{:>7.1%}]'.format(frac), end='')
-
-
-def countSVs(dfSVs: pd.DataFrame, logger: logging.Logger) -> pd.DataFrame:
-    """
-    get a count of SVs for each TOW and determine the difference between these counts
-    """
-    cFuncName = colored(os.path.basename(__file__), 'yellow') + ' - ' + colored(sys._getframe().f_code.co_name, 'green')
-
-    dfCountSVs = pd.DataFrame(dfSVs.groupby('DT').size())
-
-    amc.logDataframeInfo(df=dfCountSVs, dfName='dfCountSVs', callerName=cFuncName, logger=logger)
-
-    dfCountSVs.reset_index(inplace=True)
-    dfCountSVs.columns = ['DT', '#SVs']
-
-    # find jumps in number of sats whic introduces a change in DOP values
-    dfCountSVs['dSVs'] = dfCountSVs['#SVs'].diff()
-
-    amc.logDataframeInfo(df=dfCountSVs, dfName='dfCountSVs', callerName=cFuncName, logger=logger)
-
-    return dfCountSVs
-
-
-def getTOWs4DOP(dfNrSVs: pd.DataFrame, logger: logging.Logger) -> np.ndarray:
+def addPDOPStatistics(dRtk: dict, dfPos: pd.DataFrame, logger: logging.Logger) -> pd.DataFrame:
     """
-    getTOWs4DOP selects
-    - eveny spread TOWs so that max 1440 DOPs are calculated per session
-    - the TOWs at and just before the #SVs changes
-    returns a numpy array with these TOWs for calculating DOP
-    """
-    cFuncName = colored(os.path.basename(__file__), 'yellow') + ' - ' + colored(sys._getframe().f_code.co_name, 'green')
-
-    # dtermine the interval and number of epochs
-    stepTOWs = 4800
-
-    # get index for every stepTOWs row
-    naSteppedIndex = dfNrSVs.iloc[::stepTOWs].index.tolist()
-    naSteppedIndex.append(dfNrSVs.index[-1])
-
-    # serach for TOWs at the changes in number of SVs
-    indexSVChanges = dfNrSVs.dSVs.to_numpy().nonzero()[0]
-    index2SVChanges = indexSVChanges[indexSVChanges != 0] - 1  # eoch before change in number of SVs
-
-    # combine these indices
-    naIndexSVChanges = np.concatenate([indexSVChanges, index2SVChanges, naSteppedIndex])
-
-    # sort the indexes
-    naIndexSVChangesSorted = np.unique(np.sort(naIndexSVChanges))
-
-    naTOWs4DOP = dfNrSVs['DT'].values[naIndexSVChangesSorted]  # .strftime('%Y-%m-%d %H:%M:%S')
-    # print('naTOWs4DOP.iloc[0] = {!s}  {:d}  {!s}\n'.format(naTOWs4DOP[0], len(naTOWs4DOP), type(naTOWs4DOP)))
-
-    logger.debug('{func:s}: numpy array naTOWs4DOP #{size:d} type = {type!s}\n {array!s}  '.format(func=cFuncName, array=naTOWs4DOP, size=len(naTOWs4DOP), type=type(naTOWs4DOP)))
-
-    return naTOWs4DOP
-
-
-def addPDOPStatistics(dRtk: dict, dfPos: pd.DataFrame, logger: logging.Logger):
-    """
-    add the statistics for PDOP bins for E, N and U coordinates
+    add the statistics for PDOP bins for E, N and U coordinates, returns them also as tidy dataframe
     """
     cFuncName = colored(os.path.basename(__file__), 'yellow') + ' - ' + colored(sys._getframe().f_code.co_name, 'green')
 
     logger.info('{func:s}: add the statistics for PDOP bins for E, N and U coordinates'.format(func=cFuncName))
 
-    # go over the different bin values
-    for i in range(len(dRtk['PDOP']['bins']) - 1):
-        binInterval = 'bin{:d}-{:.0f}'.format(dRtk['PDOP']['bins'][i], dRtk['PDOP']['bins'][i + 1])
-        logger.debug('{func:s}: binInterval = {bin!s}'.format(bin=binInterval, func=cFuncName))
-
-        # create the dict for this PDOP interval
-        dRtk['PDOP'][binInterval] = {}
-        # find index for the diffrerent PDOP bins selected
-        index4Bin = (dfPos['PDOP'] > dRtk['PDOP']['bins'][i]) & (dfPos['PDOP'] <= dRtk['PDOP']['bins'][i + 1])
-
-        dRtk['PDOP'][binInterval]['perc'] = index4Bin.mean()
-
-        # determine the statistics we want for each coordinate
-        for j, posCrd in enumerate(['UTM.N', 'UTM.E', 'ellH']):  # lat       lon      ellH
-            dCrd = {}
-
-            dCrd['mean'] = dfPos.loc[index4Bin, posCrd].mean()
-            dCrd['stddev'] = dfPos.loc[index4Bin, posCrd].std()
-            dCrd['min'] = dfPos.loc[index4Bin, posCrd].min()
-            dCrd['max'] = dfPos.loc[index4Bin, posCrd].max()
-
-            dRtk['PDOP'][binInterval][posCrd] = dCrd
-
-            logger.debug('{func:s}: in {bin:s} statistics for {crd:s} are {stat!s}'.format(func=cFuncName, bin=binInterval, crd=posCrd, stat=dCrd))
-
-    # add also for all witin bin of [0..6]
-    dRtk['PDOP']['PDOPlt6'] = {}
+    posCrds = ['UTM.N', 'UTM.E', 'ellH']  # lat       lon      ellH
+    sdCrds = ['sdn', 'sde', 'sdu']
 
-    indexBin06 = (dfPos['PDOP'] <= 6)
-    dRtk['PDOP']['PDOPlt6']['perc'] = indexBin06.mean()
+    # go over the different bin values and add also for all witin bin of [0..6]
+    for dopBins, binName in zip((dRtk['PDOP']['bins'], [0, 6]), (None, 'PDOPlt6')):
+        dStats, dfStats = enu_stat.dopbin_statistics(df=dfPos, crds=posCrds, sdcrds=sdCrds, dop_bins=dopBins, logger=logger)
 
-    for j, posCrd in enumerate(['UTM.N', 'UTM.E', 'ellH']):  # lat       lon      ellH
-        dCrd = {}
+        for binInterval, dBin in dStats.items():
+            binKey = binInterval if binName is None else binName
+            dRtk['PDOP'][binKey] = {'perc': dBin['perc']}
+            for posCrd in posCrds:
+                dRtk['PDOP'][binKey][posCrd] = {'mean': dBin[posCrd]['mean'], 'stddev': dBin[posCrd]['std'], 'min': dBin[posCrd]['min'], 'max': dBin[posCrd]['max']}
 
-        dCrd['mean'] = dfPos.loc[indexBin06, posCrd].mean()
-        dCrd['stddev'] = dfPos.loc[indexBin06, posCrd].std()
-        dCrd['min'] = dfPos.loc[indexBin06, posCrd].min()
-        dCrd['max'] = dfPos.loc[indexBin06, posCrd].max()
+                logger.debug('{func:s}: in {bin:s} statistics for {crd:s} are {stat!s}'.format(func=cFuncName, bin=binKey, crd=posCrd, stat=dRtk['PDOP'][binKey][posCrd]))
 
-        dRtk['PDOP']['PDOPlt6'][posCrd] = dCrd
+        if binName is None:
+            dfPDOPStats = dfStats
 
-        logger.debug('{func:s}: in bin0-6 statistics for {crd:s} are {stat!s}'.format(func=cFuncName, crd=posCrd, stat=dCrd))
+    return dfPDOPStats
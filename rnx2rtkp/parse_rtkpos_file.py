@@ -71,7 +71,7 @@ def parsePosFile(logger: logging.Logger) -> pd.DataFrame:
     logger.info('{func:s}: amc.dRTK = \n{drtk!s}'.format(func=cFuncName, drtk=amc.dRTK))
 
     # convert the time in seconds
-    dfPos['DT'] = dfPos.apply(lambda x: gpstime.UTCFromWT(x['WNC'], x['TOW']), axis=1)
+    dfPos['DT'] = gpstime.UTCFromWTArray(dfPos['WNC'].to_numpy(), dfPos['TOW'].to_numpy())
 
     # add UTM coordinates
     dfPos['UTM.E'], dfPos['UTM.N'], dfPos['UTM.Z'], dfPos['UTM.L'] = utm.from_latlon(dfPos['lat'].to_numpy(), dfPos['lon'].to_numpy())
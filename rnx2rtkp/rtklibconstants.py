@@ -7,6 +7,8 @@ dRTKPosStat = {}
 dResiduals = {}
 dResiduals['colNames'] = ('ID', 'WNC', 'TOW', 'SV', 'Freq', 'Azim', 'Elev', 'PRres', 'CFres', 'Valid', 'CN0', 'FIX', 'Slip', 'lock', 'OutageCount', 'SlipCount', 'OutlierCount')
 dResiduals['useCols'] = ('WNC', 'TOW', 'SV', 'Freq', 'Azim', 'Elev', 'PRres', 'CFres', 'Valid', 'CN0')
+# compact dtypes used for the (large) SAT part, TOW is converted to int32 milliseconds (TOWms) after parsing
+dResiduals['dtypes'] = {'WNC': 'int16', 'TOW': 'float64', 'SV': 'category', 'Freq': 'int8', 'Azim': 'float32', 'Elev': 'float32', 'PRres': 'float32', 'CFres': 'float32', 'Valid': 'int8', 'CN0': 'float32'}
 
 dCartesian = {}
 dCartesian['colNames'] = ('ID', 'WNC', 'TOW', 'mode', 'X', 'Y', 'Z', 'Xfix', 'Yfix', 'Zfix')
@@ -21,6 +23,9 @@ dRTKPosStat['Res'] = dResiduals
 dRTKPosStat['Cart'] = dCartesian
 dRTKPosStat['Clk'] = dClock
 
+# names used for the satellite systems (first letter of SV)
+dGNSSNames = {'G': 'GPS', 'E': 'GAL', 'R': 'GLO', 'C': 'BDS', 'J': 'QZS', 'S': 'SBS', 'I': 'IRN'}
+
 # links between the text and numeric values used by RTKLIB
 # Positioning mode
 dPosMode = {0: 'single', 1: 'dgps', 2: 'kinematic', 3: 'static', 4: 'moving-base', 5: 'fixed', 6: 'ppp-kinematic', 7: 'ppp-static'}
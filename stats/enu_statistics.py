@@ -67,3 +67,92 @@ def enupdop_distribution(dRtk: dict, dfENU: pd.DataFrame, logger: logging.Logger
         dfPDOPDist[dop_col] = pd.cut(dfENU[dop_col], bins=dop_bins).value_counts(sort=False)
 
     return dfENUDist, dfPDOPDist
+
+
+def dopbin_index(naDOP: np.ndarray, dop_bins: list) -> np.ndarray:
+    """
+    dopbin_index returns for each xDOP value the index of its bin (lower bound excluded, upper bound included), -1 if outside the bins
+    """
+    binIdx = np.digitize(naDOP, dop_bins, right=True) - 1
+    binIdx[np.isnan(naDOP) | (binIdx >= len(dop_bins) - 1)] = -1
+
+    return binIdx
+
+
+def dopbin_labels(dop_bins: list) -> list:
+    """
+    dopbin_labels returns the names of the xDOP bins (eg bin2-3)
+    """
+    return ['bin{:.0f}-{:.0f}'.format(dop_min, dop_max) for dop_min, dop_max in zip(dop_bins[:-1], dop_bins[1:])]
+
+
+def dopbin_statistics(df: pd.DataFrame, crds: list, dop_bins: list, logger: logging.Logger, sdcrds: list = None, dop_col: str = 'PDOP') -> Tuple[dict, pd.DataFrame]:
+    """
+    dopbin_statistics calculates per xDOP bin (lower bound excluded, upper bound included) the count, mean, median, std,
+    min and max of the coordinates. When the standard deviations sdcrds of the coordinates are given, the weighted
+    average and weighted standard deviation (weights 1/sd^2) are added. The bin of each epoch is determined once and
+    all statistics come from a single groupby.
+    returns the statistics as dict (per bin and coordinate) and as tidy dataframe (a row per bin and coordinate)
+    """
+    cFuncName = colored(os.path.basename(__file__), 'yellow') + ' - ' + colored(sys._getframe().f_code.co_name, 'green')
+
+    logger.info('{func:s}: calculating coordinate statistics per {dop:s} bin'.format(dop=dop_col, func=cFuncName))
+
+    # determine the bin index for each epoch, -1 if outside the bins
+    naDOP = df[dop_col].to_numpy(dtype=np.float64)
+    nrBins = len(dop_bins) - 1
+    binIdx = dopbin_index(naDOP=naDOP, dop_bins=dop_bins)
+    binLabels = dopbin_labels(dop_bins=dop_bins)
+    binCounts = np.bincount(binIdx[binIdx >= 0], minlength=nrBins)
+
+    # collect values and (centered) weighted sums so that one groupby gives all statistics
+    dfVal = pd.DataFrame(index=df.index)
+    dAggs = {}
+    dCenter = {}
+    for i, crd in enumerate(crds):
+        naCrd = df[crd].to_numpy(dtype=np.float64)
+        dfVal[crd] = naCrd
+        dAggs[crd] = ['count', 'mean', 'median', 'std', 'min', 'max']
+
+        if sdcrds is not None:
+            naWeight = 1 / np.square(df[sdcrds[i]].to_numpy(dtype=np.float64))
+            naWeight[np.isnan(naCrd) | ~np.isfinite(naWeight)] = np.nan
+            # center the coordinate to avoid loss of precision in the weighted sum of squares
+            dCenter[crd] = np.nanmean(naCrd) if np.any(~np.isnan(naCrd)) else 0.
+            naCentered = naCrd - dCenter[crd]
+
+            dfVal['w.' + crd] = naWeight
+            dfVal['wx.' + crd] = naWeight * naCentered
+            dfVal['wxx.' + crd] = naWeight * np.square(naCentered)
+            for wCol in ('w.', 'wx.', 'wxx.'):
+                dAggs[wCol + crd] = 'sum'
+
+    dfAgg = dfVal[binIdx >= 0].groupby(binIdx[binIdx >= 0]).agg(dAggs).reindex(range(nrBins))
+
+    # create the tidy dataframe
+    lstStats = []
+    for crd in crds:
+        dfCrd = dfAgg[crd].copy()
+        dfCrd['count'] = dfCrd['count'].fillna(0).astype(int)
+        if sdcrds is not None:
+            sumW = dfAgg[('w.' + crd, 'sum')].where(lambda x: x > 0)
+            wMean = dfAgg[('wx.' + crd, 'sum')] / sumW
+            dfCrd['wavg'] = wMean + dCenter[crd]
+            dfCrd['sdwavg'] = np.sqrt((dfAgg[('wxx.' + crd, 'sum')] / sumW - np.square(wMean)).clip(lower=0))
+        dfCrd.insert(0, 'crd', crd)
+        dfCrd.insert(0, 'bin', binLabels)
+        dfCrd.insert(2, 'perc', binCounts / max(len(naDOP), 1))
+        lstStats.append(dfCrd)
+
+    dfStats = pd.concat(lstStats).sort_index(kind='stable').reset_index(drop=True)
+
+    # create the dict for the json output
+    dStats = {}
+    for i, binLabel in enumerate(binLabels):
+        dStats[binLabel] = {'perc': float(binCounts[i] / max(len(naDOP), 1)), 'count': int(binCounts[i])}
+    for _, row in dfStats.iterrows():
+        dStats[row['bin']][row['crd']] = {stat: float(row[stat]) for stat in ('wavg', 'sdwavg', 'mean', 'median', 'std', 'min', 'max') if stat in row.index}
+
+    amutils.logHeadTailDataFrame(logger=logger, callerName=cFuncName, df=dfStats, dfName='dfStats')
+
+    return dStats, dfStats
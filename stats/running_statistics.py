@@ -0,0 +1,98 @@
+import numpy as np
+
+__author__ = 'amuls'
+
+# the running statistics kept per group and variable
+running_keys = ('count', 'mean', 'm2', 'min', 'max', 'wsum', 'wmean', 'wm2', 'last', 'sdlast')
+
+
+def running_init(nr_groups: int, nr_vars: int) -> dict:
+    """
+    running_init creates the state of the running statistics for nr_groups groups of nr_vars variables
+    """
+    drun = {key: np.zeros((nr_groups, nr_vars)) for key in running_keys}
+    drun['min'][:] = np.inf
+    drun['max'][:] = -np.inf
+    drun['last'][:] = np.nan
+    drun['sdlast'][:] = np.nan
+
+    return drun
+
+
+def running_update(drun: dict, values: np.ndarray, groups: np.ndarray = None, sds: np.ndarray = None):
+    """
+    running_update adds a batch of observations (rows of values, a column per variable) to the running statistics.
+    Each row belongs to the group given in groups (negative means not used, default group 0). When the standard
+    deviations sds are given, the weighted statistics (weights 1/sd^2) are updated as well. The statistics of the
+    batch are merged with the running ones (Welford / Chan et al.) so that the state has a fixed size
+    """
+    nr_groups, nr_vars = drun['count'].shape
+    values = np.asarray(values, dtype=np.float64).reshape(-1, nr_vars)
+    groups = np.zeros(values.shape[0], dtype=np.intp) if groups is None else np.asarray(groups, dtype=np.intp)
+
+    for j in range(nr_vars):
+        use = (groups >= 0) & ~np.isnan(values[:, j])
+        grp = groups[use]
+        x = values[use, j]
+        if x.size == 0:
+            continue
+
+        # statistics of the batch per group
+        n_b = np.bincount(grp, minlength=nr_groups).astype(np.float64)
+        has_b = n_b > 0
+        mean_b = np.bincount(grp, weights=x, minlength=nr_groups) / np.where(has_b, n_b, 1)
+        m2_b = np.bincount(grp, weights=np.square(x - mean_b[grp]), minlength=nr_groups)
+
+        # merge with the running statistics
+        n_a = drun['count'][:, j]
+        n = n_a + n_b
+        delta = mean_b - drun['mean'][:, j]
+        drun['mean'][:, j] += np.where(has_b, delta * n_b / np.where(has_b, n, 1), 0)
+        drun['m2'][:, j] += m2_b + np.where(has_b, np.square(delta) * n_a * n_b / np.where(has_b, n, 1), 0)
+        drun['count'][:, j] = n
+
+        np.fmin.at(drun['min'][:, j], grp, x)
+        np.fmax.at(drun['max'][:, j], grp, x)
+
+        # last observation of each group in this batch
+        last = np.full(nr_groups, -1)
+        np.maximum.at(last, grp, np.flatnonzero(use))
+        drun['last'][has_b, j] = values[last[has_b], j]
+
+        if sds is not None:
+            sd = np.asarray(sds, dtype=np.float64).reshape(-1, nr_vars)[:, j]
+            drun['sdlast'][has_b, j] = sd[last[has_b]]
+
+            w = 1 / np.square(sd[use])
+            wuse = np.isfinite(w)
+            w_b = np.bincount(grp[wuse], weights=w[wuse], minlength=nr_groups)
+            has_w = w_b > 0
+            wmean_b = np.bincount(grp[wuse], weights=w[wuse] * x[wuse], minlength=nr_groups) / np.where(has_w, w_b, 1)
+            wm2_b = np.bincount(grp[wuse], weights=w[wuse] * np.square(x[wuse] - wmean_b[grp[wuse]]), minlength=nr_groups)
+
+            w_a = drun['wsum'][:, j]
+            w_tot = w_a + w_b
+            wdelta = wmean_b - drun['wmean'][:, j]
+            drun['wmean'][:, j] += np.where(has_w, wdelta * w_b / np.where(has_w, w_tot, 1), 0)
+            drun['wm2'][:, j] += wm2_b + np.where(has_w, np.square(wdelta) * w_a * w_b / np.where(has_w, w_tot, 1), 0)
+            drun['wsum'][:, j] = w_tot
+
+
+def running_results(drun: dict, group: int, var: int) -> dict:
+    """
+    running_results returns the statistics (mean, std, min, max, wavg, sdwavg, kf, sdkf) of a variable in a group
+    """
+    n = drun['count'][group, var]
+    w = drun['wsum'][group, var]
+
+    dres = {}
+    dres['wavg'] = float(drun['wmean'][group, var]) if w > 0 else np.nan
+    dres['sdwavg'] = float(np.sqrt(drun['wm2'][group, var] / w)) if w > 0 else np.nan
+    dres['mean'] = float(drun['mean'][group, var]) if n > 0 else np.nan
+    dres['std'] = float(np.sqrt(drun['m2'][group, var] / (n - 1))) if n > 1 else np.nan
+    dres['min'] = float(drun['min'][group, var]) if n > 0 else np.nan
+    dres['max'] = float(drun['max'][group, var]) if n > 0 else np.nan
+    dres['kf'] = float(drun['last'][group, var])
+    dres['sdkf'] = float(drun['sdlast'][group, var])
+
+    return dres